@@ -2,9 +2,12 @@
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 """
 Main entry point for the Anki add-on.
+
+Only the hooks are registered at startup. The stores, dialogs and widgets
+are imported when the Study Buddy button is first clicked (see hooks.py).
 """
 from .hooks import patch_all
-from .const import ADDON_VERSION
+from .version import ADDON_VERSION
 
 print("Enabling AnkiBuddy version %s" % ADDON_VERSION)
 patch_all()
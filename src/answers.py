@@ -0,0 +1,265 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Answers module. Checks written answers (Write the Answer questions)
+against a card's field.
+
+Both the field and the typed answer are normalized (see normalize()):
+Unicode NFKC (so full-width and half-width forms match), case folding,
+katakana folded to hiragana, and whitespace collapsed. The field is
+also split into the answers it accepts (see accepted_answers()): the
+plain text without html, each alternate of "a; b" or "a、b", the text
+with and without parenthesized parts, and the kana reading of furigana.
+Commas and slashes don't separate alternates, since they are part of
+answers like "1,000" or "and/or".
+
+The accepted answers of a field are computed once per card and cached
+with the store (see AnswerCache, NotecardStore.answers). Checking an
+answer is then a set lookup, or, with typos allowed, a bounded
+Levenshtein distance per accepted answer (see bounded_levenshtein()).
+With romaji input on, a typed answer is also checked as kana, so that
+"kitte" is accepted for きって (see kana.romaji_to_kana()).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+import re
+import unicodedata
+
+from .furigana import FURIGANA_RE
+from .kana import romaji_to_kana, to_hiragana
+from .render import RenderCache, plain_text
+
+if TYPE_CHECKING:
+    from .stores import Notecard
+
+ALTERNATES = frozenset(";、")
+PARENS_RE = re.compile(r"\([^()]*\)")
+SPACES_RE = re.compile(r"\s+")
+
+# with typos allowed, answers need this many characters per typo
+CHARS_PER_TYPO = 4
+
+
+def normalize(text: str) -> str:
+    """Normalize an answer for comparison, see module docstring.
+
+    Args:
+        text (str): Answer text, without html.
+
+    Returns:
+        str: Normalized text.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = to_hiragana(text)
+    return SPACES_RE.sub(" ", text).strip()
+
+
+def split_alternates(text: str) -> list[str]:
+    """Split a field into its alternates, at the ALTERNATES that are not
+    in parentheses: "a; b (c; d)" -> ["a", " b (c; d)"].
+
+    Args:
+        text (str): Text without html.
+
+    Returns:
+        list[str]: Alternates, [text] if there is only one.
+    """
+    parts = []
+    depth = start = 0
+    for i, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif char in ALTERNATES and not depth:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def accepted_answers(text: str, plain: str) -> frozenset[str]:
+    """Get the normalized answers a field accepts, see module docstring.
+
+    Args:
+        text (str): Raw field text.
+        plain (str): Field text without html, sound tags or furigana
+            readings (see render.RenderRecord.plain).
+
+    Returns:
+        frozenset[str]: Normalized answers, without empty ones.
+    """
+    variants = [plain]
+    if "[" in text:  # furigana, accept the reading instead of the kanji
+        variants.append(plain_text(FURIGANA_RE.sub(r"\2", text)))
+    for variant in list(variants):
+        alternates = split_alternates(variant)
+        if len(alternates) > 1:
+            variants.extend(alternates)
+    for variant in list(variants):
+        if "(" in variant:
+            variants.append(PARENS_RE.sub("", variant))
+            variants.append(variant.replace("(", "").replace(")", ""))
+
+    answers = set()
+    for variant in variants:
+        answer = normalize(variant)
+        if answer:
+            answers.add(answer)
+    return frozenset(answers)
+
+
+def bounded_levenshtein(a: str, b: str, k: int) -> int:
+    """Get the edit distance (insertions, deletions, substitutions)
+    between two texts, if it is at most k.
+
+    Only the diagonal band of width 2k + 1 of the distance table is
+    computed, so this is O(min(len) * k), and it stops as soon as a whole
+    row of the band is over k.
+
+    Args:
+        a (str): Text.
+        b (str): Other text.
+        k (int): Largest distance of interest.
+
+    Returns:
+        int: The distance, or k + 1 if it is more than k.
+    """
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    n, m = len(a), len(b)
+    over = k + 1
+    if m - n > k:
+        return over
+    if n == 0:
+        return m
+
+    # prev[j], curr[j]: distance between a[:i - 1] (a[:i]) and b[:j], for
+    # j in the band of row i; the cells just outside the band are "over"
+    prev = [j if j <= k else over for j in range(m + 1)]
+    curr = [over] * (m + 1)
+    for i in range(1, n + 1):
+        lo = max(1, i - k)
+        hi = min(m, i + k)
+        curr[lo - 1] = i if lo == 1 else over
+        row_min = curr[lo - 1]
+        char = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (char != b[j - 1])
+            if prev[j] + 1 < cost:
+                cost = prev[j] + 1
+            if curr[j - 1] + 1 < cost:
+                cost = curr[j - 1] + 1
+            if cost > over:
+                cost = over
+            curr[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > k:
+            return over
+        if hi < m:
+            curr[hi + 1] = over
+        prev, curr = curr, prev
+    return prev[m]
+
+
+@dataclass(frozen=True)
+class Grade:
+    """Result of checking an answer.
+
+    Attributes:
+        correct: The answer is accepted.
+        typos: Edit distance to the closest accepted answer, 0 for an exact
+            (normalized) match.
+        closest: The closest accepted answer (normalized), or None if the
+            answer is wrong.
+    """
+    correct: bool
+    typos: int
+    closest: Optional[str] = None
+
+
+def grade(answers: frozenset[str], text: str, max_typos: int = 0,
+          romaji: bool = False) -> Grade:
+    """Check a typed answer.
+
+    Args:
+        answers (frozenset[str]): Accepted answers, see accepted_answers().
+        text (str): Typed answer.
+        max_typos (int, optional): Edits allowed for an answer to still be
+            accepted ("almost correct"), at most one per CHARS_PER_TYPO
+            characters of the answer. Defaults to 0, for exact matches.
+        romaji (bool, optional): Also check the answer converted from
+            romaji to kana. Defaults to False.
+
+    Returns:
+        Grade: Result.
+    """
+    typed = [normalize(text)]
+    if romaji:
+        kana = romaji_to_kana(typed[0])
+        if kana != typed[0]:
+            typed.append(kana)
+    for candidate in typed:
+        if candidate in answers:
+            return Grade(True, 0, candidate)
+    best = None
+    for answer in answers:
+        k = min(max_typos, len(answer) // CHARS_PER_TYPO)
+        for candidate in typed:
+            if best is not None:
+                k = min(k, best.typos - 1)
+            if k <= 0:
+                break
+            typos = bounded_levenshtein(candidate, answer, k)
+            if typos <= k:
+                best = Grade(True, typos, answer)
+    return best or Grade(False, -1)
+
+
+class AnswerCache:
+    """Accepted answers of the fields of a notecard store, keyed by card id
+    and field name, like render.RenderCache.
+
+    Usage:
+        answers = store.answers.get(notecard, "Reading")
+        correct = grade(answers, typed, max_typos=1).correct
+    """
+    def __init__(self, render: RenderCache):
+        """Initialize an empty cache.
+
+        Args:
+            render (RenderCache): Render cache of the store, for the plain
+                text of the fields.
+        """
+        self.render = render
+        self._answers: dict[tuple[int, str], tuple[str, frozenset[str]]] = {}
+
+    def get(self, card: Notecard, field: str) -> frozenset[str]:
+        """Get the accepted answers of a card's field, computing them if
+        needed.
+
+        Args:
+            card (Notecard): Card.
+            field (str): Field name.
+
+        Returns:
+            frozenset[str]: Normalized answers.
+        """
+        key = (card.id, field)
+        text = card.fields[field]
+        cached = self._answers.get(key)
+        if cached is None or cached[0] != text:
+            record = self.render.get(card, field)
+            cached = self._answers[key] = (
+                text, accepted_answers(text, record.plain))
+        return cached[1]
+
+    def clear(self):
+        """Remove all cached answers."""
+        self._answers.clear()
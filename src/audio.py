@@ -0,0 +1,218 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Audio module. Plays the sounds of card fields through Anki's av_player,
+and the correct/incorrect feedback sounds in-process.
+
+The feedback sounds are loaded once per practice session with
+load_feedback(), into Qt Multimedia players that are kept ready to play,
+so they start without delay and don't go through av_player's queue (which
+would interrupt card audio). The .wav files in resources/ are played
+with QSoundEffect, which holds them decoded in memory (they are written by
+tools/feedback_sounds.py). If a .wav is missing, the .mp3 is preloaded
+into a QMediaPlayer instead, and without Qt Multimedia, av_player is used.
+
+File names from [sound:] tags are resolved to paths in the collection's
+media folder once and cached, and the files of upcoming questions can be
+read ahead of time in a background task, so that the OS has them in its
+page cache when they are played.
+
+There is one instance, AudioService, in ./const.py.
+"""
+from __future__ import annotations
+from typing import Iterable, Optional
+
+from os.path import dirname, isfile, join
+
+from aqt import mw
+from aqt.qt import QUrl
+from aqt.sound import av_player
+
+try:
+    from PyQt6 import QtMultimedia
+except ImportError:
+    try:
+        from PyQt5 import QtMultimedia
+    except ImportError:
+        QtMultimedia = None
+
+RESOURCES_DIR = join(dirname(__file__), "resources")
+FEEDBACK_SOUNDS = {True: "correct", False: "incorrect"}  # file names
+FEEDBACK_FORMATS = [".wav", ".mp3"]  # by preference
+
+PREFETCH_CHUNK = 1 << 16  # bytes read at a time when prefetching
+PREFETCH_LIMIT = 500  # max files per prefetch task
+
+
+class AudioService:
+    """Resolves and plays sound files, see module docstring.
+
+    Usage:
+        audio.play_file(record.sound)     # card sound, by file name
+        audio.play_feedback(correct)      # correct.wav / incorrect.wav
+        audio.prefetch([...file names...])
+    """
+    def __init__(self):
+        """Initialize the audio service. The media folder is looked up
+        on first use, since there is no collection when add-ons load."""
+        self._media_dir = None
+        self._paths: dict[str, Optional[str]] = {}  # file name -> path
+        self._prefetched: set[str] = set()  # paths
+        self._feedback = {
+            correct: next(filter(None, (
+                self._existing(join(RESOURCES_DIR, name + ext))
+                for ext in FEEDBACK_FORMATS)), None)
+            for correct, name in FEEDBACK_SOUNDS.items()
+        }
+        self._feedback_players: dict[bool, FeedbackPlayer] = {}
+
+    def media_dir(self) -> str:
+        """Get the media folder of the current collection. If the profile
+        was changed, the cached paths are cleared."""
+        media_dir = mw.col.media.dir()
+        if media_dir != self._media_dir:
+            self._media_dir = media_dir
+            self._paths.clear()
+            self._prefetched.clear()
+        return media_dir
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """Get the path of a sound file in the media folder.
+
+        Args:
+            filename (str): File name, as in a [sound:] tag.
+
+        Returns:
+            Optional[str]: Path of the file, or None if it doesn't exist.
+        """
+        media_dir = self.media_dir()
+        if filename not in self._paths:
+            self._paths[filename] = self._existing(join(media_dir, filename))
+        return self._paths[filename]
+
+    def play_file(self, filename: str):
+        """Play a sound file from the media folder. If it can't be found
+        there, the file name is passed to av_player as is.
+
+        Args:
+            filename (str): File name, as in a [sound:] tag.
+        """
+        if not filename:
+            return
+        av_player.play_file(self.resolve(filename) or filename)
+
+    def load_feedback(self, volume: float = 1.0):
+        """Load the correct/incorrect sounds into in-process players, see
+        the module docstring. Should be called when a practice session
+        starts. Does nothing without Qt Multimedia.
+
+        Args:
+            volume (float, optional): Volume between 0 and 1.
+                Defaults to 1.0.
+        """
+        if QtMultimedia is None:
+            return
+        for correct, path in self._feedback.items():
+            player = self._feedback_players.get(correct)
+            if player is None and path:
+                player = self._feedback_players[correct] = FeedbackPlayer(
+                    path)
+            if player:
+                player.set_volume(volume)
+
+    def play_feedback(self, correct: bool):
+        """Play the correct or incorrect answer sound.
+
+        Args:
+            correct (bool): True for the correct sound, False for incorrect.
+        """
+        player = self._feedback_players.get(bool(correct))
+        if player:
+            player.play()
+            return
+        path = self._feedback[bool(correct)]
+        if path:
+            av_player.play_file(path)
+
+    def prefetch(self, filenames: Iterable[str]):
+        """Read sound files in a background task, so that they are in the
+        OS page cache when they are played. Files that were prefetched
+        already, or don't exist, are skipped.
+
+        Args:
+            filenames (Iterable[str]): File names, as in [sound:] tags.
+                None values are skipped.
+        """
+        paths = []
+        for filename in filenames:
+            if not filename:
+                continue
+            path = self.resolve(filename)
+            if path and path not in self._prefetched:
+                self._prefetched.add(path)
+                paths.append(path)
+                if len(paths) >= PREFETCH_LIMIT:
+                    break
+        if paths:
+            mw.taskman.run_in_background(lambda: _read_files(paths))
+
+    def _existing(self, path: str) -> Optional[str]:
+        """Internal method, returns path if it is a file, else None."""
+        return path if isfile(path) else None
+
+
+class FeedbackPlayer:
+    """In-process player for one short sound, with Qt Multimedia."""
+    def __init__(self, path: str):
+        """Load the sound. A .wav file is played with QSoundEffect, other
+        formats with QMediaPlayer.
+
+        Args:
+            path (str): Path of the sound file.
+        """
+        self._effect = None
+        self._player = None
+        self._output = None
+        if path.endswith(".wav"):
+            self._effect = QtMultimedia.QSoundEffect()
+            self._effect.setSource(QUrl.fromLocalFile(path))
+        elif hasattr(QtMultimedia, "QAudioOutput"):  # Qt 6
+            self._player = QtMultimedia.QMediaPlayer()
+            self._output = QtMultimedia.QAudioOutput()
+            self._player.setAudioOutput(self._output)
+            self._player.setSource(QUrl.fromLocalFile(path))
+        else:  # Qt 5
+            self._player = QtMultimedia.QMediaPlayer()
+            self._player.setMedia(QtMultimedia.QMediaContent(
+                QUrl.fromLocalFile(path)))
+
+    def set_volume(self, volume: float):
+        """Set the volume, between 0 and 1."""
+        volume = min(1.0, max(0.0, volume))
+        if self._effect:
+            self._effect.setVolume(volume)
+        elif self._output:
+            self._output.setVolume(volume)
+        else:
+            self._player.setVolume(int(volume * 100))
+
+    def play(self):
+        """Play the sound from the start."""
+        if self._effect:
+            self._effect.play()
+            return
+        self._player.stop()
+        self._player.setPosition(0)
+        self._player.play()
+
+
+def _read_files(paths: list[str]):
+    """Read files and discard the data (see AudioService.prefetch())."""
+    for path in paths:
+        try:
+            with open(path, "rb", buffering=0) as f:
+                while f.read(PREFETCH_CHUNK):
+                    pass
+        except OSError:
+            pass
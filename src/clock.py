@@ -0,0 +1,98 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Clock module. Contains SessionClock, the timer of a practice session.
+
+Times are computed from time.monotonic() timestamps when they are asked
+for, instead of counting timer ticks, so the clock doesn't drift when the
+main thread is busy. The Qt timer in HomeworkController only refreshes the
+display.
+"""
+from __future__ import annotations
+from typing import Callable, Optional
+
+import math
+import time
+
+
+class SessionClock:
+    """Elapsed / remaining time of a practice session, and how long the
+    user takes to answer each question.
+
+    Usage:
+        clock = SessionClock(limit=60)  # 0 for no time limit
+        clock.start()
+        clock.question_shown()
+        ...
+        latency = clock.answered()  # seconds since the question was shown
+        if clock.is_up():
+            ...
+    """
+    def __init__(self, limit: float = 0,
+                 now: Callable[[], float] = time.monotonic):
+        """Initialize the clock. It starts with start().
+
+        Args:
+            limit (float, optional): Time limit in seconds, 0 for none.
+                Defaults to 0.
+            now (Callable[[], float], optional): Clock function.
+                Defaults to time.monotonic.
+        """
+        self.limit = limit
+        self.now = now
+        self.started_at = None
+        self.latencies: list[float] = []  # seconds, one per question
+        self._shown_at = None
+
+    def start(self):
+        """Start the clock, if it wasn't started yet."""
+        if self.started_at is None:
+            self.started_at = self.now()
+
+    def elapsed(self) -> float:
+        """Get the seconds since the clock was started (at most the time
+        limit, if there is one)."""
+        if self.started_at is None:
+            return 0.0
+        elapsed = self.now() - self.started_at
+        if self.limit > 0:
+            return min(elapsed, self.limit)
+        return elapsed
+
+    def remaining(self) -> float:
+        """Get the seconds left before the time limit, or 0 if there is no
+        time limit."""
+        if self.limit <= 0:
+            return 0.0
+        return max(0.0, self.limit - self.elapsed())
+
+    def is_up(self) -> bool:
+        """True if there is a time limit and it has been reached."""
+        return self.limit > 0 and self.remaining() <= 0
+
+    def display_seconds(self) -> int:
+        """Get the whole seconds to display: remaining seconds (rounded up)
+        with a time limit, else elapsed seconds."""
+        if self.limit > 0:
+            return math.ceil(self.remaining())
+        return int(self.elapsed())
+
+    def question_shown(self):
+        """Mark the time a new question was shown."""
+        self._shown_at = self.now()
+
+    def answered(self) -> Optional[float]:
+        """Record the time the user took to answer the current question.
+        Only the first answer of a question is recorded.
+
+        Returns:
+            Optional[float]: Seconds since the question was shown, or None
+                if it was already answered.
+        """
+        if self._shown_at is None:
+            return None
+        latency = self.now() - self._shown_at
+        self._shown_at = None
+        self.latencies.append(latency)
+        return latency
@@ -2,16 +2,24 @@
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
 """
-Handles singleton instances of NotecardStore
-and OptionStore. Used specifically in hooks.py to pass these
-instances to the rest of the code.
+Handles singleton instances of NotecardStore,
+OptionStore, AudioService and HistoryStore. Used specifically in hooks.py
+to pass these instances to the rest of the code.
 """
-from .stores import OptionStore, NotecardStore
+from aqt import mw
+from .stores import OptionStore, NotecardStore, CompositeStore
+from .audio import AudioService
+from .history import HistoryStore
+from .sorting import sort_spec
+from .version import ADDON_VERSION
+from .migrations import migrate
 
 
 class NotecardStoreManager:
     """Notecard store manager manages one notecard store per
-    each deck, into a dict with the deck id as a key.
+    each deck, into a dict with the deck id as a key. Composite stores
+    (see stores.CompositeStore) are kept with the tuple of their deck ids
+    as a key.
 
     This is used as a singleton so that the notecard information
     is only loaded once within the add-on.
@@ -19,6 +27,7 @@ class NotecardStoreManager:
     def __init__(self):
         """Initialize manager."""
         self.stores = {}
+        self.composites = {}
 
     def has_store(self, did: int) -> bool:
         """Check if notecard store exists.
@@ -49,22 +58,77 @@ class NotecardStoreManager:
         else:
             store = NotecardStore()
             store.load(did)
-            options.write_all_defaults(store.deck_name)
-
-            # sort deck, if needed
-            if "sort" in options.get_globals(store.deck_name):
-                try:
-                    store.sort(options.get_globals(store.deck_name)["sort"])
-                except RuntimeError:
-                    print("Warning: AnkiBuddy could not sort deck")
+            self._add(store)
             self.stores[did] = store
             return store
 
+    def get_with_children(self, did: int) -> NotecardStore:
+        """Get the store of a deck including its subdecks. For a deck
+        without subdecks, this is the same as get(did).
+
+        Args:
+            did (int): Deck id.
+
+        Returns:
+            NotecardStore: NotecardStore, or CompositeStore if the deck has
+                subdecks.
+        """
+        dids = mw.col.decks.deck_and_child_ids(did)
+        if len(dids) == 1:
+            return self.get(did)
+        return self.get_composite(dids, parent=did)
+
+    def get_composite(self, dids: list[int],
+                      parent: int = None) -> CompositeStore:
+        """Get a composite store of several decks. The stores of the decks
+        that are not loaded yet are loaded first, one after the other, on
+        this thread (the collection must not be used from several threads).
+
+        Args:
+            dids (list[int]): Deck ids.
+            parent (int, optional): Id of the parent deck, if dids are a
+                deck and its subdecks. Defaults to None.
+
+        Returns:
+            CompositeStore: Store with the cards of all the decks.
+        """
+        key = tuple(dids)
+        if key in self.composites:
+            return self.composites[key]
+
+        for did in dids:
+            if not self.has_store(did):
+                store = self.stores[did] = NotecardStore()
+                store.load(did)
+                if store.length():  # e.g. not a parent deck without cards
+                    self._add(store)
+
+        store = CompositeStore([self.stores[did] for did in dids],
+                               did=parent)
+        self._add(store)
+        self.composites[key] = store
+        return store
+
+    def _add(self, store: NotecardStore):
+        """Internal method, writes the default options of a new store and
+        sorts it if needed."""
+        options.write_all_defaults(store.deck_name)
+
+        # sort deck, if needed (by the order saved last time, if the cards
+        # didn't change)
+        spec = sort_spec(options.get_globals(store.deck_name))
+        if spec:
+            try:
+                store.sort_by(spec, persist=True)
+            except KeyError:  # field is not in the deck (anymore)
+                print("Warning: AnkiBuddy could not sort deck")
 
-ADDON_VERSION = "1.0.0"
 
 options = OptionStore(__name__)
 notecards = NotecardStoreManager()
+audio = AudioService()
+history = HistoryStore()
 
-options.config["version"] = ADDON_VERSION
-options.save()
+# upgrade the config of older versions, writing it only if it changed
+if migrate(options.config, ADDON_VERSION):
+    options.save()
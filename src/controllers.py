@@ -16,16 +16,25 @@ from aqt.qt import (
     QFileDialog,
 )
 from aqt import mw
-import aqt
+from .const import audio
 from .widgets import (
     SimpleCardView,
     MultipleChoiceQuestionWidget,
     MatchingWidget,
     WriteTheAnswerWidget,
 )
-from os.path import join, dirname
 from .models import ListModel, HomeworkModel
 from pathlib import Path
+from os import makedirs
+from os.path import dirname, join
+import time
+
+# interval to check if the displayed second of the clock changed
+CLOCK_REFRESH_MS = 250
+# delay to coalesce score/coverage updates, e.g. quick answers in matching
+INFO_UPDATE_MS = 100
+# folder for session timings, if "dump_stats" is set (kept on add-on update)
+STATS_DIR = join(dirname(__file__), "user_files")
 
 
 class ListController(QObject):
@@ -149,43 +158,75 @@ class HomeworkController(QObject):
         super().__init__()
         self.model = model
 
+        # refreshes the clock display, see on_timeout()
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.on_timeout)
-        self.timer.start(1000)
+        self.timer.start(CLOCK_REFRESH_MS)
+        self._sent_time = None
+
+        # score/coverage updates are sent once the timer fires
+        self.info_timer = QTimer(self)
+        self.info_timer.setSingleShot(True)
+        self.info_timer.setInterval(INFO_UPDATE_MS)
+        self.info_timer.timeout.connect(self.send_info_update)
+        self._sent_score = None
+        self._sent_coverage = None
 
         self.answer = None
 
+        if self.model.play_sounds:
+            audio.load_feedback(self.model.globals["sound_volume"] / 100)
+
     def next_question(self):
         """Called by self (in question_answered()) to generate a new question.
         Asks the model for a new question, instantiates the QuestionWidget
-        here, and sends it to the View for rendering.
+        here, and sends it to the View for rendering. Each step is timed in
+        self.model.stats.
         """
-        self.model.load_new_question()
-
-        self.model.corrected = False  # for show answer to work properly
-        self.model.has_answered = False
-
-        if self.model.curr_question_type == 0:
-            newQuestionWidget = MultipleChoiceQuestionWidget(
-                self.model.curr_question, self.model
-            )
-        elif self.model.curr_question_type == 1:
-            newQuestionWidget = MatchingWidget(
-                self.model.curr_question, self.model)
-        elif self.model.curr_question_type == 2:
-            newQuestionWidget = WriteTheAnswerWidget(
-                self.model.curr_question, self.model
-            )
+        stats = self.model.stats  # see instrumentation.py
+        with stats.timed("build"):
+            self.model.load_new_question()
+
+        with stats.timed("widget"):
+            if self.model.curr_question_type == 0:
+                newQuestionWidget = MultipleChoiceQuestionWidget(
+                    self.model.curr_question, self.model
+                )
+            elif self.model.curr_question_type == 1:
+                newQuestionWidget = MatchingWidget(
+                    self.model.curr_question, self.model)
+            elif self.model.curr_question_type == 2:
+                newQuestionWidget = WriteTheAnswerWidget(
+                    self.model.curr_question, self.model
+                )
 
         newQuestionWidget.questionAnswered.connect(self.question_answered)
         self.widget = newQuestionWidget
         self.model.answer = newQuestionWidget.get_answer()
-        self.model.new_question_update.emit(self.widget)
+        with stats.timed("swap"):  # view's new_question_handler
+            self.model.new_question_update.emit(self.widget)
+        # the answer latency starts now that the widget is in the view
+        self.model.clock.question_shown()
+        self.queue_info_update()
+        self._prefetch_sounds()
+
+    def _prefetch_sounds(self):
+        """Internal method to prefetch the sound files of the cards that are
+        shown next (see PracticeSession.upcoming_cards()), so they play
+        without delay."""
+        render = self.model.note_store.render
+        fields = self.model.render_fields()
+        audio.prefetch(
+            render.get(card, field).sound
+            for card in self.model.upcoming_cards()
+            for field in fields if field in card.fields
+        )
 
     def question_answered(self, correct: bool, multi_answer: bool):
         """Connected to the current QuestionWidget to handle the user response.
-        Handles the overall logic for questions such as history, sounds,
-        revisits.
+        Handles the overall logic for questions such as sounds and UI
+        changes. Score and revisits are kept by the model, see
+        PracticeSession.record_answer().
 
         Depends on self.model.wait_wrong whether or not to automatically move
             onto the next question, or to pause each time and let the user
@@ -200,30 +241,12 @@ class HomeworkController(QObject):
                 move onto the next question (e.g. multiple choice, or the last
                 answer in matching).
         """
-        # TODO: move to const
-        med_dir = join(dirname(__file__), "resources")
-        # handle counting
-        if not self.model.has_answered:
-            self.model.total_answered += 1
-            if correct:
-                self.model.total_correct += 1
-
-            if not multi_answer:
-                self.model.has_answered = True  #
+        # handle counting and revisits
+        self.model.record_answer(correct, multi_answer)
 
         # handle sounds
         if self.model.play_sounds and not self.model.corrected:
-            if correct:
-                aqt.sound.av_player.play_file("{}/correct.mp3".format(med_dir))
-            else:
-                aqt.sound.av_player.play_file(
-                    "{}/incorrect.mp3".format(med_dir))
-
-        # handle revisits
-        if not correct and self.model.do_revisit and not\
-                self.model.has_answered:
-            for i in range(self.model.revisit_steps):
-                self.model.to_revisit.append(self.model.last_card)
+            audio.play_feedback(correct)
 
         # allow you to press resubmit (Write the answer) for next question
         if correct and self.model.corrected:
@@ -244,7 +267,27 @@ class HomeworkController(QObject):
                 self.model.answer_pane_update.emit(True, 0)
                 self.model.corrected = False
 
-        self.model.info_update.emit()
+        self.queue_info_update()
+
+    def queue_info_update(self):
+        """Send the score and coverage updates after INFO_UPDATE_MS, so that
+        several answers in a row (e.g. in matching) cause one update.
+        """
+        if not self.info_timer.isActive():
+            self.info_timer.start()
+
+    def send_info_update(self):
+        """Connected to the info timer. Emits score_update and
+        coverage_update, if their values changed since they were last sent.
+        """
+        score = (self.model.total_correct, self.model.total_answered)
+        if score != self._sent_score:
+            self._sent_score = score
+            self.model.score_update.emit(*score)
+        coverage = len(self.model.card_history)
+        if coverage != self._sent_coverage:
+            self._sent_coverage = coverage
+            self.model.coverage_update.emit(coverage)
 
     def accept_wait(self):
         """Connected to the "Continue/Show Answer" button that is shown
@@ -274,19 +317,28 @@ class HomeworkController(QObject):
             v.show()
 
     def on_timeout(self):
-        """Connected to the timer every second.
-        Will change the display, and also stop the
-        practice during timed mode.
+        """Connected to the timer. The time is kept by the model's clock
+        (see clock.SessionClock), this only refreshes the display when the
+        displayed second changes, and stops the practice during timed mode
+        when the time is up.
         """
-        if self.model.timed_mode > 0:
-            self.model.time -= 1
-        else:
-            self.model.time += 1
-
-        if self.model.time < 0:
-            # TODO: play sound
+        clock = self.model.clock
+        if clock.is_up():
             self.timer.stop()
-            self.model.time = 0
             self.model.stop = True
 
-        self.model.info_update.emit()
+        seconds = clock.display_seconds()
+        if seconds != self._sent_time or self.model.stop:
+            self._sent_time = seconds
+            self.model.time_update.emit(seconds)
+
+    def dump_stats(self):
+        """Called by the view when the practice is closed. Writes the
+        session's timings (see instrumentation.py) to a JSON file in
+        STATS_DIR, if the "dump_stats" option is set.
+        """
+        if not self.model.globals.get("dump_stats"):
+            return
+        makedirs(STATS_DIR, exist_ok=True)
+        fname = "stats-{}.json".format(time.strftime("%Y%m%d-%H%M%S"))
+        self.model.stats.dump(join(STATS_DIR, fname))
@@ -8,6 +8,8 @@ This dialog controls the config for the add-on and links them
 to its UI.
 """
 from ..stores import NotecardStore, OptionStore
+from ..sorting import sort_spec
+from ..keyboards import LAYOUTS
 from ..forms.options import Ui_OptionsDialog
 from ..forms.field_options import Ui_FieldOptions
 from aqt.qt import (
@@ -88,10 +90,6 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         self.list_moveDownButton.clicked.connect(self._list_move_down_btn)
         self.list_setFrontButton.clicked.connect(self._list_front_back_btn)
 
-        # hidden widgets (unsupported currently)
-        self.gen_soundVolume.setVisible(False)
-        self.gen_SoundVolumeLabel.setVisible(False)
-
     def do_accept(self):
         """Connected to the accepted button box."""
         self.save_values()
@@ -123,10 +121,21 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         self.gen_revisitSteps.setValue(g["revisit_steps"])
         # play correct/incorrect sounds
         self.gen_cbDoSounds.setChecked(g["play_sounds"])
-        # sort by field
+        # correct/incorrect sounds volume
+        self.gen_soundVolume.setRange(0, 100)
+        self.gen_soundVolume.setValue(g["sound_volume"])
+        self.gen_soundVolume.setEnabled(g["play_sounds"])
+        # sort by field, then by field (more keys can be set in the config)
         self._load_notecard_fields(self.gen_sortByCb)
-        if "sort" in g:
-            self.gen_sortByCb.setCurrentText(g["sort"])
+        self.gen_thenByCb.addItem("(None)")
+        self._load_notecard_fields(self.gen_thenByCb)
+        spec = sort_spec(g)
+        if len(spec) > 0:
+            self.gen_sortByCb.setCurrentText(spec[0][0])
+            self.gen_sortDescending.setChecked(spec[0][1])
+        if len(spec) > 1:
+            self.gen_thenByCb.setCurrentText(spec[1][0])
+            self.gen_thenDescending.setChecked(spec[1][1])
         # fields options
         self._load_notecard_fields(self.gen_fieldsCb)
 
@@ -159,7 +168,14 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         self.wr_cbKeyboard.setChecked(h["write_show_keyboard"])
         self.wr_coKeyboardType.setEnabled(h["write_show_keyboard"])
         # virtual keyboard type
+        self.wr_coKeyboardType.clear()
+        for name, _ in LAYOUTS:
+            self.wr_coKeyboardType.addItem(name)
         self.wr_coKeyboardType.setCurrentIndex(h["write_keyboard_type"])
+        # romaji to kana conversion of typed answers
+        self.wr_coRomajiInput.setCurrentIndex(h["write_romaji_input"])
+        # typos allowed in written answers
+        self.wr_maxTypos.setValue(h["write_max_typos"])
         # written question font size
         self.wr_questionFontSize.setValue(h["write_question_size"])
 
@@ -188,8 +204,19 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         g["revisit_steps"] = int(self.gen_revisitSteps.value())
         # play correct/incorrect sounds
         g["play_sounds"] = bool(self.gen_cbDoSounds.isChecked())
-        # sort by field
+        # correct/incorrect sounds volume
+        g["sound_volume"] = int(self.gen_soundVolume.value())
+        # sort by field, then by field
+        sort_keys = []
         g["sort"] = str(self.gen_sortByCb.currentText())
+        if g["sort"]:
+            sort_keys.append(
+                [g["sort"], bool(self.gen_sortDescending.isChecked())])
+            if self.gen_thenByCb.currentIndex() > 0:
+                sort_keys.append([str(self.gen_thenByCb.currentText()),
+                                  bool(self.gen_thenDescending.isChecked())])
+                sort_keys += [list(key) for key in sort_spec(g)[2:]]
+        g["sort_keys"] = sort_keys
 
         # List
         cols = []
@@ -211,7 +238,9 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         # Write the answer
         h["write_show_keyboard"] = bool(self.wr_cbKeyboard.isChecked())
         h["write_keyboard_type"] = int(self.wr_coKeyboardType.currentIndex())
+        h["write_romaji_input"] = int(self.wr_coRomajiInput.currentIndex())
         h["write_question_size"] = int(self.wr_questionFontSize.value())
+        h["write_max_typos"] = int(self.wr_maxTypos.value())
 
         self.options_store.config["decks"][self.notecard_store.deck_name] = g
         self.options_store.config["list"][self.notecard_store.deck_name] = lc
@@ -230,14 +259,14 @@ class OptionsDialog(Ui_OptionsDialog, QDialog):
         widget.setEnabled(bool(val))
 
     def _load_notecard_fields(self, combobox: QComboBox):
-        """Load all the field names from the notecard store's model,
+        """Load all the field names from the notecard store's models,
         into the combobox. Ignores combobox items that are already present.
 
         Args:
             combobox (QComboBox): Combobox to load into
         """
-        for field in self.notecard_store.model["flds"]:
-            combobox.addItem(field["name"])
+        for field in self.notecard_store.field_names():
+            combobox.addItem(field)
 
     # list_list : list widget
     # list_fieldSelCo : combobox with fields
@@ -328,8 +357,8 @@ class FieldOptionsDialog(QDialog, Ui_FieldOptions):
         if field in self.all_settings:  # load from settings present
             self.field_settings = self.all_settings[field]
 
-        for f in self.note_store.model["flds"]:
-            self.fieldAudioBox.addItem(f["name"])
+        for f in self.note_store.field_names():
+            self.fieldAudioBox.addItem(f)
 
         # update ui to current settings
         self.fieldName.setText(field)
@@ -19,16 +19,20 @@ from ..subsets import (
     LearnedSubset,
     LapsedSubset,
     NewSubset,
+    WeakestSubset,
 )
 
 from ..models import ListModel, HomeworkModel
 from ..controllers import ListController, HomeworkController
 from ..views import ListView, HomeworkView
+from ..keyboards import get_keyboard
 
 from .options_dialog import OptionsDialog
 from .template_dialog import TemplateDialog
 
 from ..stores import NotecardStore, OptionStore
+from ..sorting import sort_spec
+from ..const import history
 
 from aqt.qt import QDialog, QMessageBox
 from aqt import mw
@@ -102,10 +106,8 @@ class QuestionsDialog(QDialog, Ui_QuestionsWizard):
             "lesson_size"
         ]
 
-        self.add_subset(LinearSubset(notecard_store, lesson_size=lesson_size))
-        self.add_subset(LearnedSubset(notecard_store, lesson_size=lesson_size))
-        self.add_subset(LapsedSubset(notecard_store, lesson_size=lesson_size))
-        self.add_subset(NewSubset(notecard_store, lesson_size=lesson_size))
+        for subset in self.create_subsets(lesson_size):
+            self.add_subset(subset)
 
         # signals / controller
         self.subsetBox.currentIndexChanged.connect(self.subset_index_sig)
@@ -158,22 +160,33 @@ class QuestionsDialog(QDialog, Ui_QuestionsWizard):
             self._cancelMsg.exec_()
             return
         templs = [self.templates[i] for i in self.sel_templates]
-        if self.all_groups:
-            model = HomeworkModel(
-                self.notecard_store,
-                templs,
-                self.options_store,
-                subset=self.subsets[self.curr_subset],
-                subset_group=-1,
-            )
-        else:
+        try:
             model = HomeworkModel(
                 self.notecard_store,
                 templs,
                 self.options_store,
                 subset=self.subsets[self.curr_subset],
-                subset_group=self.sub_group_ind,
+                subset_group=-1 if self.all_groups else self.sub_group_ind,
+                history=history,
             )
+        except ValueError as e:  # e.g. no note type has the fields
+            self._cancelMsg = QMessageBox()
+            self._cancelMsg.setText(str(e))
+            self._cancelMsg.exec_()
+            return
+        if not self.all_groups:
+            # with all groups, the controller renders the cards of each
+            # question as it comes instead
+            self.notecard_store.prebuild_render(model.render_fields(),
+                                                model.cards)
+        # build the virtual keyboard now, the view loads the first question
+        # when it is constructed, and it may be a Write the Answer question
+        h = self.options_store.get_homework_config(
+            self.notecard_store.deck_name)
+        if h["write_show_keyboard"] and any(
+                templ["type_ind"] == 2 for templ in templs):
+            get_keyboard(h["write_keyboard_type"])
+
         controller = HomeworkController(model)
         mw._hwView = HomeworkView(model, controller)
         mw._hwView.show()
@@ -336,6 +349,26 @@ class QuestionsDialog(QDialog, Ui_QuestionsWizard):
 
         self.update_options()
 
+    def create_subsets(self, lesson_size: int) -> list[Subset]:
+        """Create the subsets of the notecard store, in the order they are
+        listed in the subset combo box.
+
+        Args:
+            lesson_size (int): How many cards are in a group.
+
+        Returns:
+            list[Subset]: Subsets.
+        """
+        store = self.notecard_store
+        return [
+            LinearSubset(store, lesson_size=lesson_size),
+            LearnedSubset(store, lesson_size=lesson_size),
+            LapsedSubset(store, lesson_size=lesson_size),
+            NewSubset(store, lesson_size=lesson_size),
+            # after the others, so saved subset indices stay the same
+            WeakestSubset.get(store, history, lesson_size=lesson_size),
+        ]
+
     def add_subset(self, subset: Subset):
         """Internal method. Add a subset for use within the add-on.
 
@@ -441,4 +474,17 @@ class QuestionsDialog(QDialog, Ui_QuestionsWizard):
         for subset in self.subsets:
             subset.lesson_size = lesson_size
 
+        # re-sort the deck if the sort spec changed (instant for a spec
+        # that was used before, see sorting.SortCache), and rebuild the
+        # subsets, since they hold card indices
+        spec = sort_spec(self.options_store.get_globals(
+            self.notecard_store.deck_name))
+        if spec and spec != self.notecard_store.sort_order:
+            try:
+                self.notecard_store.sort_by(spec, persist=True)
+            except KeyError:
+                print("Warning: AnkiBuddy could not sort deck")
+            else:
+                self.subsets = self.create_subsets(lesson_size)
+
         self.update_subset_ui()
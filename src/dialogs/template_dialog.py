@@ -53,15 +53,15 @@ class TemplateDialog(QDialog, Ui_TemplateDialog):
         self.notecard_store = notecard_store
         self.options_store = options_store
 
-        # load fields
-        for field in notecard_store.model["flds"]:
-            self.question.addItem(field["name"])
-            self.question_2.addItem(field["name"])
-            self.question_3.addItem(field["name"])
-
-            self.answer.addItem(field["name"])
-            self.answer_2.addItem(field["name"])
-            self.answer_3.addItem(field["name"])
+        # load fields (of all the note types in the deck)
+        for field in notecard_store.field_names():
+            self.question.addItem(field)
+            self.question_2.addItem(field)
+            self.question_3.addItem(field)
+
+            self.answer.addItem(field)
+            self.answer_2.addItem(field)
+            self.answer_3.addItem(field)
 
         # set to template settings
         if templ:
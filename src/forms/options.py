@@ -126,9 +126,37 @@ class Ui_OptionsDialog(object):
         self.gen_sortByLabel = QtWidgets.QLabel(self.genDisplayBox)
         self.gen_sortByLabel.setObjectName("gen_sortByLabel")
         self.genDisplayLayout.addWidget(self.gen_sortByLabel)
+        self.sortByLayout = QtWidgets.QHBoxLayout()
+        self.sortByLayout.setObjectName("sortByLayout")
         self.gen_sortByCb = QtWidgets.QComboBox(self.genDisplayBox)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gen_sortByCb.sizePolicy().hasHeightForWidth())
+        self.gen_sortByCb.setSizePolicy(sizePolicy)
         self.gen_sortByCb.setObjectName("gen_sortByCb")
-        self.genDisplayLayout.addWidget(self.gen_sortByCb)
+        self.sortByLayout.addWidget(self.gen_sortByCb)
+        self.gen_sortDescending = QtWidgets.QCheckBox(self.genDisplayBox)
+        self.gen_sortDescending.setObjectName("gen_sortDescending")
+        self.sortByLayout.addWidget(self.gen_sortDescending)
+        self.genDisplayLayout.addLayout(self.sortByLayout)
+        self.gen_thenByLabel = QtWidgets.QLabel(self.genDisplayBox)
+        self.gen_thenByLabel.setObjectName("gen_thenByLabel")
+        self.genDisplayLayout.addWidget(self.gen_thenByLabel)
+        self.thenByLayout = QtWidgets.QHBoxLayout()
+        self.thenByLayout.setObjectName("thenByLayout")
+        self.gen_thenByCb = QtWidgets.QComboBox(self.genDisplayBox)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gen_thenByCb.sizePolicy().hasHeightForWidth())
+        self.gen_thenByCb.setSizePolicy(sizePolicy)
+        self.gen_thenByCb.setObjectName("gen_thenByCb")
+        self.thenByLayout.addWidget(self.gen_thenByCb)
+        self.gen_thenDescending = QtWidgets.QCheckBox(self.genDisplayBox)
+        self.gen_thenDescending.setObjectName("gen_thenDescending")
+        self.thenByLayout.addWidget(self.gen_thenDescending)
+        self.genDisplayLayout.addLayout(self.thenByLayout)
         self.genFieldsLabel = QtWidgets.QLabel(self.genDisplayBox)
         self.genFieldsLabel.setObjectName("genFieldsLabel")
         self.genDisplayLayout.addWidget(self.genFieldsLabel)
@@ -299,6 +327,22 @@ class Ui_OptionsDialog(object):
         self.wr_coKeyboardType.setObjectName("wr_coKeyboardType")
         self.wr_coKeyboardType.addItem("")
         self.waInputLayout.addWidget(self.wr_coKeyboardType)
+        self.wr_romajiInputLabel = QtWidgets.QLabel(self.waInputBox)
+        self.wr_romajiInputLabel.setObjectName("wr_romajiInputLabel")
+        self.waInputLayout.addWidget(self.wr_romajiInputLabel)
+        self.wr_coRomajiInput = QtWidgets.QComboBox(self.waInputBox)
+        self.wr_coRomajiInput.setObjectName("wr_coRomajiInput")
+        self.wr_coRomajiInput.addItem("")
+        self.wr_coRomajiInput.addItem("")
+        self.wr_coRomajiInput.addItem("")
+        self.waInputLayout.addWidget(self.wr_coRomajiInput)
+        self.wr_maxTyposLabel = QtWidgets.QLabel(self.waInputBox)
+        self.wr_maxTyposLabel.setObjectName("wr_maxTyposLabel")
+        self.waInputLayout.addWidget(self.wr_maxTyposLabel)
+        self.wr_maxTypos = QtWidgets.QSpinBox(self.waInputBox)
+        self.wr_maxTypos.setMaximum(5)
+        self.wr_maxTypos.setObjectName("wr_maxTypos")
+        self.waInputLayout.addWidget(self.wr_maxTypos)
         self.gridLayout_5.addLayout(self.waInputLayout, 0, 0, 1, 1)
         self.waLayout.addWidget(self.waInputBox)
         self.waDisplayBox = QtWidgets.QGroupBox(self.writeTheAnswerOptions)
@@ -353,6 +397,10 @@ class Ui_OptionsDialog(object):
         self.genDisplayBox.setTitle(_translate("OptionsDialog", "Fields"))
         self.gen_sortByLabel.setText(_translate("OptionsDialog", "Sort By"))
         self.gen_sortByCb.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Optional. Field to sort by, only matters when the deck is unordered by its subset (i.e. only matters when subset is All)</p></body></html>"))
+        self.gen_sortDescending.setText(_translate("OptionsDialog", "Descending"))
+        self.gen_thenByLabel.setText(_translate("OptionsDialog", "Then By"))
+        self.gen_thenByCb.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Optional. Field to sort cards by when they are equal in the Sort By field, e.g. Sort By frequency, Then By index.</p></body></html>"))
+        self.gen_thenDescending.setText(_translate("OptionsDialog", "Descending"))
         self.genFieldsLabel.setText(_translate("OptionsDialog", "Fields Options"))
         self.gen_fieldsCb.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Change settings for individual fields, including an optional audio to play when the field is used.</p></body></html>"))
         self.gen_editFieldButton.setText(_translate("OptionsDialog", "Edit.."))
@@ -390,6 +438,13 @@ class Ui_OptionsDialog(object):
         self.wr_virtualKeyboardTypeLabel.setText(_translate("OptionsDialog", "Virtual Keyboard Type"))
         self.wr_coKeyboardType.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Type of virtual keyboard to show.</p></body></html>"))
         self.wr_coKeyboardType.setItemText(0, _translate("OptionsDialog", "Japanese - Hiragana"))
+        self.wr_romajiInputLabel.setText(_translate("OptionsDialog", "Romaji Input"))
+        self.wr_coRomajiInput.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Convert romaji to kana while typing answers, without a Japanese IME. Romaji answers are also accepted for kana.</p></body></html>"))
+        self.wr_coRomajiInput.setItemText(0, _translate("OptionsDialog", "Off"))
+        self.wr_coRomajiInput.setItemText(1, _translate("OptionsDialog", "Convert to Hiragana"))
+        self.wr_coRomajiInput.setItemText(2, _translate("OptionsDialog", "Convert to Katakana"))
+        self.wr_maxTyposLabel.setText(_translate("OptionsDialog", "Allowed Typos"))
+        self.wr_maxTypos.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Number of typos (wrong, missing or extra characters) an answer can have and still count as correct. At most one per 4 characters of the answer.</p></body></html>"))
         self.waDisplayBox.setTitle(_translate("OptionsDialog", "Display"))
         self.wr_questionFontSizeLabel.setText(_translate("OptionsDialog", "Question Font Size"))
         self.wr_questionFontSize.setToolTip(_translate("OptionsDialog", "<html><head/><body><p>Change question label\'s font size.</p></body></html>"))
@@ -14,11 +14,11 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_Summary(object):
     def setupUi(self, Summary):
         Summary.setObjectName("Summary")
-        Summary.resize(372, 289)
+        Summary.resize(420, 440)
         self.gridLayout = QtWidgets.QGridLayout(Summary)
         self.gridLayout.setObjectName("gridLayout")
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.gridLayout.addItem(spacerItem, 5, 0, 1, 1)
+        self.gridLayout.addItem(spacerItem, 8, 0, 1, 1)
         self.label_5 = QtWidgets.QLabel(Summary)
         font = QtGui.QFont()
         font.setPointSize(11)
@@ -35,7 +35,7 @@ class Ui_Summary(object):
         self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
         self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Ok)
         self.buttonBox.setObjectName("buttonBox")
-        self.gridLayout.addWidget(self.buttonBox, 6, 0, 1, 1)
+        self.gridLayout.addWidget(self.buttonBox, 9, 0, 1, 1)
         self.accuracyLabel = QtWidgets.QLabel(Summary)
         font = QtGui.QFont()
         font.setPointSize(11)
@@ -72,6 +72,34 @@ class Ui_Summary(object):
         self.timeLabel.setFont(font)
         self.timeLabel.setObjectName("timeLabel")
         self.gridLayout.addWidget(self.timeLabel, 4, 1, 1, 1)
+        self.label_9 = QtWidgets.QLabel(Summary)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.label_9.setFont(font)
+        self.label_9.setObjectName("label_9")
+        self.gridLayout.addWidget(self.label_9, 5, 0, 1, 1)
+        self.coverageLabel = QtWidgets.QLabel(Summary)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.coverageLabel.setFont(font)
+        self.coverageLabel.setObjectName("coverageLabel")
+        self.gridLayout.addWidget(self.coverageLabel, 5, 1, 1, 1)
+        self.label_11 = QtWidgets.QLabel(Summary)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.label_11.setFont(font)
+        self.label_11.setObjectName("label_11")
+        self.gridLayout.addWidget(self.label_11, 6, 0, 1, 1)
+        self.answerTimeLabel = QtWidgets.QLabel(Summary)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        self.answerTimeLabel.setFont(font)
+        self.answerTimeLabel.setObjectName("answerTimeLabel")
+        self.gridLayout.addWidget(self.answerTimeLabel, 6, 1, 1, 1)
+        self.statsText = QtWidgets.QPlainTextEdit(Summary)
+        self.statsText.setReadOnly(True)
+        self.statsText.setObjectName("statsText")
+        self.gridLayout.addWidget(self.statsText, 7, 0, 1, 2)
         spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
         self.gridLayout.addItem(spacerItem1, 0, 0, 1, 1)
 
@@ -91,3 +119,7 @@ class Ui_Summary(object):
         self.cardsLabel.setText(_translate("Summary", "--"))
         self.label_7.setText(_translate("Summary", "Time Spent"))
         self.timeLabel.setText(_translate("Summary", "--:--:--"))
+        self.label_9.setText(_translate("Summary", "Deck Coverage"))
+        self.coverageLabel.setText(_translate("Summary", "--"))
+        self.label_11.setText(_translate("Summary", "Answer Time"))
+        self.answerTimeLabel.setText(_translate("Summary", "--"))
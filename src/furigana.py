@@ -0,0 +1,49 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Furigana module. Converts Anki's furigana bracket notation, e.g.
+"今日[きょう]は", into html ruby tags.
+
+The conversion is a single regex substitution, so it is linear in the
+length of the text, and results are cached per field text since the same
+fields come back often during practice.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+import re
+
+# kanji ranges (CJK extension A, unified ideographs, compatibility
+# ideographs) and the repetition mark 々
+_KANJI = "\u3400-\u4DB5\u4E00-\u9FCB\uF900-\uFA6A\u3005"
+
+# a run of kanji followed by its reading in brackets
+FURIGANA_RE = re.compile("([" + _KANJI + "]+)\\[([^\\[\\]]+)\\]")
+
+RUBY_HTML = (
+    "<ruby style='display: inline-flex; flex-direction:"
+    + "column-reverse;'><rb style='line-height: 1;"
+    + "display: inline;'>\\1</rb><rt style="
+    + "'line-height: 1; display: inline;'>\\2</rt></ruby>"
+)
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_ruby(text: str) -> str:
+    """Replace furigana bracket notation with html ruby tags.
+
+    Only kanji directly before the brackets are used as the base text, and
+    brackets without kanji before them are left as they are.
+
+    Args:
+        text (str): Field text, e.g. "今日[きょう]は天気[てんき]".
+
+    Returns:
+        str: Text with html ruby tags.
+    """
+    if "[" not in text:
+        return text
+    return FURIGANA_RE.sub(RUBY_HTML, text)
@@ -0,0 +1,306 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+History module. Contains HistoryStore, an append-only log of the answers
+given in practice sessions, with the accuracy and streak of each card.
+
+The log is an SQLite database per Anki profile, in the add-on's
+user_files folder (which Anki keeps when the add-on is updated). The
+journal is in WAL mode, so writes don't block reads.
+
+Answers are recorded in memory first and written in batches of
+BATCH_SIZE, in a background task, so the answer path never waits on the
+disk. The per-card aggregates (see CardStats) are kept in memory, so
+card_stats() is a dict lookup, and written to the table card_stats in the
+same transaction as the answers.
+
+Listeners in HistoryStore.answer_recorded are called with the card id and
+its stats after every answer, so that rankings (e.g.
+subsets.WeakestSubset) can be updated incrementally.
+
+There is one instance, HistoryStore, in ./const.py.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+from concurrent.futures import Future, wait
+from dataclasses import astuple, dataclass
+from os import makedirs
+from os.path import dirname, join
+import math
+import sqlite3
+import threading
+import time
+
+from aqt import mw
+
+HISTORY_DIR = join(dirname(__file__), "user_files", "history")
+BATCH_SIZE = 25  # answers written at a time
+ERROR_HALF_LIFE = 7 * 86400  # seconds for past mistakes to weigh half
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    card INTEGER NOT NULL,
+    deck TEXT,
+    template TEXT,
+    question_type TEXT,
+    correct INTEGER NOT NULL,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS answers_card ON answers (card, time);
+CREATE TABLE IF NOT EXISTS card_stats (
+    card INTEGER PRIMARY KEY,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    last_time REAL NOT NULL,
+    error REAL NOT NULL,
+    weight REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+INSERT_ANSWER = """
+INSERT INTO answers (time, card, deck, template, question_type, correct,
+                     latency)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+STATS_COLUMNS = "answered, correct, streak, last_time, error, weight"
+
+REPLACE_STATS = """
+INSERT OR REPLACE INTO card_stats (card, {})
+VALUES (?, ?, ?, ?, ?, ?, ?)
+""".format(STATS_COLUMNS)
+
+
+@dataclass
+class CardStats:
+    """Practice history of one card."""
+    answered: int = 0
+    correct: int = 0
+    streak: int = 0  # correct answers in a row, up to the last answer
+    last_time: float = 0.0  # unix time of the last answer, 0 if never
+    # wrong / all answers, each weighted by 0.5 per ERROR_HALF_LIFE of age
+    error: float = 0.0
+    weight: float = 0.0
+
+    @property
+    def accuracy(self) -> float:
+        """Fraction of correct answers, 0.0 if the card was never
+        answered."""
+        return self.correct / self.answered if self.answered else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of wrong answers, with recent answers weighing more
+        (see ERROR_HALF_LIFE). 0.0 if the card was never answered."""
+        return self.error / self.weight if self.weight else 0.0
+
+    def weakness(self, now: float) -> float:
+        """Error rate, halved per ERROR_HALF_LIFE since the last answer, so
+        that a card missed long ago ranks below one missed today.
+
+        Args:
+            now (float): Unix time.
+
+        Returns:
+            float: Value between 0 and 1.
+        """
+        age = max(0.0, now - self.last_time)
+        return self.error_rate * 0.5 ** (age / ERROR_HALF_LIFE)
+
+    def weakness_key(self) -> float:
+        """Sort key in the order of weakness(now), the same for any now
+        (log2 of weakness(now), plus now / ERROR_HALF_LIFE), so that a
+        ranking by it doesn't go stale as time passes."""
+        if self.error <= 0:
+            return -math.inf
+        return math.log2(self.error_rate) + self.last_time / ERROR_HALF_LIFE
+
+    def add(self, correct: bool, when: float):
+        """Update with an answer."""
+        if self.answered:
+            decay = 0.5 ** (max(0.0, when - self.last_time)
+                            / ERROR_HALF_LIFE)
+            self.error *= decay
+            self.weight *= decay
+        self.error += 0.0 if correct else 1.0
+        self.weight += 1.0
+        self.answered += 1
+        self.correct += int(correct)
+        self.streak = self.streak + 1 if correct else 0
+        self.last_time = when
+
+
+class HistoryStore:
+    """Practice history of the current profile, see module docstring.
+
+    Usage:
+        history.record(card_id, correct, deck=..., template=...,
+                       question_type=..., latency=...)
+        history.card_stats(card_id).accuracy
+        history.flush()  # at the end of a session
+
+        history.answer_recorded.append(listener)  # listener(card_id, stats)
+    """
+    def __init__(self, folder: str = None):
+        """Initialize the history store. The database is opened on first
+        use, since there is no profile when add-ons load.
+
+        Args:
+            folder (str, optional): Folder of the databases. Defaults to
+                HISTORY_DIR, as it is when the database is opened.
+        """
+        self.folder = folder
+        self.path = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # serializes use of self._db
+        self._stats: dict[int, CardStats] = {}
+        self._pending: list[tuple[Any, ...]] = []
+        self._writes: list[Future] = []  # background writes in progress
+        self.answer_recorded: list[Callable[[int, CardStats], None]] = []
+
+    def db(self) -> sqlite3.Connection:
+        """Get the connection to the current profile's database, opening
+        it if needed. If the profile was changed, the previous database
+        is closed first."""
+        folder = self.folder or HISTORY_DIR
+        path = join(folder, mw.pm.name + ".sqlite")
+        if path != self.path:
+            self.close()
+            makedirs(folder, exist_ok=True)
+            # used by the main thread and by the flush task, see _lock
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(SCHEMA)
+            self._stats = {
+                card: CardStats(*row) for card, *row in db.execute(
+                    "SELECT card, {} FROM card_stats".format(STATS_COLUMNS))
+            }
+            self._db = db
+            self.path = path
+        return self._db
+
+    def record(self, card_id: int, correct: bool, deck: str = None,
+               template: str = None, question_type: str = None,
+               latency: float = None):
+        """Record an answer. It is written to the database with the next
+        batch (see flush()).
+
+        Args:
+            card_id (int): Anki card id.
+            correct (bool): True if the answer was correct.
+            deck (str, optional): Deck name. Defaults to None.
+            template (str, optional): Template name, e.g. "Front → Back".
+                Defaults to None.
+            question_type (str, optional): Question type name.
+                Defaults to None.
+            latency (float, optional): Seconds taken to answer.
+                Defaults to None.
+        """
+        self.db()
+        when = time.time()
+        self._pending.append((when, card_id, deck, template, question_type,
+                              int(correct), latency))
+        stats = self._stats.get(card_id)
+        if stats is None:
+            stats = self._stats[card_id] = CardStats()
+        stats.add(correct, when)
+        for listener in tuple(self.answer_recorded):  # may be removed
+            listener(card_id, stats)
+        if len(self._pending) >= BATCH_SIZE:
+            self.flush()
+
+    def card_stats(self, card_id: int) -> CardStats:
+        """Get the history of a card, including unwritten answers.
+
+        Args:
+            card_id (int): Anki card id.
+
+        Returns:
+            CardStats: Stats of the card. Don't modify it. A card that was
+                never answered gets empty stats.
+        """
+        self.db()
+        return self._stats.get(card_id) or CardStats()
+
+    def card_answers(self, card_id: int,
+                     limit: int = 100) -> list[tuple[float, bool]]:
+        """Get the last answers of a card from the database, newest first.
+        Answers that were not written yet are not included.
+
+        Args:
+            card_id (int): Anki card id.
+            limit (int, optional): Max number of answers. Defaults to 100.
+
+        Returns:
+            list[tuple[float, bool]]: (unix time, correct) of each answer.
+        """
+        db = self.db()
+        with self._lock:
+            rows = db.execute(
+                "SELECT time, correct FROM answers WHERE card = ? "
+                "ORDER BY time DESC LIMIT ?", (card_id, limit)).fetchall()
+        return [(when, bool(correct)) for when, correct in rows]
+
+    def flush(self, background: bool = True):
+        """Write the recorded answers to the database.
+
+        Args:
+            background (bool, optional): Write in a background task.
+                Defaults to True.
+        """
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        # copy the stats now, they keep changing while the task runs
+        stats = [(card, *astuple(self._stats[card]))
+                 for card in dict.fromkeys(row[1] for row in rows)]
+        if background:
+            self._writes = [f for f in self._writes if not f.done()]
+            # each write waits for the one before it, so that an older
+            # snapshot of the stats can't replace a newer one
+            after = self._writes[-1] if self._writes else None
+            self._writes.append(mw.taskman.run_in_background(
+                lambda: self._write(rows, stats, after),
+                on_done=_check_write))
+        else:
+            self._write(rows, stats)
+
+    def close(self):
+        """Write the recorded answers and close the database. Connected to
+        the profile_will_close hook."""
+        if self._db is None:
+            return
+        # finish the background writes first, they have older stats
+        wait(self._writes)  # failures are reported by _check_write()
+        self._writes = []
+        self.flush(background=False)
+        with self._lock:
+            self._db.close()
+            self._db = None
+        self.path = None
+        self._stats = {}
+
+    def _write(self, rows: list[tuple[Any, ...]],
+               stats: list[tuple[Any, ...]], after: Optional[Future] = None):
+        """Internal method, inserts answers and replaces their cards' rows
+        in card_stats, in one transaction, once the write after is done."""
+        if after is not None:
+            wait([after])
+        with self._lock, self._db:
+            self._db.executemany(INSERT_ANSWER, rows)
+            self._db.executemany(REPLACE_STATS, stats)
+
+
+def _check_write(future: Future):
+    """Report a failed background write, see HistoryStore.flush()."""
+    try:
+        future.result()
+    except Exception as e:
+        print("Warning: AnkiBuddy could not save the practice history: "
+              "%r" % e)
@@ -3,23 +3,39 @@
 """
 Hooks module does the injections into Anki for
 the "Study Buddy" button to appear.
+
+This module is imported when Anki starts, so it only imports aqt. The rest
+of the add-on (const.py, which loads the config, and the dialogs, which
+import all the forms and widgets) is imported by _receive_pycmd() when the
+button is first clicked. See tools/import_time.py to measure this.
+
+The button's style is a static file, web/overview.css, that the webview
+loads through the add-on's web exports (and caches), so the hook only adds
+its URL and a one-line button.
 """
 from __future__ import annotations
 from typing import Any
 
+import sys
+
 from aqt import gui_hooks
 import aqt
 from aqt import mw
+from aqt.overview import OverviewBottomBar
+
+
+WEB_EXPORTS = r"web/.*\.css"
 
-from .const import options, notecards
-from .dialogs import QuestionsDialog
+_overview_css_url = None  # URL of web/overview.css, see _inject_overview()
 
 
 def patch_all():
     """Do the patches AnkiBuddy requires.
     Should be called from the addon's __init__.py."""
+    mw.addonManager.setWebExports(__name__, WEB_EXPORTS)
     gui_hooks.webview_will_set_content.append(_inject_overview)
     gui_hooks.webview_did_receive_js_message.append(_receive_pycmd)
+    gui_hooks.profile_will_close.append(_close_history)
 
 
 def _inject_overview(web_content: aqt.webview.WebContent, context: Any):
@@ -29,10 +45,16 @@ def _inject_overview(web_content: aqt.webview.WebContent, context: Any):
         repetitions, the overview hook doesn't get called. So this seems to
         be the easiest way to guarantee that the Study Buddy button appears
         all the time.
+    This is called for every webview Anki renders, so other contexts return
+    after one type check.
     """
-    if not isinstance(context, aqt.overview.OverviewBottomBar):
+    global _overview_css_url
+    if not isinstance(context, OverviewBottomBar):
         return
-    web_content.head += overview_css
+    if _overview_css_url is None:
+        _overview_css_url = "/_addons/{}/web/overview.css".format(
+            mw.addonManager.addonFromModule(__name__))
+    web_content.css.append(_overview_css_url)
     web_content.body += overview_content
 
 
@@ -44,11 +66,16 @@ def _receive_pycmd(
     has the pycmd("BuddyWizard") onclick command.
 
     If our add-on's button was pressed, then it will open the questions dialog
-    for the user to select templates / subset / start practicing.
+    for the user to select templates / subset / start practicing. A deck with
+    subdecks is practiced with the cards of all its subdecks.
     """
     if message == "BuddyWizard":
+        # imported here, not at startup, see module docstring
+        from .const import options, notecards
+        from .dialogs import QuestionsDialog
+
         curr_did = mw.col.decks.current()["id"]
-        nstore = notecards.get(curr_did)
+        nstore = notecards.get_with_children(curr_did)
 
         mw._bHwView = wiz = QuestionsDialog(nstore, options)
         wiz.deck = curr_did
@@ -60,21 +87,16 @@ def _receive_pycmd(
     return handled
 
 
-overview_content = """
-<div style="position: absolute; bottom: 15px; right: 15px;">
-<button id="buddybutton" style="background: transparent; min-height: 20px;
-    border: 5px solid #32a3fa; border-radius: 8px;"
-    onclick="pycmd(\'BuddyWizard\')">Study Buddy</button>
-</div>
-"""
+def _close_history():
+    """Handle profile_will_close by writing the practice history. If the
+    add-on wasn't used (const.py was never imported), there is nothing to
+    write."""
+    const = sys.modules.get(__package__ + ".const")
+    if const is not None:
+        const.history.close()
 
-overview_css = """
-<style>
-#buddybutton{
-    background: transparent;
-    min-height: 20px;
-    border: 5px solid #555;
-    border-radius: 8px;
-}
-</style>
-"""
+
+overview_content = (
+    '<button id="buddybutton" onclick="pycmd(\'BuddyWizard\')">'
+    'Study Buddy</button>'
+)
@@ -0,0 +1,204 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Instrumentation module. Collects timings of a practice session into
+histograms per question type and template, for the summary dialog and for
+offline profiling.
+
+Stages that are timed for each question:
+    build: HomeworkModel.load_new_question()
+    widget: construction of the question widget
+    swap: HomeworkView.new_question_handler() replacing the old widget
+    answer: time the user took to answer (see clock.SessionClock)
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterator
+
+from contextlib import contextmanager
+import json
+import math
+import time
+
+STAGES = ["build", "widget", "swap", "answer"]
+PERCENTILES = [50, 95, 99]
+
+
+class Histogram:
+    """Distribution of one timing, in seconds. Keeps every value, since a
+    session has at most a few thousand questions."""
+    def __init__(self):
+        self.values: list[float] = []
+        self._sorted = True
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: float):
+        """Add a value (seconds)."""
+        if self.values and value < self.values[-1]:
+            self._sorted = False
+        self.values.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Get a percentile, by the nearest-rank method.
+
+        Args:
+            p (float): Percentile, between 0 and 100.
+
+        Returns:
+            float: Value at the percentile, 0.0 if there are no values.
+        """
+        if not self.values:
+            return 0.0
+        if not self._sorted:
+            self.values.sort()
+            self._sorted = True
+        rank = max(1, math.ceil(p / 100 * len(self.values)))
+        return self.values[rank - 1]
+
+    def summary(self) -> dict[str, Any]:
+        """Get the count, mean, max and percentiles (p50, p95, p99)."""
+        out = {"count": len(self.values)}
+        if self.values:
+            out["mean"] = sum(self.values) / len(self.values)
+            out["max"] = max(self.values)
+        for p in PERCENTILES:
+            out["p%d" % p] = self.percentile(p)
+        return out
+
+
+class SessionStats:
+    """Timings of a practice session, as histograms keyed by stage,
+    question type and template.
+
+    Usage:
+        stats.begin_question("Matching", "Front → Back")
+        with stats.timed("widget"):
+            ...
+        stats.add("answer", seconds)
+        stats.summary()  # see summary()
+    """
+    def __init__(self, now: Callable[[], float] = time.perf_counter):
+        """Initialize empty stats.
+
+        Args:
+            now (Callable[[], float], optional): Clock function for timed().
+                Defaults to time.perf_counter.
+        """
+        self.now = now
+        self.histograms: dict[tuple[str, str, str], Histogram] = {}
+        self.question_type = None
+        self.template = None
+
+    def begin_question(self, question_type: str, template: str):
+        """Set the question type and template that the next timings are
+        added to.
+
+        Args:
+            question_type (str): Question type name, e.g. "Matching".
+            template (str): Template name, e.g. "Front → Back".
+        """
+        self.question_type = question_type
+        self.template = template
+
+    def add(self, stage: str, seconds: float):
+        """Add a timing of the current question.
+
+        Args:
+            stage (str): Stage name, see STAGES.
+            seconds (float): Time taken, in seconds.
+        """
+        if self.question_type is None:
+            return
+        key = (stage, self.question_type, self.template)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.add(seconds)
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Context manager that adds the time its block took to a stage.
+        The timing goes to the question type set when the block ends, so
+        it can wrap load_new_question().
+
+        Args:
+            stage (str): Stage name, see STAGES.
+        """
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(stage, self.now() - start)
+
+    def stage(self, stage: str, question_type: str = None) -> Histogram:
+        """Get all timings of a stage, optionally of one question type.
+
+        Args:
+            stage (str): Stage name, see STAGES.
+            question_type (str, optional): Question type name. Defaults to
+                None, for all question types.
+
+        Returns:
+            Histogram: Merged histogram.
+        """
+        merged = Histogram()
+        for (s, q_type, _), histogram in self.histograms.items():
+            if s == stage and question_type in (None, q_type):
+                for value in histogram.values:
+                    merged.add(value)
+        return merged
+
+    def question_types(self) -> list[str]:
+        """Get the question types that have timings, in order seen."""
+        return list(dict.fromkeys(key[1] for key in self.histograms))
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Get a summary of every histogram, see Histogram.summary().
+
+        Returns:
+            list[dict[str, Any]]: One dict per (stage, question type,
+                template), with those keys and the summary values.
+        """
+        out = []
+        for (stage, q_type, templ), histogram in self.histograms.items():
+            row = {"stage": stage, "question_type": q_type,
+                   "template": templ}
+            row.update(histogram.summary())
+            out.append(row)
+        return out
+
+    def format_table(self) -> str:
+        """Get a text table of the p50/p95/p99 of each stage per question
+        type, in milliseconds (for the summary dialog)."""
+        lines = ["{:<18}{:<8}{:>6}{:>9}{:>9}{:>9}".format(
+            "Question", "Stage", "n", "p50", "p95", "p99")]
+        for q_type in self.question_types():
+            for stage in STAGES:
+                histogram = self.stage(stage, q_type)
+                if not histogram:
+                    continue
+                lines.append("{:<18}{:<8}{:>6}".format(
+                    q_type[:17], stage, len(histogram)) + "".join(
+                    "{:>9.1f}".format(1000 * histogram.percentile(p))
+                    for p in PERCENTILES))
+        return "\n".join(lines)
+
+    def dump(self, path: str, raw: bool = True):
+        """Write the timings to a JSON file.
+
+        Args:
+            path (str): File to write.
+            raw (bool, optional): Include every value, not only the
+                summaries. Defaults to True.
+        """
+        data = {"summary": self.summary()}
+        if raw:
+            data["values"] = [
+                {"stage": s, "question_type": q, "template": t,
+                 "values": h.values}
+                for (s, q, t), h in self.histograms.items()
+            ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
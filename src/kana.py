@@ -0,0 +1,218 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Kana module with conversions between hiragana and katakana, and from
+romaji to kana. The former builds the katakana keyboard layout from the
+hiragana one (see keyboards.py) and folds katakana answers (see
+answers.py); the latter converts the Write the Answer box as the user
+types, without an IME (see RomajiConverter, widgets.EventLineEdit).
+
+The kana blocks line up: each hiragana from ぁ to ゖ (and the iteration
+marks ゝ ゞ) is 0x60 code points before its katakana.
+"""
+from __future__ import annotations
+
+KANA_OFFSET = 0x60
+_HIRAGANA = [(0x3041, 0x3096), (0x309D, 0x309E)]  # inclusive ranges
+
+TO_KATAKANA = {
+    code: code + KANA_OFFSET
+    for first, last in _HIRAGANA for code in range(first, last + 1)
+}
+TO_HIRAGANA = {katakana: hiragana
+               for hiragana, katakana in TO_KATAKANA.items()}
+
+
+def to_katakana(text: str) -> str:
+    """Convert the hiragana in a text to katakana, e.g. "かな" -> "カナ".
+    Other characters are kept."""
+    return text.translate(TO_KATAKANA)
+
+
+def to_hiragana(text: str) -> str:
+    """Convert the katakana in a text to hiragana, e.g. "カナ" -> "かな".
+    Other characters (like ー) are kept."""
+    return text.translate(TO_HIRAGANA)
+
+
+# Romaji (Hepburn, with the usual Kunrei-shiki and IME spellings) to
+# hiragana. Double consonants ("kk") and "n" before a consonant are handled
+# by RomajiConverter, not by the table.
+_VOWELS = "aiueo"
+_ROWS = {
+    "": "あいうえお", "k": "かきくけこ", "s": "さしすせそ",
+    "t": "たちつてと", "n": "なにぬねの", "h": "はひふへほ",
+    "m": "まみむめも", "r": "らりるれろ", "g": "がぎぐげご",
+    "z": "ざじずぜぞ", "d": "だぢづでど", "b": "ばびぶべぼ",
+    "p": "ぱぴぷぺぽ", "x": "ぁぃぅぇぉ", "l": "ぁぃぅぇぉ",
+}
+ROMAJI = {
+    consonant + vowel: kana
+    for consonant, row in _ROWS.items() for vowel, kana in zip(_VOWELS, row)
+}
+for _consonant, _row in _ROWS.items():
+    for _vowel, _small in zip("auo", "ゃゅょ"):
+        if not _consonant:
+            ROMAJI["y" + _vowel] = "やゆよ"["auo".index(_vowel)]
+        elif _consonant in "xl":  # small kana, "xya" -> "ゃ"
+            ROMAJI[_consonant + "y" + _vowel] = _small
+        else:  # "kya" -> "きゃ"
+            ROMAJI[_consonant + "y" + _vowel] = _row[1] + _small
+for _prefix, _kana in [("sh", "し"), ("ch", "ち"), ("cy", "ち"),
+                       ("j", "じ"), ("jy", "じ")]:
+    for _vowel, _small in zip("auoe", "ゃゅょぇ"):
+        ROMAJI[_prefix + _vowel] = _kana + _small
+for _prefix, _kana in [("f", "ふ"), ("v", "ゔ"), ("ts", "つ")]:
+    for _vowel, _small in zip("aieo", "ぁぃぇぉ"):
+        ROMAJI[_prefix + _vowel] = _kana + _small
+ROMAJI.update({
+    "shi": "し", "chi": "ち", "tsu": "つ", "fu": "ふ", "ji": "じ",
+    "wa": "わ", "wo": "を", "wi": "うぃ", "we": "うぇ", "vu": "ゔ",
+    "n'": "ん", "xtu": "っ", "ltu": "っ", "xtsu": "っ", "ltsu": "っ",
+    "xwa": "ゎ", "lwa": "ゎ",
+    "-": "ー", ".": "。", ",": "、", "[": "「", "]": "」",
+})
+del _consonant, _row, _vowel, _small, _prefix, _kana
+
+# trie of ROMAJI: one dict per node, by character; the kana of a complete
+# spelling is under the "" key of its node
+ROMAJI_TRIE: dict = {}
+for _spelling, _kana in ROMAJI.items():
+    _node = ROMAJI_TRIE
+    for _char in _spelling:
+        _node = _node.setdefault(_char, {})
+    _node[""] = _kana
+del _spelling, _kana, _node, _char
+
+
+class RomajiConverter:
+    """Incremental romaji to kana conversion, one typed character at a
+    time, like an IME without the kanji step.
+
+    Characters that may still start a longer spelling (e.g. "k", "ky",
+    "n") are kept as romaji, the pending text. Each character walks down
+    ROMAJI_TRIE from the node of the pending text, and spellings are at
+    most 4 characters long, so a keystroke is O(1).
+
+    "n" becomes ん before a consonant, and both "konnichiha" and "sannpo"
+    (the IME habit of typing "nn" for ん) work.
+
+    Usage:
+        converter = RomajiConverter()
+        converter.feed("k")  # (0, "k")
+        converter.feed("a")  # (1, "か"), replaces "k" with "か"
+    """
+    def __init__(self, katakana: bool = False):
+        """Initialize an empty converter.
+
+        Args:
+            katakana (bool, optional): Output katakana instead of
+                hiragana. Defaults to False.
+        """
+        self.katakana = katakana
+        self.pending = ""
+        self._node = ROMAJI_TRIE
+        self._out: list[str] = []
+        self._after_nn = False  # pending "n" is the second of "nn"
+
+    def feed(self, char: str) -> tuple[int, str]:
+        """Add a typed character.
+
+        Args:
+            char (str): Character. Ones that aren't in ROMAJI_TRIE end the
+                pending spelling and are kept as is.
+
+        Returns:
+            tuple[int, str]: Edit to apply at the end of the text (e.g.
+                before the cursor of a line edit): the number of characters
+                to remove (the previous pending text), and the text to add
+                (new kana, then the new pending text).
+        """
+        removed = len(self.pending)
+        self._out.clear()
+        self._feed(char.lower() if char.isascii() else char)
+        return removed, "".join(self._out) + self.pending
+
+    def flush(self) -> tuple[int, str]:
+        """End the pending spelling, e.g. when the answer is submitted: a
+        final "n" becomes ん, other pending romaji is kept.
+
+        Returns:
+            tuple[int, str]: Edit to apply, see feed().
+        """
+        removed = len(self.pending)
+        self._out.clear()
+        while self.pending:  # e.g. "ky" -> "k", then "y" is pending
+            self._end_pending()
+        return removed, "".join(self._out)
+
+    def reset(self):
+        """Forget the pending text, e.g. when the text was changed by
+        something else than typing (see widgets.EventLineEdit)."""
+        self.pending = ""
+        self._node = ROMAJI_TRIE
+        self._after_nn = False
+
+    def _feed(self, char: str):
+        """Internal function, walk the trie with one character."""
+        child = self._node.get(char)
+        if child is not None:
+            self.pending += char
+            self._node = child
+            if len(child) == 1 and "" in child:  # complete, nothing longer
+                self._emit(child[""])
+            return
+        pending = self.pending
+        if pending == "n" and char == "n" and not self._after_nn:
+            self._emit("ん")  # "nn": ん, and the second "n" may start "na"
+            self._after_nn = True
+        elif (pending == char and char.isalpha() and char not in "aiueon"
+              or pending == "t" and char == "c"):
+            self._emit("っ")  # doubled consonant, "kk" -> "っk"
+        elif pending:
+            self._end_pending()
+        else:
+            self._emit(char)  # not romaji
+            return
+        self._feed(char)
+
+    def _end_pending(self):
+        """Internal function, convert the pending text as a whole: "n" is
+        ん, other incomplete spellings are kept as romaji."""
+        pending = self.pending
+        if pending == "n":
+            if self._after_nn:  # "sannpo", the "nn" was the ん already
+                self.reset()
+            else:
+                self._emit("ん")
+        elif pending:
+            self.reset()
+            self._out.append(pending[0])
+            for char in pending[1:]:
+                self._feed(char)
+
+    def _emit(self, kana: str):
+        """Internal function, output kana and clear the pending text."""
+        self._out.append(to_katakana(kana) if self.katakana else kana)
+        self.reset()
+
+
+def romaji_to_kana(text: str, katakana: bool = False) -> str:
+    """Convert the romaji in a text to kana, e.g. "kitte" -> "きって".
+
+    Args:
+        text (str): Text, romaji can be mixed with kana and other text.
+        katakana (bool, optional): Output katakana instead of hiragana.
+            Defaults to False.
+
+    Returns:
+        str: Converted text. Letters that aren't romaji are kept.
+    """
+    converter = RomajiConverter(katakana)
+    parts = []
+    for char in text:
+        added = converter.feed(char)[1]
+        parts.append(added[:len(added) - len(converter.pending)])
+    parts.append(converter.flush()[1])
+    return "".join(parts)
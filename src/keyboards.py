@@ -6,10 +6,18 @@ Keyboard module for displaying virtual keyboards alongside the Write the Answer
 widget. Designed to match the Windows Japanese hiragana layout, but this
 differs on Mac (untested on Linux).
 
+Layouts are data tables (see the definitions at the bottom), registered in
+LAYOUTS by the index of the "write_keyboard_type" option. There is one
+keyboard window, shared by all questions (see get_keyboard()). It is built
+once, before the practice view loads its first question (see
+QuestionsDialog.do_accept()), and switching layouts only relabels its
+buttons.
+
 Currently experimental, see issue tracker.
 """
 from __future__ import annotations
 from .forms.keyboard import Ui_Keyboard
+from .kana import to_katakana
 from aqt.qt import QDialog, QTimer, QPushButton, QKeyEvent, QLineEdit
 from aqt import mw
 
@@ -41,12 +49,29 @@ class KeyboardView(QDialog, Ui_Keyboard):
             []
         )  # just for character keys for text to get updated on shift / caps
         self.translation = translation
+        # character -> translation index, and translation index -> button,
+        # for on_key()
+        self.key_index = _key_index(translation)
+        self.key_buttons: dict[int, QPushButton] = {}
+        self._pressed = None  # button shown as pressed, see _press()
+        self._presses = 0  # number of _press() calls
 
-        self.setup_button_commands()
         self.shift = False
-
         self.caps = False
 
+        self.setup_button_commands()
+
+    def set_layout(self, translation: list[tuple]):
+        """Switch to another layout. The buttons are relabeled, the dialog
+        is not rebuilt.
+
+        Args:
+            translation (list[tuple]): Keyboard type to load, see LAYOUTS.
+        """
+        self.translation = translation
+        self.key_index = _key_index(translation)
+        self._update_char_buttons()
+
     def link_field(self, field: QLineEdit):
         """Link an input field (LineEdit) to the output
         of this virtual keyboard.
@@ -65,10 +90,10 @@ class KeyboardView(QDialog, Ui_Keyboard):
             ind (int, optional): Index in the translation list. Defaults to -1.
         """
         self.buttons.append((button, ind))
+        if ind > -1:
+            self.key_buttons.setdefault(ind, button)
         if ind > -1 and self.translation:
-            item = self.translation[ind]
-            if item:
-                button.setText(item[0])
+            button.setText(self._label(ind))
         font = button.font()
         font.setPointSize(20)
         button.setFont(font)
@@ -90,6 +115,7 @@ class KeyboardView(QDialog, Ui_Keyboard):
             button (QPushButton): Button that was pressed.
             ind (int): Unused currently.
         """
+        self._press(button)
         if button.text() == "◌゙":
             self._dakuten()
             return
@@ -124,10 +150,18 @@ class KeyboardView(QDialog, Ui_Keyboard):
         if not self.translation:
             return
         for pair in self.buttons:
-            if pair[1]:  # has ind
-                if len(self.translation[pair[1]]) > 1:
-                    pair[0].setText(self.translation[
-                        pair[1]][int(self._is_caps())])
+            if pair[1] > -1:  # has ind
+                pair[0].setText(self._label(pair[1]))
+
+    def _label(self, ind: int) -> str:
+        """Helper method to get the text of the button at an index in the
+        translation, based on whether or not shift or caps is pressed."""
+        item = self.translation[ind] if ind < len(self.translation) else None
+        if not item:
+            return ""
+        if len(item) > 1 and self._is_caps():
+            return item[1]
+        return item[0]
 
     def _caps(self):
         """Signal callback to toggle Caps lock."""
@@ -291,29 +325,36 @@ class KeyboardView(QDialog, Ui_Keyboard):
             QInputMethodEvent must also be handled for foreign languages, and
             getting the most recent text from that returns a string.
 
-        This is written really poorly right now, as it loops over the entire
-            keyboard (twice!) to check which button should be virtually
-            pressed. This should be updated to make this O(1). However since
-            the number of buttons on the keyboard is rather small, perhaps
-            this doesn't have much impact on performance at all.
+        This is called for every key (and every IME preedit event), so the
+            button is found with the key_index and key_buttons dicts, and
+            only it and the previously pressed button are updated.
 
         Args:
             key (str): String of the key that was pressed.
         """
-        ind = -1
-        for i in range(len(self.translation)):
-            if not self.translation[i]:
-                continue
-            if key in self.translation[i]:
-                ind = i
-                break
-        if ind < 0:
+        button = self.key_buttons.get(self.key_index.get(key))
+        if button is None:
             return
-
-        for button in self.buttons:
-            button[0].setChecked(button[1] == ind)
-            if button[1] == ind:
-                QTimer.singleShot(200, lambda: button[0].setChecked(False))
+        self._press(button)
+        presses = self._presses
+        QTimer.singleShot(
+            200, lambda: self._release(button, presses))
+
+    def _press(self, button: QPushButton):
+        """Helper method to show a button as pressed, releasing the one that
+        was pressed before."""
+        if self._pressed is not None and self._pressed is not button:
+            self._pressed.setChecked(False)
+        button.setChecked(True)
+        self._pressed = button
+        self._presses += 1
+
+    def _release(self, button: QPushButton, presses: int):
+        """Helper method to release a button pressed by on_key(), unless a
+        key was pressed since (then that press releases it)."""
+        if presses == self._presses:
+            button.setChecked(False)
+            self._pressed = None
 
 
 # KEYBOARDS (add more in the future..)
@@ -452,3 +493,68 @@ KB_JAPANESE_HIRAGANA = [
     (None),  # 58 (Win)
     (None),  # 59 (Ctrl)
 ]
+
+KB_JAPANESE_KATAKANA = [
+    tuple(to_katakana(char) for char in item) if isinstance(item, tuple)
+    else item and to_katakana(item)
+    for item in KB_JAPANESE_HIRAGANA
+]
+
+# (name, translation) of each layout, by the "write_keyboard_type" option.
+# Layouts are only appended, so that the saved option keeps its meaning.
+LAYOUTS: list[tuple[str, list]] = []
+
+
+def register_layout(name: str, translation: list) -> int:
+    """Add a keyboard layout, e.g. from another add-on or a future
+    version.
+
+    Args:
+        name (str): Name shown in the options.
+        translation (list): One item per key, indexed like
+            KB_AMERICAN_QWERTY: None, a character, or a tuple of the
+            character and its shifted character.
+
+    Returns:
+        int: Index of the layout, for the "write_keyboard_type" option.
+    """
+    LAYOUTS.append((name, translation))
+    return len(LAYOUTS) - 1
+
+
+register_layout("Japanese - Hiragana", KB_JAPANESE_HIRAGANA)
+register_layout("Japanese - Katakana", KB_JAPANESE_KATAKANA)
+register_layout("English - QWERTY", KB_AMERICAN_QWERTY)
+
+
+def get_keyboard(layout: int) -> KeyboardView:
+    """Get the shared keyboard window (mw._bKeyboard), building it the first
+    time, and switch it to a layout.
+
+    Args:
+        layout (int): Index in LAYOUTS. Unknown indices use the first one.
+
+    Returns:
+        KeyboardView: The keyboard window.
+    """
+    if not 0 <= layout < len(LAYOUTS):
+        layout = 0
+    translation = LAYOUTS[layout][1]
+    keyboard = getattr(mw, "_bKeyboard", None)
+    if keyboard is None:
+        keyboard = mw._bKeyboard = KeyboardView(translation=translation)
+    elif keyboard.translation is not translation:
+        keyboard.set_layout(translation)
+    return keyboard
+
+
+def _key_index(translation: list) -> dict[str, int]:
+    """Internal function, maps each character of a layout to its index
+    (the first one, if a character is on several keys)."""
+    index = {}
+    for ind, item in enumerate(translation or []):
+        if isinstance(item, str):
+            item = (item,)
+        for char in item or ():
+            index.setdefault(char, ind)
+    return index
@@ -0,0 +1,55 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Migrations module. Upgrades the add-on config written by older versions.
+
+The config has a "schema_version" (0 if it is missing). Each migration in
+MIGRATIONS upgrades the config from the version before it, usually by
+going through the per-deck dicts. migrate() runs the ones the config
+needs, in order, and returns whether anything changed, so that the caller
+(./const.py) writes the config once, and not at all when it is up to date.
+
+To change the config schema, add a function to MIGRATIONS; its version is
+its position in the list, plus one.
+"""
+from __future__ import annotations
+from typing import Any, Callable
+
+
+def _sort_keys(config: dict[str, Any]):
+    """Version 1: the single sort field "sort" becomes the sort spec
+    "sort_keys" (see sorting.sort_spec())."""
+    for deck in config.get("decks", {}).values():
+        if deck.get("sort") and not deck.get("sort_keys"):
+            deck["sort_keys"] = [[deck["sort"], False]]
+
+
+MIGRATIONS: list[Callable[[dict[str, Any]], None]] = [
+    _sort_keys,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(config: dict[str, Any], addon_version: str) -> bool:
+    """Upgrade a config to SCHEMA_VERSION and record the add-on version.
+
+    Args:
+        config (dict[str, Any]): Add-on config, modified in place.
+        addon_version (str): Current add-on version, see version.py.
+
+    Returns:
+        bool: True if the config changed and should be saved.
+    """
+    changed = False
+    version = config.get("schema_version", 0)
+    for migration in MIGRATIONS[version:]:
+        migration(config)
+        changed = True
+    if version < SCHEMA_VERSION:  # (a newer version's config is kept)
+        config["schema_version"] = SCHEMA_VERSION
+        changed = True
+    if config.get("version") != addon_version:
+        config["version"] = addon_version
+        changed = True
+    return changed
@@ -0,0 +1,533 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Practice module, containing the state and logic of a practice session
+that do not depend on Qt or Anki: picking templates and cards, building
+the question dicts for the question widgets, and keeping score.
+
+HomeworkModel in ./models.py extends PracticeSession with the Qt signals
+for the Homework view. PracticeSession can also be used on its own, for
+example by tools/simulate.py to run sessions headlessly.
+"""
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+
+import random
+from .clock import SessionClock
+from .instrumentation import SessionStats
+from .schedulers import RevisitScheduler, CardSampler
+
+if TYPE_CHECKING:
+    from .history import HistoryStore
+    from .stores import Notecard, NotecardStore, OptionStore
+    from .subsets import Subset
+
+
+class PracticeSession:
+    """State of one practice session.
+
+    The config for the session is read from the option store's globals for
+    the deck, and the templates are set in the Question Wizard before hand.
+
+    All randomness goes through self.rng, so passing a seeded
+    random.Random instance makes a session reproducible.
+    """
+    def __init__(
+        self,
+        note_store: NotecardStore,
+        templates: list[dict[str, Any]],
+        options_store: OptionStore,
+        subset: Subset = None,
+        subset_group: int = -1,
+        rng: random.Random = None,
+        clock: SessionClock = None,
+        history: HistoryStore = None,
+    ):
+        """Initialize the practice session.
+
+        Args:
+            note_store (NotecardStore): notecard store instance to pull cards
+                from.
+            templates (List[Dict[str, Any]]): question templates to build
+                questions from.
+            options_store (OptionStore): option store instance for config.
+            subset (Subset, optional): instance of Subset with cards list. If
+                none, will use entire deck. Defaults to None.
+            subset_group (int, optional): group for the subset to use (between
+                [-1, subset.get_max_index()).). -1 will use the entire subset.
+                Defaults to -1.
+            rng (random.Random, optional): random source for the session.
+                If None, a new unseeded instance is used. Defaults to None.
+            clock (SessionClock, optional): clock for the session. If None,
+                a new one with the timer option as its limit is used.
+                Defaults to None.
+            history (HistoryStore, optional): practice history to record
+                the answers in. Defaults to None, to not record them.
+        """
+        super().__init__()
+        self.rng = rng if rng is not None else random.Random()
+
+        self.note_store = note_store
+        self.options_store = options_store
+
+        self.templates = []
+        for templ in templates:  # double templates for reverses here.
+            self.templates.append(templ)
+            if templ["include_reverse"]:
+                rev = templ.copy()
+                rev["question"] = templ["answer"]
+                rev["answer"] = templ["question"]
+                self.templates.append(rev)
+
+        self.subset = subset
+        self.subset_group = subset_group
+        if not subset:
+            self.cards = [i for i in range(note_store.length())]
+        else:
+            if subset_group == -1:
+                self.cards = subset.get_all_cards()
+            else:
+                self.cards = subset.get_cards(subset_group)
+        # models (note types) that each template can use, see
+        # NotecardStore.models_with_fields()
+        self.template_models = [
+            note_store.models_with_fields((templ["question"],
+                                           templ["answer"]))
+            for templ in self.templates
+        ]
+        self.usable_templates = self._usable_templates()
+        if not self.usable_templates:
+            raise ValueError(
+                "Not enough cards have the fields of the templates.")
+        self.curr_models = frozenset()  # models of the current template
+
+        self.curr_question = {}
+        self.curr_question_type = -1  # use index instead of name.
+        self.curr_template_name = None  # e.g. "Front → Back"
+        self.globals = self.options_store.get_globals(
+            self.note_store.deck_name)
+        if "do_timer" in self.globals and "timer_seconds" in self.globals:
+            if self.globals["do_timer"]:
+                self.timed_mode = self.globals["timer_seconds"]
+            else:
+                self.timed_mode = 0
+        else:
+            self.timed_mode = 0
+        # history
+        self.total_correct = 0
+        self.total_answered = 0
+
+        if clock is None:
+            clock = SessionClock(limit=self.timed_mode)
+        self.clock = clock
+        self.stats = SessionStats()  # timings, see instrumentation.py
+        self.history = history
+
+        self.card_history = set()  # previous cards
+
+        self.wait_wrong = self.globals["show_answer_before_next"]
+
+        self.true_random = self.globals["true_random"]
+        self.sampler = CardSampler(len(self.cards), self.rng)
+        self.rejections = 0  # cards drawn but not used by a question
+        self._drew_balanced = False
+
+        self.play_sounds = self.globals["play_sounds"]
+
+        # revisit mistakes
+        self.do_revisit = self.globals["revisit_mistakes"]
+        self.revisit_steps = self.globals["revisit_steps"]
+
+        self.revisits = RevisitScheduler(
+            spacing=self.globals["revisit_spacing"])
+
+        self.curr_cards = []
+        self.stop = False
+
+        # state of the current question
+        self.last_card = -1  # card index the user last answered about
+        self.has_answered = False
+        self.corrected = False  # for show answer to work properly
+
+    def render_fields(self) -> list[str]:
+        """Get the fields the question widgets display for this session:
+        the question and answer fields of the templates, and the audio
+        fields set for them in the field settings. See
+        NotecardStore.prebuild_render().
+
+        Returns:
+            list[str]: Field names.
+        """
+        fields = []
+        field_opts = self.globals["field_settings"]
+        for templ in self.templates:
+            for field in (templ["question"], templ["answer"]):
+                if field in field_opts:
+                    fields.append(field_opts[field][2])
+                fields.append(field)
+        return list(dict.fromkeys(fields))
+
+    def upcoming_cards(self) -> list[Notecard]:
+        """Get the cards known to be shown soon: the cards of the current
+        question, and the cards with revisits pending.
+
+        Returns:
+            list[Notecard]: Cards.
+        """
+        notecards = self.note_store.notecards
+        return (self.curr_cards
+                + self.curr_question.get("answer_cards", [])
+                + [notecards[self.cards[ind]] for ind in self.revisits])
+
+    def next_template(self) -> dict[str, Any]:
+        """Get a random template to use (for the next question), among the
+        templates that the session's cards can be used with. Sets
+        self.curr_models to the models the template can use.
+
+        Returns:
+            dict[str, Any]: Template dict representing a question type.
+        """
+        templates = self.usable_templates
+        i = templates[self.rng.randrange(len(templates))]
+        self.curr_models = self.template_models[i]
+        return self.templates[i]
+
+    def _usable_templates(self) -> list[int]:
+        """Internal method, gets the indices of the templates that the
+        session's cards can make questions of, see _can_use_template()."""
+        return [i for i, templ in enumerate(self.templates)
+                if self._can_use_template(templ, self.template_models[i])]
+
+    def _can_use_template(self, templ: dict[str, Any],
+                          models: frozenset[int]) -> bool:
+        """Internal method, whether the session has enough cards for a
+        question of the template, so that load_new_question() doesn't keep
+        rejecting cards forever.
+
+        Only cards that load_new_question() accepts count (of the models
+        with the template's fields, and whose answer isn't the question).
+        Write the Answer needs one, matching needs groupsize of them with
+        different questions, and multiple choice needs number_choices + 1
+        (the question card and the wrong answers) with different questions
+        and answers.
+
+        Args:
+            templ (dict[str, Any]): Template.
+            models (frozenset[int]): Models the template can use, see
+                NotecardStore.models_with_fields().
+
+        Returns:
+            bool: True if the template can be used.
+        """
+        q_type = templ["type_ind"]
+        if q_type == 0:
+            needed = templ["number_choices"] + 1
+        elif q_type == 1:
+            needed = templ["groupsize"]
+        else:
+            needed = 1
+        question_field, answer_field = templ["question"], templ["answer"]
+        questions = set()
+        answers = set()
+        notecards = self.note_store.notecards
+        for i in self.cards:
+            card = notecards[i]
+            if card.mid not in models:
+                continue
+            question = card.fields[question_field]
+            answer = card.fields[answer_field]
+            if answer.casefold() == question:
+                continue
+            question = question.casefold()
+            if question in questions or (q_type == 0 and answer in answers):
+                continue
+            questions.add(question)
+            answers.add(answer)
+            if len(questions) >= needed:
+                return True
+        return False
+
+    def next_card(self, move_ind: bool = True,
+                  revisit: bool = True) -> Notecard:
+        """Get random card to use (for the next question.)
+        This method either gets a card as the next one in a balanced/shuffled
+            deck (default setting) or it gets a card randomly from the deck
+            (if True Random is set in the options dialog.)
+
+        Also, this method implements "card revisiting." If the user gets a
+            question wrong (i.e. misses a card), then if Card Revisits are
+            enabled in options the card will return for N revisit steps
+            (set in Options), each one after "revisit_spacing" intervening
+            questions. Cards that are due for a revisit are always returned
+            first. However, since next_card() may be rejected by
+            load_new_question() (see below), card revisits are only satisfied
+            with self.revisits.visit() in that method.
+
+        Note:
+            When load_new_question() rejects a card, it must call
+            reject_card() so that a card from the balanced deck is deferred
+            to later in the pass instead of being skipped. This way every
+            card is visited once per pass (see CardSampler).
+
+        Args:
+            move_ind (bool, optional): Used for shuffled deck (balanced)
+                random to move onto the next card. If False, any card is
+                picked at random without using up the pass, e.g. for the
+                wrong answers in multiple choice. Defaults to True.
+            revisit (bool, optional): If True, do card revisits.
+                Defaults to True.
+
+        Returns:
+            Notecard: instance of the Notecard data-class to use for the next
+                question.
+        """
+        self._drew_balanced = False
+        if revisit:
+            card_ind = self.revisits.take(self.rng)
+            if card_ind is not None:
+                return (self.note_store.notecards[self.cards[card_ind]],
+                        card_ind)
+
+        if self.true_random or not move_ind:
+            ind = self.rng.randrange(len(self.cards))
+            return self.note_store.notecards[self.cards[ind]], ind
+        else:
+            ind = self.sampler.draw()
+            self._drew_balanced = True
+            return self.note_store.notecards[self.cards[ind]], ind
+
+    def reject_card(self):
+        """Called by load_new_question() when the card returned by the last
+        next_card() can't be used for the question. A card from the
+        balanced deck is deferred to later in the pass.
+        """
+        self.rejections += 1
+        if self._drew_balanced:
+            self.sampler.defer()
+            self._drew_balanced = False
+
+    # TODO: shorten this function:)
+    def load_new_question(self):
+        """Load the next question. Called when the user is going to move on
+        to the next question, before the view is going to be displayed.
+
+        Currently, this method should be improved. It
+            may be best to have a simple API for loading question-models and
+            corresponding question-widgets so that it is easy
+            to add new custom question types (even from another add-on).
+            As it stands, having three question models hard-coded in this
+            method is not versatile at all, but it exists for now.
+
+        This method does everything in preparation of the next question. It
+            gets a new question template, then based on the type (multiple
+            choice, matching, write the answer) it will populate a dict
+            in the model called self.curr_question with information for the
+            View to use. So, it creates a question model within a dict for the
+            question widget.
+        This method also adds cards to the list self.curr_cards for viewing
+            the Card(s) with SimpleCardView later.
+        """
+        self.clock.start()  # the question is shown by the controller
+        self.revisits.tick()
+        self.sampler.release()
+        self.has_answered = False
+        self.corrected = False
+        templ = self.next_template()
+        models = self.curr_models  # cards of other models are rejected
+        self.answer_card = None
+        self.curr_question_type = q_type = templ["type_ind"]
+        self.curr_template_name = templ["question"] + " → " + templ["answer"]
+        self.stats.begin_question(templ["type"], self.curr_template_name)
+        self.curr_question.clear()
+        self.curr_cards.clear()
+        self.curr_question["type"] = templ["type"]
+        # Multiple Choice
+        if q_type == 0:
+            quest, ind = self.next_card()
+            while (
+                quest.mid not in models
+                or quest.fields[templ["answer"]].casefold()
+                == quest.fields[templ["question"]]
+            ):
+                self.reject_card()
+                quest, ind = self.next_card()
+            self.answer_card = quest
+            self.card_history.add(ind)
+
+            self.revisits.visit(ind)
+
+            ans = []
+            ans_cards = []
+            ans_cards_inds = []
+            while len(ans) < templ["number_choices"]:
+                card, _ind = self.next_card(move_ind=False, revisit=False)
+                while (
+                    card.mid not in models
+                    # happens sometimes with the core2k set
+                    or card.fields[templ["answer"]].casefold()
+                    == card.fields[templ["question"]]
+                    # avoiding duplicating question
+                    or card.fields[templ["question"]].casefold()
+                    == quest.fields[templ["question"]]
+                    or self._has_card(ans, card, templ["answer"])
+                ):
+                    self.reject_card()
+                    card, _ind = self.next_card(move_ind=False,
+                                                revisit=False)
+                ans.append(card.fields[templ["answer"]])
+                ans_cards.append(card)
+                ans_cards_inds.append(_ind)
+
+            ans_ind = self.rng.randrange(templ["number_choices"])
+            ans[ans_ind] = quest.fields[templ["answer"]]
+            ans_cards[ans_ind] = quest
+
+            self.curr_question["question"] = quest.fields[templ["question"]]
+            self.curr_question["answers"] = ans
+            self.curr_question["correct_answer"] = ans_ind
+
+            # extended behavior
+            self.curr_question["question_field"] = templ["question"]
+            self.curr_question["answer_field"] = templ["answer"]
+
+            self.curr_question["question_card"] = quest
+            self.curr_question["answer_cards"] = ans_cards
+
+            self.curr_question["question_card_ind"] = ind
+            self.curr_question["answer_cards_ind"] = ans_cards_inds
+
+            self.curr_cards.append(quest)
+        # Matching
+        elif q_type == 1:
+            quest = []
+            ans = []
+
+            cards = []
+            cards_inds = []
+            while len(quest) < templ["groupsize"]:
+                card, _ind = self.next_card()
+                while (
+                    card.mid not in models
+                    # happens sometimes with core2k
+                    or card.fields[templ["answer"]].casefold()
+                    == card.fields[templ["question"]]
+                    or self._has_card(quest, card, templ["question"])
+                ):
+                    self.reject_card()
+                    card, _ind = self.next_card()
+                self.card_history.add(_ind)
+                self.revisits.visit(_ind)
+                quest.append(card.fields[templ["question"]])
+
+                ans.append(card.fields[templ["answer"]])
+                cards.append(card)
+                cards_inds.append(_ind)
+            self.curr_question["questions"] = quest
+            self.curr_question["answers"] = ans
+
+            self.curr_question["question_field"] = templ["question"]
+            self.curr_question["answer_field"] = templ["answer"]
+
+            self.curr_question["cards"] = cards
+            self.curr_question["cards_inds"] = cards_inds
+
+            self.curr_cards.extend(cards)
+        # Write the Answer
+        elif q_type == 2:
+            card, _ind = self.next_card()
+            while (
+                card.mid not in models
+                or card.fields[templ["answer"]].casefold()
+                == card.fields[templ["question"]]
+            ):
+                self.reject_card()
+                card, _ind = self.next_card()
+
+            self.answer_card = card
+            self.card_history.add(_ind)
+            self.revisits.visit(_ind)
+            quest = card.fields[templ["question"]]
+            ans = card.fields[templ["answer"]]
+            self.curr_question["question"] = quest
+            self.curr_question["answer"] = ans
+
+            self.curr_question["question_field"] = templ["question"]
+            self.curr_question["answer_field"] = templ["answer"]
+
+            self.curr_question["card"] = card
+            self.curr_question["card_ind"] = _ind
+
+            self.curr_cards.append(card)
+
+    def record_answer(self, correct: bool, multi_answer: bool):
+        """Keep score and schedule revisits for an answer given by the user.
+        Called by the Homework controller whenever the question widget
+        emits questionAnswered.
+
+        Only the first answer of a question counts towards the score, except
+        in multi-answer questions (matching), where every match counts until
+        the last one. A wrong first answer schedules self.last_card to be
+        revisited, if revisits are enabled. The time taken for the first
+        answer of each question is recorded in self.clock.latencies, and
+        in self.stats as the "answer" stage. Answers that count towards the
+        score are also recorded in self.history, if there is one.
+
+        Args:
+            correct (bool): True if the answer was correct, False if not.
+            multi_answer (bool): True if the question stays on the current
+                widget after this answer (e.g. matching).
+        """
+        latency = self.clock.answered()
+        if latency is not None:
+            self.stats.add("answer", latency)
+        first_answer = not self.has_answered
+        if first_answer:
+            self.total_answered += 1
+            if correct:
+                self.total_correct += 1
+
+            if not multi_answer:
+                self.has_answered = True
+
+            if self.history is not None and self.last_card >= 0:
+                card = self.note_store.notecards[self.cards[self.last_card]]
+                self.history.record(
+                    card.id, correct,
+                    deck=self.note_store.deck_name,
+                    template=self.curr_template_name,
+                    question_type=self.curr_question.get("type"),
+                    latency=latency,
+                )
+
+        if not correct and self.do_revisit and first_answer:
+            self.revisits.add(self.last_card, self.revisit_steps)
+
+    def finish(self):
+        """End the session. Writes the answers that are still pending to
+        the practice history."""
+        if self.history is not None:
+            self.history.flush()
+
+    def _has_card(
+        self, card_arr: list[str], new_card: Notecard, check_field: str
+    ) -> bool:
+        """Helper method to check if an array contains a card, by comparison
+        of a field.
+        Since this is used to validate/reject cards based on what the question
+        template needs, a list of strings here is passed in card_arr.
+        Returns true if new_cards.field[check_field] is in this array.
+
+        Args:
+            card_arr (list[Notecard]): String list to check.
+            new_card (Notecard): Notecard to check.
+            check_field (str): Check if this field in the notecard is in
+                card_arr.
+
+        Returns:
+            bool: True if the array has the card, False if not.
+        """
+        for stri in card_arr:
+            if new_card.fields[check_field] == stri:
+                return True
+        return False
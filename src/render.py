@@ -0,0 +1,146 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Render module. Turns raw field text into what the question widgets
+display: html with cloze and furigana handled, the sound file of a
+[sound:] tag and a plain text version.
+
+Each NotecardStore has a RenderCache, so a field is only rendered once
+per card instead of every time it is shown in a question. The cache is
+filled lazily, and can also be filled ahead of time (see
+NotecardStore.prebuild_render()).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import html
+import re
+
+from .furigana import FURIGANA_RE, to_ruby
+
+if TYPE_CHECKING:
+    from .stores import Notecard
+
+SOUND_RE = re.compile(r"\[sound:[\w.\-]{0,}\]")
+TAG_RE = re.compile(r"<[^>]*>")
+
+
+@dataclass(frozen=True)
+class RenderRecord:
+    """Rendered version of one field of one card.
+
+    Attributes:
+        text: Raw field text, as stored in Anki.
+        html: Html for the question label, with cloze and furigana
+            handled.
+        sound: File name of the first [sound:] tag, or None.
+        plain: Text without html tags, sound tags or furigana readings.
+    """
+    text: str
+    html: str
+    sound: Optional[str]
+    plain: str
+
+
+def find_sound(text: str) -> Optional[str]:
+    """Get the file name of the first [sound:] tag in a text.
+
+    Args:
+        text (str): Field text.
+
+    Returns:
+        Optional[str]: File name, or None if there is no sound tag.
+    """
+    if "[sound:" not in text:
+        return None
+    m = SOUND_RE.search(text)
+    return m.group(0)[7:-1] if m else None
+
+
+def handle_cloze(text: str) -> str:
+    """Handles Core2k's cloze format."""
+    return text.replace("（　）", "____")
+
+
+def render_field(text: str) -> RenderRecord:
+    """Render a field text. See RenderRecord.
+
+    Args:
+        text (str): Field text.
+
+    Returns:
+        RenderRecord: Rendered field.
+    """
+    return RenderRecord(
+        text=text,
+        html=to_ruby(handle_cloze(text)),
+        sound=find_sound(text),
+        plain=plain_text(text),
+    )
+
+
+def plain_text(text: str) -> str:
+    """Get a field text without html tags, sound tags or furigana
+    readings. See RenderRecord.plain.
+
+    Args:
+        text (str): Field text.
+
+    Returns:
+        str: Plain text.
+    """
+    plain = SOUND_RE.sub("", text)
+    plain = FURIGANA_RE.sub(r"\1", plain)
+    return html.unescape(TAG_RE.sub("", plain)).strip()
+
+
+class RenderCache:
+    """Render records of a notecard store, keyed by card id and field name.
+
+    Usage:
+        record = store.render.get(notecard, "Sentence")
+        label.set_record(record)
+    """
+    def __init__(self):
+        """Initialize an empty render cache."""
+        self._records: dict[tuple[int, str], RenderRecord] = {}
+
+    def __len__(self) -> int:
+        """Number of rendered fields."""
+        return len(self._records)
+
+    def get(self, card: Notecard, field: str) -> RenderRecord:
+        """Get the render record of a card's field, rendering it if needed.
+
+        Args:
+            card (Notecard): Card to render.
+            field (str): Field name.
+
+        Returns:
+            RenderRecord: Rendered field.
+        """
+        key = (card.id, field)
+        record = self._records.get(key)
+        if record is None or record.text != card.fields[field]:
+            record = self._records[key] = render_field(card.fields[field])
+        return record
+
+    def prebuild(self, cards: Iterable[Notecard], fields: Iterable[str]):
+        """Render the given fields of all the given cards. Fields that a
+        card does not have are skipped.
+
+        Args:
+            cards (Iterable[Notecard]): Cards to render.
+            fields (Iterable[str]): Field names.
+        """
+        fields = list(fields)
+        for card in cards:
+            for field in fields:
+                if field in card.fields:
+                    self.get(card, field)
+
+    def clear(self):
+        """Remove all render records."""
+        self._records.clear()
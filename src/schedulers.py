@@ -0,0 +1,282 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Schedulers module. Contains the data structures the Homework model uses
+to decide which card comes next during practice.
+
+These classes are plain Python (no Qt or Anki imports) and take their
+random source as an argument, so they behave deterministically when given
+a seeded random.Random instance.
+"""
+from __future__ import annotations
+from typing import Iterator
+
+import random
+
+
+class RevisitScheduler:
+    """Schedules missed cards to come back after a number of intervening
+    questions.
+
+    Cards are identified by their index in the Homework model's card list.
+    Each pending card has a counter of remaining revisits and a due
+    question step. Cards that have reached their due step are kept in an
+    indexed "ready" pool, so that membership checks, decrements and picking
+    a random ready card are all O(1).
+
+    Usage:
+        revisits = RevisitScheduler(spacing=3)
+        revisits.add(card_ind, 2)   # card missed, revisit it twice
+
+        # every new question
+        revisits.tick()
+        card_ind = revisits.take(rng)  # None if nothing is due yet
+        ...
+        revisits.visit(card_ind)    # card was shown, count one revisit
+    """
+    def __init__(self, spacing: int = 3):
+        """Initialize the revisit scheduler.
+
+        Args:
+            spacing (int, optional): Number of questions to wait between
+                two revisits of the same card. Defaults to 3.
+        """
+        self.spacing = max(1, spacing)
+        self.step = 0  # number of questions asked so far
+
+        self._remaining: dict[int, int] = {}  # card -> revisits left
+        self._due: dict[int, int] = {}  # card -> due step (if waiting)
+        self._buckets: dict[int, set[int]] = {}  # due step -> cards
+
+        # ready pool, as an indexed list for O(1) random pick / removal
+        self._ready: list[int] = []
+        self._ready_pos: dict[int, int] = {}
+
+    def __contains__(self, card_ind: int) -> bool:
+        """True if the card still has revisits pending."""
+        return card_ind in self._remaining
+
+    def __len__(self) -> int:
+        """Number of distinct cards with revisits pending."""
+        return len(self._remaining)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the cards with revisits pending."""
+        return iter(list(self._remaining))
+
+    def count(self, card_ind: int) -> int:
+        """Get the number of revisits left for a card.
+
+        Args:
+            card_ind (int): Card index in the model's card list.
+
+        Returns:
+            int: Revisits left, 0 if the card is not pending.
+        """
+        return self._remaining.get(card_ind, 0)
+
+    def ready_count(self) -> int:
+        """Get the number of cards that are due for a revisit now."""
+        return len(self._ready)
+
+    def add(self, card_ind: int, times: int):
+        """Schedule a card to be revisited. If the card is already pending,
+        the revisits are added to the ones it has left.
+
+        Args:
+            card_ind (int): Card index in the model's card list.
+            times (int): How many times the card should come back.
+        """
+        if times <= 0:
+            return
+        if card_ind in self._remaining:
+            self._remaining[card_ind] += times
+            return
+        self._remaining[card_ind] = times
+        self._wait(card_ind, self.spacing)
+
+    def tick(self):
+        """Advance one question. Cards that become due on this step are
+        moved into the ready pool.
+        """
+        self.step += 1
+        bucket = self._buckets.pop(self.step, None)
+        if not bucket:
+            return
+        for card_ind in bucket:
+            del self._due[card_ind]
+            self._add_ready(card_ind)
+
+    def take(self, rng: random.Random) -> int:
+        """Take a random card from the ready pool.
+
+        The card is deferred to the next question until visit() confirms it
+        was used, so a card rejected by the question builder is not offered
+        again during the same question.
+
+        Args:
+            rng (random.Random): Random source.
+
+        Returns:
+            int: Card index, or None if no card is due.
+        """
+        if not self._ready:
+            return None
+        card_ind = self._ready[rng.randrange(len(self._ready))]
+        self._remove_ready(card_ind)
+        self._wait(card_ind, 1)
+        return card_ind
+
+    def visit(self, card_ind: int) -> bool:
+        """Count one revisit for a card that was shown in a question. If the
+        card has more revisits left, it is scheduled again after the spacing.
+
+        Args:
+            card_ind (int): Card index in the model's card list.
+
+        Returns:
+            bool: True if the card was pending a revisit, False if not.
+        """
+        left = self._remaining.get(card_ind)
+        if left is None:
+            return False
+        self._unschedule(card_ind)
+        if left > 1:
+            self._remaining[card_ind] = left - 1
+            self._wait(card_ind, self.spacing)
+        else:
+            del self._remaining[card_ind]
+        return True
+
+    def _wait(self, card_ind: int, steps: int):
+        """Internal method to make a card due after a number of steps."""
+        due = self.step + steps
+        self._due[card_ind] = due
+        self._buckets.setdefault(due, set()).add(card_ind)
+
+    def _unschedule(self, card_ind: int):
+        """Internal method to remove a card from the ready pool or from its
+        due bucket, wherever it is."""
+        if card_ind in self._ready_pos:
+            self._remove_ready(card_ind)
+            return
+        due = self._due.pop(card_ind, None)
+        if due is not None:
+            bucket = self._buckets[due]
+            bucket.discard(card_ind)
+            if not bucket:
+                del self._buckets[due]
+
+    def _add_ready(self, card_ind: int):
+        """Internal method to add a card to the ready pool."""
+        self._ready_pos[card_ind] = len(self._ready)
+        self._ready.append(card_ind)
+
+    def _remove_ready(self, card_ind: int):
+        """Internal method to remove a card from the ready pool, by swapping
+        it with the last element."""
+        pos = self._ready_pos.pop(card_ind)
+        last = self._ready.pop()
+        if last != card_ind:
+            self._ready[pos] = last
+            self._ready_pos[last] = pos
+
+
+class CardSampler:
+    """Balanced ("shuffled deck") card sampler.
+
+    Every card is visited once per pass over the deck (an epoch) before
+    any card is visited again. The shuffle is done incrementally: each
+    draw swaps a random card from the unvisited part of the order to the
+    cursor, like one step of a Fisher-Yates shuffle, so there is no full
+    reshuffle when a pass wraps around.
+
+    The order array is split into three regions:
+        [0, cursor)     cards visited in this pass
+        [cursor, end)   cards not visited yet in this pass
+        [end, size)     cards deferred during the current question
+
+    A card that was drawn but rejected by the question builder is swapped
+    to the tail with defer(), so it is not offered again for the same
+    question. release() puts deferred cards back into the unvisited part of
+    the pass, which guarantees that they are still visited in this epoch.
+    """
+    def __init__(self, size: int, rng: random.Random):
+        """Initialize the sampler.
+
+        Args:
+            size (int): Number of cards to sample from. Cards are identified
+                by their index in [0, size).
+            rng (random.Random): Random source.
+        """
+        self.rng = rng
+        self.size = size
+        self.order = [i for i in range(size)]
+        self.cursor = 0
+        self.end = size
+        self.epoch = 0  # number of completed passes
+        self._last = -1  # position of last draw, -1 if not deferrable
+
+    def draw(self) -> int:
+        """Draw the next card of the pass.
+
+        If every card not yet visited in this pass has been deferred for the
+        current question, a random card that was already visited is returned
+        instead, without counting towards the pass.
+
+        Returns:
+            int: Card index.
+        """
+        if self.cursor >= self.end:
+            if self.end == self.size:  # pass is complete
+                self.cursor = 0
+                self.epoch += 1
+            elif self.cursor > 0:  # only deferred cards are left
+                self._last = -1
+                return self.order[self.rng.randrange(self.cursor)]
+            else:  # every card was deferred
+                self._last = -1
+                return self.order[self.rng.randrange(self.size)]
+
+        i = self.cursor
+        j = self.rng.randrange(i, self.end)
+        order = self.order
+        order[i], order[j] = order[j], order[i]
+        self._last = i
+        self.cursor += 1
+        return order[i]
+
+    def defer(self):
+        """Defer the card returned by the last draw() to later in the pass.
+        Does nothing if the last draw did not count towards the pass.
+        """
+        if self._last < 0:
+            return
+        order = self.order
+        self.cursor -= 1
+        self.end -= 1
+        i, j = self.cursor, self.end
+        order[i], order[j] = order[j], order[i]
+        self._last = -1
+
+    def release(self):
+        """Return all deferred cards to the unvisited part of the pass.
+        Should be called before building each question.
+        """
+        self.end = self.size
+        self._last = -1
+
+    def visited(self) -> int:
+        """Get the number of cards visited in the current pass."""
+        return self.cursor
+
+    def coverage(self) -> float:
+        """Get the fraction of the deck visited in the current pass.
+
+        Returns:
+            float: Value between 0 and 1.
+        """
+        if self.size == 0:
+            return 0.0
+        return self.cursor / self.size
@@ -0,0 +1,364 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Sorting module. Sorts the cards of a notecard store by a sort spec: a
+sequence of (field, reverse) keys, e.g. frequency, then index. Cards that
+compare equal on a key are ordered by the next one.
+
+A field (column) is parsed once into typed keys. Its kind is the first
+of "int", "float" and "date" that at least PARSE_MIN of the non-empty
+values parse as, else "natural" (text, with digit runs compared as
+numbers, so "word 9" comes before "word 10"). Values that don't parse as
+the column's kind, are empty, or are missing (cards of other note types)
+are unparsable, and always come last, in deck order, whichever the
+direction.
+
+The resulting permutations are cached per spec in a SortCache, so
+switching the sort order is instant after the first time. Each
+NotecardStore has one, see NotecardStore.sort_by(). The order of the
+spec in the deck options is also saved to a file (see save_order()), so
+that it isn't recomputed when the deck is loaded again.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional, Sequence, TYPE_CHECKING
+
+from datetime import datetime
+from hashlib import sha1
+from os import makedirs
+from os.path import dirname, join
+import html
+import json
+import math
+import re
+
+from .render import TAG_RE
+
+if TYPE_CHECKING:
+    from .stores import Notecard
+
+SortKey = tuple[str, bool]  # (field, reverse)
+
+SORT_DIR = join(dirname(__file__), "user_files", "sort")
+PARSE_MIN = 0.9  # fraction of values that must parse for a column kind
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y", "%Y-%m-%d %H:%M",
+                "%Y-%m-%dT%H:%M:%S"]
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+def sort_text(text: str) -> str:
+    """Get the text a field is sorted by: without html tags and
+    surrounding whitespace. Unlike render.plain_text(), sound tags and
+    furigana are kept."""
+    if "<" in text or "&" in text:
+        text = html.unescape(TAG_RE.sub("", text))
+    return text.strip()
+
+
+def parse_int(text: str) -> int:
+    """Parse an integer, raises ValueError."""
+    return int(text)
+
+
+def parse_float(text: str) -> float:
+    """Parse a finite float, raises ValueError."""
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError("not a finite number: " + text)
+    return value
+
+
+def parse_date(text: str) -> float:
+    """Parse a date (see DATE_FORMATS, or ISO 8601) into a sortable number
+    of days, raises ValueError."""
+    for fmt in DATE_FORMATS:
+        try:
+            return _days(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+    return _days(datetime.fromisoformat(text))
+
+
+def _days(dt: datetime) -> float:
+    """Internal function, days since 0001-01-01 (works for any year,
+    unlike timestamp())."""
+    return dt.toordinal() + (dt.hour * 3600 + dt.minute * 60
+                             + dt.second) / 86400
+
+
+def natural_key(text: str) -> tuple:
+    """Get a natural-sort key: case-insensitive text, with digit runs
+    compared as numbers."""
+    parts = _DIGITS_RE.split(text.casefold())
+    return tuple(int(part) if i % 2 else part
+                 for i, part in enumerate(parts))
+
+
+PARSERS: dict[str, Callable[[str], Any]] = {
+    "int": parse_int,
+    "float": parse_float,
+    "date": parse_date,
+}
+
+
+def sort_spec(g: dict[str, Any]) -> tuple[SortKey, ...]:
+    """Get the sort spec of a deck from its global options: "sort_keys", a
+    list of [field, reverse] pairs, or else the single field "sort" of
+    older configs, ascending.
+
+    Args:
+        g (dict[str, Any]): Global options of the deck, see
+            OptionStore.get_globals().
+
+    Returns:
+        tuple[SortKey, ...]: Sort spec, empty if the deck isn't sorted.
+    """
+    if g.get("sort_keys"):
+        return tuple((str(field), bool(reverse))
+                     for field, reverse in g["sort_keys"])
+    if g.get("sort"):
+        return ((g["sort"], False),)
+    return ()
+
+
+def fingerprint(cards: Sequence[Notecard]) -> str:
+    """Get a digest of the cards' ids and note modification times, in
+    order. A saved order is only used while the fingerprint is the same
+    (no cards were added, removed or edited).
+
+    Args:
+        cards (Sequence[Notecard]): Cards, in deck order.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = sha1()
+    for card in cards:
+        digest.update(b"%d:%d;" % (card.id, card.note.mod))
+    return digest.hexdigest()
+
+
+def _order_path(deck_name: str) -> str:
+    """Internal function, file of the saved order of a deck (deck names
+    can have characters that aren't allowed in file names)."""
+    return join(SORT_DIR, sha1(deck_name.encode()).hexdigest()[:16]
+                + ".json")
+
+
+def load_order(deck_name: str, spec: tuple[SortKey, ...],
+               cards_fingerprint: str) -> Optional[list[int]]:
+    """Load the saved order of a deck, see save_order().
+
+    Args:
+        deck_name (str): Deck name (NotecardStore.order_key).
+        spec (tuple[SortKey, ...]): Sort spec.
+        cards_fingerprint (str): Current fingerprint() of the cards.
+
+    Returns:
+        Optional[list[int]]: Card indices, or None if there is no saved
+            order for this spec and these cards.
+    """
+    try:
+        with open(_order_path(deck_name), encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (saved.get("fingerprint") != cards_fingerprint
+            or [tuple(key) for key in saved.get("spec", [])] != list(spec)):
+        return None
+    return saved.get("order")
+
+
+def save_order(deck_name: str, spec: tuple[SortKey, ...],
+               cards_fingerprint: str, order: list[int]):
+    """Save the order of a deck for a spec, replacing the saved order of
+    any other spec.
+
+    Args:
+        deck_name (str): Deck name (NotecardStore.order_key).
+        spec (tuple[SortKey, ...]): Sort spec.
+        cards_fingerprint (str): fingerprint() of the cards.
+        order (list[int]): Card indices.
+    """
+    saved = {
+        "deck": deck_name,
+        "spec": [list(key) for key in spec],
+        "fingerprint": cards_fingerprint,
+        "order": order,
+    }
+    try:
+        makedirs(SORT_DIR, exist_ok=True)
+        with open(_order_path(deck_name), "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+    except OSError:
+        print("Warning: AnkiBuddy could not save the order of "
+              + deck_name)
+
+
+class ColumnKeys:
+    """Typed sort keys of one field, for each card of a list.
+
+    Attributes:
+        kind: "int", "float", "date" or "natural", see module docstring.
+        keys: Key of each parsable card, by card index.
+        unparsable: Indices of the unparsable cards, in order.
+    """
+    def __init__(self, cards: Sequence[Notecard], field: str):
+        """Parse the field of every card.
+
+        Args:
+            cards (Sequence[Notecard]): Cards, in deck order.
+            field (str): Field name.
+        """
+        texts: list[Optional[str]] = []
+        for card in cards:
+            text = card.fields.get(field)
+            texts.append(sort_text(text) if text is not None else None)
+        present = [text for text in texts if text]
+
+        self.kind = "natural"
+        for kind, parse in PARSERS.items():
+            if present and self._parse_count(parse, present) >= (
+                    PARSE_MIN * len(present)):
+                self.kind = kind
+                break
+
+        parse = PARSERS.get(self.kind, natural_key)
+        self.keys: dict[int, Any] = {}
+        self.unparsable: list[int] = []
+        for i, text in enumerate(texts):
+            if not text:
+                self.unparsable.append(i)
+                continue
+            try:
+                self.keys[i] = parse(text)
+            except ValueError:
+                self.unparsable.append(i)
+
+    def permutation(self, reverse: bool = False) -> list[int]:
+        """Get the card indices in sorted order, unparsable cards last.
+
+        Args:
+            reverse (bool, optional): Descending order. Defaults to False.
+
+        Returns:
+            list[int]: Card indices.
+        """
+        keys = self.keys
+        order = sorted(keys, key=keys.__getitem__, reverse=reverse)
+        return order + self.unparsable
+
+    def stable_sort(self, order: list[int],
+                    reverse: bool = False) -> list[int]:
+        """Sort card indices by this column, keeping the given order for
+        equal keys (so sorting by the last key of a spec first, then the
+        one before it, etc. sorts by the whole spec). Unparsable cards go
+        last.
+
+        Args:
+            order (list[int]): Card indices.
+            reverse (bool, optional): Descending order. Defaults to False.
+
+        Returns:
+            list[int]: Card indices.
+        """
+        keys = self.keys
+        parsed = [i for i in order if i in keys]
+        # sorted() is stable for reverse=True as well
+        parsed.sort(key=keys.__getitem__, reverse=reverse)
+        if len(parsed) < len(order):
+            parsed += [i for i in order if i not in keys]
+        return parsed
+
+    def _parse_count(self, parse: Callable[[str], Any],
+                     texts: list[str]) -> int:
+        """Internal method, counts the texts that parse, stopping once
+        PARSE_MIN can't be reached."""
+        allowed = len(texts) - math.ceil(PARSE_MIN * len(texts))
+        failed = 0
+        for text in texts:
+            try:
+                parse(text)
+            except ValueError:
+                failed += 1
+                if failed > allowed:
+                    break
+        return len(texts) - failed
+
+
+class SortCache:
+    """Sorted permutations of a list of cards, cached per sort spec.
+
+    Usage:
+        cache = SortCache(cards)
+        order = cache.permutation((("Frequency", True), ("Index", False)))
+        sorted_cards = [cards[i] for i in order]  # indices into cards
+    """
+    def __init__(self, cards: Sequence[Notecard]):
+        """Initialize an empty cache.
+
+        Args:
+            cards (Sequence[Notecard]): Cards, in deck order. Must not
+                change while the cache is used.
+        """
+        self.cards = cards
+        self._columns: dict[str, ColumnKeys] = {}
+        self._permutations: dict[tuple[SortKey, ...], list[int]] = {}
+
+    def column(self, field: str) -> ColumnKeys:
+        """Get the parsed keys of a field (parsing it on first use).
+
+        Args:
+            field (str): Field name.
+
+        Returns:
+            ColumnKeys: Keys of the field.
+        """
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = ColumnKeys(self.cards, field)
+        return column
+
+    def permutation(self, spec: tuple[SortKey, ...]) -> list[int]:
+        """Get the card indices sorted by a spec, see ColumnKeys. The list
+        is shared, don't modify it.
+
+        Args:
+            spec (tuple[SortKey, ...]): (field, reverse) keys, most
+                significant first.
+
+        Returns:
+            list[int]: Card indices.
+        """
+        order = self._permutations.get(spec)
+        if order is None:
+            order = self._permutations[spec] = self._sort(spec)
+        return order
+
+    def __contains__(self, spec: tuple[SortKey, ...]) -> bool:
+        return spec in self._permutations
+
+    def add(self, spec: tuple[SortKey, ...], order: list[int]):
+        """Add a known permutation (e.g. from load_order()).
+
+        Args:
+            spec (tuple[SortKey, ...]): Sort spec.
+            order (list[int]): Card indices sorted by the spec.
+        """
+        self._permutations[spec] = order
+
+    def _sort(self, spec: tuple[SortKey, ...]) -> list[int]:
+        """Internal method, sorts by the first key, then each equal run by
+        the next keys (as stable passes from the last key)."""
+        if not spec:
+            return list(range(len(self.cards)))
+        field, reverse = spec[-1]
+        order = self.column(field).permutation(reverse)
+        for field, reverse in reversed(spec[:-1]):
+            order = self.column(field).stable_sort(order, reverse)
+        return order
+
+    def clear(self):
+        """Remove all cached keys and permutations."""
+        self._columns.clear()
+        self._permutations.clear()
@@ -4,34 +4,62 @@
 """
 Stores module for managing data to/from Anki.
 There should be one instance of NotecardStore for each Deck,
-and one instance of OptionStore globally.
+and one instance of OptionStore globally. A CompositeStore combines the
+NotecardStores of several decks (e.g. a deck and its subdecks).
 
 The singleton for these is managed in ./const.py.
 """
 from __future__ import annotations
 from dataclasses import dataclass
 
-from typing import Any
+from typing import Any, Iterator
+from bisect import bisect_right
+from collections.abc import Sequence
 
 from aqt import mw
 from anki.cards import Card
 
+from .render import RenderCache
+from .answers import AnswerCache
+from .sorting import (
+    SortCache, SortKey, fingerprint, load_order, save_order
+)
+
+# cards rendered per background task by NotecardStore.prebuild_render(),
+# and at most in total
+PREBUILD_CHUNK = 50
+PREBUILD_LIMIT = 500
+
 
 class NotecardStore:
     """Data representation of all the cards in a Deck, including their fields,
     the number of lapses, etc.
 
-    Currently this only supports one card model.
+    The cards can be of several note types (models). For each model, the
+    store keeps the names of its fields, see model_fields,
+    models_with_fields() and field_names().
 
-    Should call sort() after initializing it, if you want this to be sorted
-    by a field.
+    Should call sort() or sort_by() after initializing it, if you want this
+    to be sorted by fields. The cards in load order stay in base_notecards.
 
     Attributes:
         notecards: List of Notecard objects representing the deck. 
             See Notecard.
+        base_notecards: The same notecards, in the order they were loaded.
+        sort_order: Sort spec ((field, reverse) keys) of the last sort,
+            or None.
         deck_dict: Information from Anki about the deck. See Decks JSONObjects
             https://github.com/ankidroid/Anki-Android/wiki/Database-Structure
         deck_name: String name of the deck.
+        order_key: Name the sorted order is saved under, see
+            sorting.save_order(). The deck name, except for composites.
+        render: Cache of rendered fields (html, sound file, plain text).
+            See render.RenderCache.
+        answers: Cache of the answers that fields accept in Write the
+            Answer. See answers.AnswerCache.
+        model: Anki model (note type) of the first card.
+        models: Anki models of the cards, by model id.
+        model_fields: Field names of each model, by model id.
     """
     def __init__(self):
         """Initialize NotecardStore.
@@ -39,8 +67,18 @@ class NotecardStore:
         """
         self.is_loaded = False
         self.notecards: list[Notecard] = []
+        self.base_notecards = self.notecards
+        self.sort_order = None
+        self._sort_cache = None
         self.deck_dict = None
         self.deck_name = None
+        self.order_key = None
+        self.render = RenderCache()
+        self.answers = AnswerCache(self.render)
+        self.model = None
+        self.models: dict[int, dict[str, Any]] = {}
+        self.model_fields: dict[int, tuple[str, ...]] = {}
+        self._models_with: dict[tuple[str, ...], frozenset[int]] = {}
 
     def load(self, did: int):
         """Load all the information from Anki's current collection into a
@@ -56,6 +94,8 @@ class NotecardStore:
             c.load()
 
             note = mw.col.get_note(c.nid)
+            if note.mid not in self.models:
+                self.add_model(mw.col.models.get(note.mid))
 
             notecard = Notecard(
                 dict(note.items()), c.id, c.nid, note.mid, c.reps, c.lapses
@@ -68,15 +108,65 @@ class NotecardStore:
         # store deck info
         self.did = did
         self.deck_dict = mw.col.decks.get(did)
-        self.deck_name = self.deck_dict["name"]
+        self.deck_name = self.order_key = self.deck_dict["name"]
 
-        # store model info
-        self.model = mw.col.models.get(self.notecards[0].mid)
+        # store model info (None for e.g. a parent deck with all its cards
+        # in subdecks)
+        if self.notecards:
+            self.model = self.models[self.notecards[0].mid]
         self.is_loaded = True
 
+    def add_model(self, model: dict[str, Any]):
+        """Add a model (note type) to self.models and self.model_fields.
+        Called by load() for each model the cards use.
+
+        Args:
+            model (dict[str, Any]): Anki model.
+        """
+        self.models[model["id"]] = model
+        self.model_fields[model["id"]] = tuple(
+            field["name"] for field in model["flds"])
+        self._models_with.clear()
+
+    def field_names(self) -> list[str]:
+        """Get the field names of all the models, in model order, without
+        duplicates. Used by the dialogs to list fields.
+
+        Returns:
+            list[str]: Field names.
+        """
+        return list(dict.fromkeys(
+            name for names in self.model_fields.values() for name in names))
+
+    def models_with_fields(self, fields: tuple[str, ...]) -> frozenset[int]:
+        """Get the ids of the models that have all the given fields, e.g.
+        the question and answer fields of a template. A card can be used
+        with the fields if card.mid is in the result.
+
+        Args:
+            fields (tuple[str, ...]): Field names.
+
+        Returns:
+            frozenset[int]: Model ids.
+        """
+        mids = self._models_with.get(fields)
+        if mids is None:
+            mids = self._models_with[fields] = frozenset(
+                mid for mid, names in self.model_fields.items()
+                if all(field in names for field in fields))
+        return mids
+
+    @property
+    def sort_cache(self) -> SortCache:
+        """Sorted permutations of base_notecards, see sorting.SortCache.
+        Can be used by subsets and views to sort cards by a field."""
+        if self._sort_cache is None:
+            self._sort_cache = SortCache(self.base_notecards)
+        return self._sort_cache
+
     def sort(self, index: str, reverse=False):
-        """Sort the store's cards (in-place) by one of the card's model's
-        fields.
+        """Sort the store's cards by one of the card's model's fields (see
+        sorting.py for how field values are compared).
         For example, these are some of the Core 2000 deck fields:
         - Optimized-Voc-Index
         - Vocabulary-Kanji
@@ -86,15 +176,99 @@ class NotecardStore:
         If you wanted to sort by the optimized index,
         then you would pass index as "Optimized-Voc-Index". Or,
         you could sort by alphabetical order, and pass "Vocabulary-English",
-        etc.
+        etc. To sort by several fields, see sort_by().
 
         Args:
             index (str): model field name to sort by
             reverse (bool, optional): reverse (descending) sorting order.
                 Defaults to False.
+
+        Raises:
+            KeyError: None of the store's models have the field.
+        """
+        self.sort_by(((index, reverse),))
+
+    def sort_by(self, spec: tuple[SortKey, ...], persist: bool = False):
+        """Sort the store's cards by several fields, e.g.
+        (("Frequency", True), ("Index", False)) for the most frequent cards
+        first, and cards of the same frequency by index.
+
+        The permutation for each spec is cached, so sorting again by a
+        spec that was used before is instant. With persist, the order is
+        also saved to a file, and loaded from there next time if the
+        cards didn't change (see sorting.save_order()).
+
+        Args:
+            spec (tuple[SortKey, ...]): (field, reverse) keys, most
+                significant first.
+            persist (bool, optional): Load and save the order. Meant for
+                the spec in the deck options. Defaults to False.
+
+        Raises:
+            KeyError: None of the store's models have one of the fields.
         """
-        self.notecards.sort(key=lambda note: int(note.fields[index]),
-                            reverse=reverse)
+        spec = tuple(spec)
+        fields = self.field_names()
+        for field, _ in spec:
+            if field not in fields:
+                raise KeyError(field)
+
+        cache = self.sort_cache
+        if persist and spec not in cache:
+            cards_fingerprint = fingerprint(self.base_notecards)
+            order = load_order(self.order_key, spec, cards_fingerprint)
+            if order is not None and len(order) == len(self.base_notecards):
+                cache.add(spec, order)
+            else:
+                save_order(self.order_key, spec, cards_fingerprint,
+                           cache.permutation(spec))
+        self._apply_order(cache.permutation(spec))
+        self.sort_order = spec
+
+    def _apply_order(self, order: list[int]):
+        """Internal method, sets self.notecards to base_notecards in the
+        given order."""
+        base = self.base_notecards
+        self.notecards = [base[i] for i in order]
+
+    def prebuild_render(self, fields: list[str], cards: list[int] = None):
+        """Render fields of the store's cards ahead of time, so that
+        questions don't have to render them when shown.
+
+        The cards are rendered in background tasks of PREBUILD_CHUNK cards,
+        each one started when the previous one is done, and at most
+        PREBUILD_LIMIT cards are rendered. The rest get rendered when
+        they are first shown.
+
+        Args:
+            fields (list[str]): Field names to render.
+            cards (list[int], optional): Indices of the cards to render.
+                Defaults to None, for all cards.
+        """
+        if cards is None:
+            cards = range(len(self.notecards))
+        notecards = [self.notecards[i] for i in cards[:PREBUILD_LIMIT]]
+        self._prebuild_chunk(notecards, list(fields), 0)
+
+    def _prebuild_chunk(self, notecards: list[Notecard], fields: list[str],
+                        start: int):
+        """Internal method, renders the chunk of notecards starting at
+        start in a background task, then queues the next chunk."""
+        chunk = notecards[start:start + PREBUILD_CHUNK]
+        if not chunk:
+            return
+
+        def on_done(future):
+            try:
+                future.result()
+            except Exception as e:
+                print("Warning: AnkiBuddy could not render cards "
+                      "ahead of time: %r" % e)
+                return
+            self._prebuild_chunk(notecards, fields, start + PREBUILD_CHUNK)
+
+        mw.taskman.run_in_background(
+            lambda: self.render.prebuild(chunk, fields), on_done=on_done)
 
     def is_loaded(self) -> bool:
         """Gets if there is a deck loaded in this notecard store.
@@ -114,6 +288,107 @@ class NotecardStore:
         return len(self.notecards)
 
 
+class CompositeStore(NotecardStore):
+    """Notecard store for several decks, e.g. a deck and its subdecks, or
+    decks picked by the user. Works like a NotecardStore (subsets,
+    templates and the practice session don't need to know the
+    difference), but its notecards are the member stores' notecards, see
+    CompositeNotecards.
+
+    Options are stored under deck_name, which is the name of the parent
+    deck, or the member deck names joined with " + ". The sorted order is
+    saved under the member deck ids (order_key), apart from the parent
+    deck's own order.
+    """
+    def __init__(self, stores: list[NotecardStore], did: int = None):
+        """Initialize the composite store from loaded stores.
+
+        Args:
+            stores (list[NotecardStore]): Loaded member stores. Empty stores
+                are left out.
+            did (int, optional): Id of the parent deck, if the members are a
+                deck and its subdecks. Defaults to None.
+        """
+        super().__init__()
+        self.stores = [store for store in stores if store.length()]
+        self.notecards = CompositeNotecards(self.stores)
+        self.base_notecards = CompositeNotecards(self.stores)
+        self.did = did
+        if did is not None:
+            self.deck_dict = mw.col.decks.get(did)
+            self.deck_name = self.deck_dict["name"]
+        else:
+            self.deck_dict = stores[0].deck_dict
+            self.deck_name = " + ".join(store.deck_name for store in stores)
+        self.order_key = "composite:" + ",".join(
+            str(store.did) for store in self.stores)
+        for store in self.stores:
+            for model in store.models.values():
+                if model["id"] not in self.models:
+                    self.add_model(model)
+        self.model = self.stores[0].model if self.stores else None
+        self.is_loaded = True
+
+    def load(self, did: int):
+        """Does nothing, the member stores are loaded already (see
+        const.NotecardStoreManager)."""
+
+    def _apply_order(self, order: list[int]):
+        """Internal method, see NotecardStore.sort(). The member stores are
+        not changed."""
+        self.notecards.order = order
+
+
+class CompositeNotecards(Sequence):
+    """Read-only list of the notecards of several stores, one after the
+    other, without copying them. Index i is mapped to a member store and
+    an index in it through the stores' first indices (self.offsets). The
+    members' cards are taken in load order (base_notecards), and
+    CompositeStore.sort() sets a permutation of the indices (self.order).
+    """
+    def __init__(self, stores: list[NotecardStore]):
+        """Initialize the list.
+
+        Args:
+            stores (list[NotecardStore]): Member stores.
+        """
+        self.stores = stores
+        self.offsets = []  # index of the first card of each store
+        length = 0
+        for store in stores:
+            self.offsets.append(length)
+            length += store.length()
+        self._length = length
+        self.order = None  # sorted indices, see CompositeStore.sort()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int | slice) -> Notecard:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("notecard index out of range")
+        if self.order is not None:
+            i = self.order[i]
+        return self._member_card(i)
+
+    def __iter__(self) -> Iterator[Notecard]:
+        if self.order is None:
+            for store in self.stores:
+                yield from store.base_notecards
+        else:
+            for i in self.order:
+                yield self._member_card(i)
+
+    def _member_card(self, i: int) -> Notecard:
+        """Internal method, gets card i in member store order."""
+        store = bisect_right(self.offsets, i) - 1
+        return self.stores[store].base_notecards[i - self.offsets[store]]
+
+
 @dataclass
 class Notecard:
     """Data representation of an Anki flashcard for this add-on.
@@ -146,13 +421,14 @@ class OptionStore:
         option_store.get_globals(deck)[key] = value
         option_store.save()
 
-        # Writing defaults
+        # Writing defaults (saves only if some were missing)
         option_store.write_all_defaults()
     """
     def __init__(self, name: str):
         """Initialize options store."""
         self.name = name
         self.config = mw.addonManager.getConfig(name)
+        self._changed = False  # defaults were added since the last save
 
     def get_globals(self, deck_name: str) -> dict[str, Any]:
         """Get "Global" configuration options.
@@ -168,7 +444,8 @@ class OptionStore:
                 format.
         """
         if deck_name not in self.config["decks"]:
-            self.write_global_defaults(deck_name)
+            self._write_global_defaults(deck_name)
+            self.save_if_changed()
         return self.config["decks"][deck_name]
 
     def get_list_config(self, deck_name: str) -> dict[str, Any]:
@@ -187,7 +464,8 @@ class OptionStore:
                 format.
         """
         if deck_name not in self.config["list"]:
-            self.write_list_defaults(deck_name)
+            self._write_list_defaults(deck_name)
+            self.save_if_changed()
         return self.config["list"][deck_name]
 
     def get_homework_config(self, deck_name: str) -> dict[str, Any]:
@@ -205,7 +483,8 @@ class OptionStore:
                 format.
         """
         if deck_name not in self.config["homework"]:
-            self.write_homework_defaults(deck_name)
+            self._write_homework_defaults(deck_name)
+            self.save_if_changed()
         return self.config["homework"][deck_name]
 
     # not yet supported
@@ -223,7 +502,8 @@ class OptionStore:
                 format.
         """
         if deck_name not in self.config["test"]:
-            self.write_test_defaults(deck_name)
+            self._write_test_defaults(deck_name)
+            self.save_if_changed()
         return self.config["test"][deck_name]
 
     def save(self):
@@ -235,11 +515,20 @@ class OptionStore:
         get_test_config().
         """
         mw.addonManager.writeConfig(self.name, self.config)
+        self._changed = False
+
+    def save_if_changed(self):
+        """Write the config only if defaults were added to it since the
+        last save (the whole config is written, which gets slow with many
+        decks)."""
+        if self._changed:
+            self.save()
 
     # Defaults
     ####################################
     def write_all_defaults(self, deck_name: str):
-        """Call this to write config defaults, if they do not exist.
+        """Call this to write config defaults, if they do not exist. The
+        config is saved once, if any were missing.
 
         Args:
             deck_name (str): Name of the deck to get. It is also
@@ -249,6 +538,7 @@ class OptionStore:
         self._write_list_defaults(deck_name)
         self._write_homework_defaults(deck_name)
         self._write_test_defaults(deck_name)
+        self.save_if_changed()
 
     def _write_global_defaults(self, deck_name: str):
         """Internal function to write global defaults. Called by
@@ -256,6 +546,7 @@ class OptionStore:
         c = self.config["decks"]
         if deck_name not in c:
             c[deck_name] = dict()
+            self._changed = True
 
         # options menu settings
         self._set_default(deck_name, "decks", "show_answer_before_next", False)
@@ -265,22 +556,26 @@ class OptionStore:
         self._set_default(deck_name, "decks", "true_random", False)
         self._set_default(deck_name, "decks", "revisit_mistakes", True)
         self._set_default(deck_name, "decks", "revisit_steps", 2)
+        self._set_default(deck_name, "decks", "revisit_spacing", 3)
         self._set_default(deck_name, "decks", "play_sounds", True)
+        self._set_default(deck_name, "decks", "sound_volume", 100)
+        # write timings to user_files/ when practice closes (no UI option)
+        self._set_default(deck_name, "decks", "dump_stats", False)
         # self._set_default(deck_name, "decks", "sort", None)
+        # [field, reverse] pairs, see sorting.sort_spec()
+        self._set_default(deck_name, "decks", "sort_keys", list())
         self._set_default(deck_name, "decks", "field_settings", dict())
 
-        self.save()
-
     def _write_list_defaults(self, deck_name: str):
         """Internal function to write list defaults. Called by
         write_all_defaults()."""
         c = self.config["list"]
         if deck_name not in c:
             c[deck_name] = dict()
+            self._changed = True
 
         self._set_default(deck_name, "list", "columns", list())
         self._set_default(deck_name, "list", "front", list())
-        self.save()
 
     def _write_homework_defaults(self, deck_name: str):
         """Internal function to write homework defaults. Called by
@@ -288,6 +583,7 @@ class OptionStore:
         c = self.config["homework"]
         if deck_name not in c:
             c[deck_name] = dict()
+            self._changed = True
 
         # Multiple choice defaults
         self._set_default(deck_name, "homework", "choice_confirm_answer",
@@ -301,8 +597,11 @@ class OptionStore:
         # Write the answer defaults
         self._set_default(deck_name, "homework", "write_show_keyboard", False)
         self._set_default(deck_name, "homework", "write_keyboard_type", 0)
+        # 0: off, 1: romaji to hiragana, 2: romaji to katakana, see kana.py
+        self._set_default(deck_name, "homework", "write_romaji_input", 0)
         self._set_default(deck_name, "homework", "write_question_size", 30)
-        self.save()
+        # typos allowed in an answer that is still correct, see answers.py
+        self._set_default(deck_name, "homework", "write_max_typos", 0)
 
     def _write_test_defaults(self, deck_name: str):
         """Internal function to write test defaults. Called by
@@ -310,8 +609,7 @@ class OptionStore:
         c = self.config["test"]
         if deck_name not in c:
             c[deck_name] = dict()
-
-        self.save()
+            self._changed = True
 
     def _set_default(self, deck_name: str, cat: str, name: str, val: Any):
         """Internal function to write an individual default."""
@@ -321,3 +619,4 @@ class OptionStore:
             self.config[cat][deck_name] = dict()
         if name not in self.config[cat][deck_name]:
             self.config[cat][deck_name][name] = val
+            self._changed = True
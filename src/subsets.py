@@ -6,8 +6,14 @@ Subsets module. Used for creating subsets of the deck, these get passed
 to either the List or the Homework UI for picking cards.
 """
 from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import weakref
 from .stores import NotecardStore
 
+if TYPE_CHECKING:
+    from .history import CardStats, HistoryStore
+
 
 class Subset:
     """Parent class for subset.
@@ -201,6 +207,128 @@ class LapsedSubset(Subset):
         return len(self.arr) // self.lesson_size
 
 
+class WeakestSubset(Subset):
+    """Cards that had mistakes in AnkiBuddy practice, weakest first: by
+    their error rate, faded by the time since their last answer (see
+    history.CardStats.weakness()). See Subset.
+
+    The stats are kept up to date as answers are recorded in the practice
+    history, so the subset is not rebuilt when the wizard opens: use
+    WeakestSubset.get() for the subset of a notecard store. The history
+    only holds the subset's listener weakly: it is removed when the subset
+    is replaced or garbage collected (see detach()).
+    """
+    _instances = weakref.WeakKeyDictionary()  # NotecardStore -> subset
+
+    @classmethod
+    def get(cls, notecard_store: NotecardStore, history: HistoryStore,
+            lesson_size: int = 20) -> WeakestSubset:
+        """Get the subset of a notecard store, creating it on first use.
+
+        Args:
+            notecard_store (NotecardStore): instance of notecard store to pull
+                notecards from.
+            history (HistoryStore): practice history to rank cards by.
+            lesson_size (int, optional): how many cards are in a group.
+                Defaults to 20.
+
+        Returns:
+            WeakestSubset: Subset of the notecard store.
+        """
+        subset = cls._instances.get(notecard_store)
+        if (subset is None or subset.history is not history
+                or subset.sort_order != notecard_store.sort_order):
+            if subset is not None:
+                subset.detach()
+            subset = cls(notecard_store, history, lesson_size)
+            cls._instances[notecard_store] = subset
+        subset.lesson_size = lesson_size
+        return subset
+
+    def __init__(self, notecard_store: NotecardStore, history: HistoryStore,
+                 lesson_size: int = 20):
+        """Initializes subset with the error rates of the cards in the
+        notecard store, and starts listening for new answers.
+
+        Args:
+            notecard_store (NotecardStore): instance of notecard store to pull
+                notecards from.
+            history (HistoryStore): practice history to rank cards by.
+            lesson_size (int, optional): how many cards are in a group.
+                Defaults to 20.
+        """
+        # weak, or _instances (keyed by the store) would keep it alive
+        self.notecard_store = weakref.proxy(notecard_store)
+        self.history = history
+        self.lesson_size = lesson_size
+        # indices below are only valid for this order of the store
+        self.sort_order = notecard_store.sort_order
+        # card id -> index in the notecard store
+        self._index = {
+            card.id: i for i, card in enumerate(notecard_store.notecards)
+        }
+        self._stats: dict[int, CardStats] = {}  # index -> stats, if missed
+        for card_id, i in self._index.items():
+            stats = history.card_stats(card_id)
+            if stats.error > 0:
+                self._stats[i] = stats
+        self._arr = None  # sorted self._stats keys, None if outdated
+
+        # listener that doesn't keep the subset (and its store) alive
+        on_answer = weakref.WeakMethod(self._on_answer)
+
+        def listener(card_id: int, stats: CardStats):
+            method = on_answer()
+            if method is not None:
+                method(card_id, stats)
+        history.answer_recorded.append(listener)
+        self._detach = weakref.finalize(
+            self, history.answer_recorded.remove, listener)
+
+    def detach(self):
+        """Stop listening for new answers. The subset's stats aren't
+        updated anymore."""
+        self._detach()
+
+    def _on_answer(self, card_id: int, stats: CardStats):
+        """Internal method, listener for HistoryStore.answer_recorded."""
+        i = self._index.get(card_id)
+        if i is not None and (stats.error > 0 or i in self._stats):
+            self._stats[i] = stats
+            self._arr = None
+
+    @property
+    def arr(self) -> list[int]:
+        """Indices of the cards with mistakes, weakest first."""
+        if self._arr is None:
+            self._arr = sorted(
+                self._stats,
+                key=lambda i: (self._stats[i].weakness_key(),
+                               self._stats[i].error),
+                reverse=True
+            )
+        return self._arr
+
+    def get_subset_name(self) -> str:
+        """See super-class."""
+        return "Weakest"
+
+    def get_cards(self, index: int) -> list[int]:
+        """See super-class."""
+        return self.arr[
+            self.lesson_size
+            * index:min((self.lesson_size * (index + 1)), len(self.arr))
+        ]
+
+    def get_all_cards(self) -> list[int]:
+        """See super-class."""
+        return self.arr
+
+    def get_max_index(self) -> int:
+        """See super-class."""
+        return len(self.arr) // self.lesson_size
+
+
 class NewSubset(Subset):
     """New cards that haven't been learned yet in the Anki review.
     See subset.
@@ -0,0 +1,7 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+"""
+Version of the add-on. Kept in its own module so that __init__.py can print
+it without importing the rest of the add-on.
+"""
+ADDON_VERSION = "1.0.0"
@@ -17,6 +17,7 @@ from aqt.qt import (
     QMenu,
     QAction,
     QCloseEvent,
+    QFont,
     Qt
 )
 
@@ -224,7 +225,9 @@ class HomeworkView(QWidget):
 
         self.ui.toolButton.setMenu(self.info_menu)
 
-        self.model.info_update.connect(self.info_update_handler)
+        self.model.time_update.connect(self.time_update_handler)
+        self.model.score_update.connect(self.score_update_handler)
+        self.model.coverage_update.connect(self.coverage_update_handler)
         self.model.answer_pane_update.connect(self.answer_pane_handler)
         self.model.new_question_update.connect(self.new_question_handler)
 
@@ -236,40 +239,53 @@ class HomeworkView(QWidget):
         Args:
             event (QCloseEvent): Qt's close event
         """
+        self.model.finish()
+        self.controller.dump_stats()
         dial = SummaryDialog()
         dial.load(self.model)
         dial.show()
 
-    def info_update_handler(self):
-        """Update progress summary with information from the model
-        such as time and score.
+    def time_update_handler(self, seconds: int):
+        """Update the clock, and close the practice when the time is up.
         This is connected to a signal from the model.
+
+        Args:
+            seconds (int): Seconds to display.
+        """
+        if self.model.stop:
+            self.ui.labelRight.setText("Time's Up!")
+            # TODO: instead of self.close(), pause the screen
+            self.close()
+            return
+
+        self.ui.labelRight.setText(
+            ("-" if self.model.timed_mode > 0 else "") + _sec2Time(seconds)
+        )
+
+    def score_update_handler(self, correct: int, answered: int):
+        """Update the score and accuracy in the progress summary.
+        This is connected to a signal from the model.
+
+        Args:
+            correct (int): Number of correct answers.
+            answered (int): Number of answers.
         """
         self.correctAction.setText(
-            "Score: "
-            + "{}/{}".format(
-                self.model.total_correct, self.model.total_answered)
+            "Score: " + "{}/{}".format(correct, answered)
         )
         self.accuracyAction.setText(
             "Accuracy: "
-            + "{:d}%".format(
-                int(100 * self.model.total_correct / max(
-                    1, self.model.total_answered))
-            )
-        )
-        self.cardsAction.setText(
-            "{} cards visited".format(len(self.model.card_history))
+            + "{:d}%".format(int(100 * correct / max(1, answered)))
         )
 
-        self.ui.labelRight.setText(
-            ("-" if self.model.timed_mode > 0 else "")
-            + _sec2Time(self.model.time)
-        )
+    def coverage_update_handler(self, cards: int):
+        """Update the number of unique cards in the progress summary.
+        This is connected to a signal from the model.
 
-        if self.model.stop:
-            self.ui.labelRight.setText("Time's Up!")
-            # TODO: instead of self.close(), pause the screen
-            self.close()
+        Args:
+            cards (int): Number of unique cards visited.
+        """
+        self.cardsAction.setText("{} cards visited".format(cards))
 
     # CORRECT: 0 = wrong, 1 = right, 2 = show answer
     def answer_pane_handler(self, show_pane: bool, correct: int):
@@ -357,11 +373,29 @@ class SummaryDialog(QDialog, Ui_Summary):
             )
         )
         self.cardsLabel.setText("{} cards".format(len(hwmodel.card_history)))
-        if hwmodel.timed_mode > 0:
-            self.timeLabel.setText(
-                _sec2Time(hwmodel.timed_mode * 60 - hwmodel.time))
+        if hwmodel.true_random:
+            self.coverageLabel.setText("-- (True Random)")
         else:
-            self.timeLabel.setText(_sec2Time(hwmodel.time))
+            self.coverageLabel.setText(
+                "{:d}% of pass {}".format(
+                    int(100 * hwmodel.sampler.coverage()),
+                    hwmodel.sampler.epoch + 1)
+            )
+        self.timeLabel.setText(_sec2Time(int(hwmodel.clock.elapsed())))
+
+        # timings, see instrumentation.py
+        answer_time = hwmodel.stats.stage("answer")
+        if answer_time:
+            self.answerTimeLabel.setText(
+                "{:.1f}s median, {:.1f}s p95".format(
+                    answer_time.percentile(50), answer_time.percentile(95))
+            )
+        font = self.statsText.font()
+        font.setFamily("monospace")
+        font.setStyleHint(QFont.Monospace)
+        self.statsText.setFont(font)
+        self.statsText.setPlainText(
+            "Timings (ms)\n" + hwmodel.stats.format_table())
 
     def show(self):
         """Override show() dialog behavior in favor of a modal dialog."""
@@ -15,8 +15,8 @@ from aqt.qt import (
     QKeyEvent,
     QSize,
 )
-from aqt.sound import av_player
-import re
+from ..const import audio
+from ..render import RenderRecord, find_sound
 
 
 class AnswerButton(QPushButton):
@@ -67,14 +67,24 @@ class AnswerButton(QPushButton):
         """
         self.sound = None
         self._isSound = False
-        m = re.search("\[sound:[\w.\-]{0,}\]", text)
-        if m:
+        if text is None:
+            return
+        self._show_sound(find_sound(text))
+
+    def _show_sound(self, sound: str):
+        """Internal method to replace the text with the Play button if there
+        is a sound file, and set the button to play it when clicked.
+
+        Args:
+            sound (str): Sound file name, or None.
+        """
+        if sound:
             self.__lbl.setText(
                 "Play  <a href='#' style='color: #32a3fa;"
                 + "text-decoration: none;'>▶</a>"
             )
 
-            self.sound = m.group(0)[7:-1]
+            self.sound = sound
             self._isSound = True
 
     def setText(self, text: str):
@@ -88,15 +98,35 @@ class AnswerButton(QPushButton):
         self.handle_sound(text)
         self.updateGeometry()
 
+    def set_record(self, record: RenderRecord):
+        """Set the text of the button from a rendered field, without parsing
+        it again. See render.RenderRecord.
+
+        Args:
+            record (RenderRecord): Rendered field.
+        """
+        self.__lbl.setText(record.text)
+        self.sound = None
+        self._isSound = False
+        self._show_sound(record.sound)
+        self.updateGeometry()
+
     def set_sound(self, sound_field_text: str):
         """Set the button's sound, based on the text.
 
         Args:
             sound_field_text (str): Sound button
         """
-        m = re.search("\[sound:[\w.\-]{0,}\]", sound_field_text)
-        if m:
-            self.sound = m.group(0)[7:-1]
+        self.set_sound_file(find_sound(sound_field_text))
+
+    def set_sound_file(self, sound: str):
+        """Set the button's sound file.
+
+        Args:
+            sound (str): Sound file name. Does nothing if None.
+        """
+        if sound:
+            self.sound = sound
             self._isSound = True
 
     def is_sound(self) -> bool:
@@ -131,5 +161,5 @@ class AnswerButton(QPushButton):
         playing sounds.
         """
         if self._isSound:
-            av_player.play_file(self.sound)
+            audio.play_file(self.sound)
         super().mousePressEvent(event)
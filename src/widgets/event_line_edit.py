@@ -5,25 +5,85 @@
 Contains the event line edit widget, which gets used in the
 Write the Answer layout so that the parent layout can get IME
 events when it is focused, for the virtual keyboard.
+
+It can also convert romaji to kana as the user types (see
+set_romaji_input()), for users without a Japanese IME.
 """
+from __future__ import annotations
+from typing import Optional
+
 from aqt.qt import (
+    Qt,
     QLineEdit,
     QKeyEvent,
     QInputMethodEvent,
 )
 
+from ..kana import RomajiConverter
+
 
 class EventLineEdit(QLineEdit):
     """Line edit that passes events to its parent.
     """
+    romaji: Optional[RomajiConverter] = None
+
+    def set_romaji_input(self, converter: Optional[RomajiConverter]):
+        """Convert typed romaji to kana, or stop converting.
+
+        Args:
+            converter (Optional[RomajiConverter]): Converter, e.g.
+                RomajiConverter(katakana=True), or None to stop.
+        """
+        self.romaji = converter
+
+    def flush_romaji(self):
+        """Convert the pending romaji before the cursor, e.g. a final "n",
+        before the text is read."""
+        if self.romaji is None:
+            return
+        if self._romaji_synced():
+            self._apply(*self.romaji.flush())
+        else:
+            self.romaji.reset()
+
     def keyPressEvent(self, event: QKeyEvent):
-        """Pass key press event to parent."""
+        """Pass key press event to parent, and convert romaji."""
         if self.parentWidget():
             self.parentWidget().keyPressEvent(event)
-        super().keyPressEvent(event)
+        text = event.text()
+        if self.romaji is None or not text:
+            super().keyPressEvent(event)
+        elif (len(text) == 1 and text.isprintable()
+              and not self.hasSelectedText()
+              and not event.modifiers() & (Qt.ControlModifier
+                                           | Qt.AltModifier)):
+            if not self._romaji_synced():
+                self.romaji.reset()
+            self._apply(*self.romaji.feed(text))
+        else:  # e.g. return or backspace, end the pending spelling first
+            self.flush_romaji()
+            super().keyPressEvent(event)
 
     def inputMethodEvent(self, event: QInputMethodEvent):
         """Pass IME event to parent."""
         if self.parentWidget():
             self.parentWidget().inputMethodEvent(event)
         super().inputMethodEvent(event)
+
+    def _romaji_synced(self) -> bool:
+        """Internal function, whether the pending romaji is still right
+        before the cursor (the text wasn't edited by other means, like
+        clicking or the virtual keyboard)."""
+        pending = self.romaji.pending
+        if not pending:
+            return True
+        cursor = self.cursorPosition()
+        return self.text()[max(0, cursor - len(pending)):cursor] == pending
+
+    def _apply(self, removed: int, added: str):
+        """Internal function, replace the removed characters before the
+        cursor with the added text (see RomajiConverter.feed())."""
+        if removed:
+            cursor = self.cursorPosition()
+            self.setSelection(cursor - removed, removed)
+        self.insert(added)
@@ -14,8 +14,9 @@ from aqt.qt import (
     QFont,
 )
 from aqt.webview import AnkiWebView
-from aqt.sound import av_player
-import re
+from ..furigana import to_ruby
+from ..const import audio
+from ..render import RenderRecord, handle_cloze, render_field
 
 
 class QuestionLabel(AnkiWebView):
@@ -47,7 +48,7 @@ class QuestionLabel(AnkiWebView):
     def sound_req(self, inp):
         """Handle button clicks."""
         if inp == "playsound" and self.sound:
-            av_player.play_file(self.sound)
+            audio.play_file(self.sound)
 
     def setText(self, text):
         """Override QLabel setText() to handle sound tags.
@@ -63,9 +64,17 @@ class QuestionLabel(AnkiWebView):
         Args:
             text (str): Text (or sound tag) for the label to handle.
         """
-        self._text = text
+        self.set_record(render_field(text))
+
+    def set_record(self, record: RenderRecord):
+        """Same as setText(), but from a field that is already rendered, e.g.
+        from the notecard store's render cache. See render.RenderRecord.
+
+        Args:
+            record (RenderRecord): Rendered field.
+        """
+        self._text = record.text
 
-        m = re.search("\[sound:[\w.\-]{0,}\]", text)
         style_string = (
             "style='position: absolute; top: 50%; width: 95%;"
             + "transform:translateY(-50%); margin: 0 auto; text-align: center;"
@@ -84,8 +93,8 @@ class QuestionLabel(AnkiWebView):
 
         """
         content = "<span></span>"
-        if m:
-            self.sound = m.group(0)[7:-1]
+        if record.sound:
+            self.sound = record.sound
             self._isSound = True
             content = (
                 "<a href='#' onclick='pycmd(\"playsound\")'; "
@@ -93,13 +102,10 @@ class QuestionLabel(AnkiWebView):
                 + "font-size: 35px;'><span style='color: #fff;'>"
                 + "Play </span>▶</a>"
             )
-            av_player.play_file(self.sound)
+            audio.play_file(self.sound)
         else:
-            # super().setText(text)
-            text = self.handle_cloze(text)
-            text = self.handle_furigana(text)
             # html_out = "<p "+style_string+">"+text+"</p>"
-            content = text
+            content = record.html
         self.stdHtml(
             html_out.replace("$(stylestring)", style_string).replace(
                 "$(content)", content
@@ -115,66 +121,10 @@ class QuestionLabel(AnkiWebView):
         pass
 
     def handle_furigana(self, text):
-        """Replace bracket notation in the parent label with html ruby tags."""
-
-        if "[" not in text:
-            return text
-        to_replace = []
-        # is_kanji = lambda char: u'\u3400'<= char <= u'\u4DB5' or \
-        #    u'\u4E00' <= char <= u'\u9FCB' or u'\uF900' <= char <= u'\uFA6A'
-        is_kanji = True
-        line = (
-            "<ruby style='display: inline-flex; flex-direction:"
-            + "column-reverse;'><rb style='line-height: 1;"
-            + "display: inline;'>{}</rb><rt style="
-            + "'line-height: 1; display: inline;'>{}</rt></ruby>"
-        )
-
-        for word in text.split(" "):
-            is_furi = False
-            furi_start = -1
-            furi_end = -1
-            for i in range(len(word)):
-                is_br = word[i] == "["
-                if is_br:
-                    for j in range(i + 1, len(word)):
-                        if word[j] == "]":
-                            is_furi = True
-                            furi_start = i + 1
-                            furi_end = j
-                            break
-                    # if it didn't find the end bracket,
-                    # it doesn't exist in this word,
-                    # so just move onto the next.
-                    break
-
-            if not is_furi or furi_start < 0 or furi_end < 0:
-                continue
-
-            # check backwards for the start of the kanji
-            rkanj_str = ""
-            t = i - 1
-
-            while is_kanji(word[t]) and t > -1:
-                print(word[t])
-                rkanj_str += word[t]
-                t -= 1
-
-            if len(rkanj_str) < 1:
-                continue
-            print("replacing with furigana")
-            to_replace.append(
-                (
-                    word[t + 1:furi_end + 1],
-                    line.format(rkanj_str[::-1], word[furi_start:furi_end]),
-                )
-            )
-
-        for group in to_replace:
-            text = text.replace(group[0], group[1])
-
-        return text
+        """Replace bracket notation in the parent label with html ruby tags.
+        See furigana.to_ruby()."""
+        return to_ruby(text)
 
     def handle_cloze(self, text):
         """Handles Core2k's cloze format."""
-        return text.replace("（　）", "____")
+        return handle_cloze(text)
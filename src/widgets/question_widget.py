@@ -20,6 +20,7 @@ from typing import Any
 from aqt.qt import QWidget, pyqtSignal, QKeyEvent
 from ..stores import Notecard
 from ..models import HomeworkModel
+from ..render import RenderRecord
 
 
 class QuestionWidget(QWidget):
@@ -100,6 +101,19 @@ class QuestionWidget(QWidget):
         font.setPointSize(size)
         ele.setFont(font)
 
+    def render(self, card: Notecard, field_name: str) -> RenderRecord:
+        """Helper method to get a rendered field of a card from the notecard
+        store's render cache.
+
+        Args:
+            card (Notecard): Card to get the field of.
+            field_name (str): Field name.
+
+        Returns:
+            RenderRecord: Rendered field, see render.RenderRecord.
+        """
+        return self.model.note_store.render.get(card, field_name)
+
     def handle_field_sound(self, ele: QWidget, field_name: str,
                            card: Notecard):
         """Helper method to handle fields that should have an audio that is
@@ -110,7 +124,7 @@ class QuestionWidget(QWidget):
         This is for non-audio fields to have an extra audio that accompanies
         them.
 
-        Note: Assumes QWidget has been extended to include a set_sound()
+        Note: Assumes QWidget has been extended to include a set_sound_file()
         method. This is certainly bad practice, # TODO: create a superclass to
         use for widgets that support this.
 
@@ -125,7 +139,7 @@ class QuestionWidget(QWidget):
         if field_name in field_opts:
             audio_name = field_opts[field_name][2]
             if audio_name in card.fields:
-                ele.set_sound(card.fields[audio_name])
+                ele.set_sound_file(self.render(card, audio_name).sound)
 
     def on_key(self, event: QKeyEvent):
         """Handle key events that get passed from this widget's parent.
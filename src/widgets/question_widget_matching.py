@@ -14,7 +14,6 @@ from .answer_button import AnswerButton
 
 from aqt.qt import QVBoxLayout, QGridLayout, Qt, QMouseEvent
 
-import random
 from ..style import button_style, button_style_custom_border
 
 
@@ -44,14 +43,15 @@ class MatchingWidget(QuestionWidget):
         self.size = len(self.options["questions"])
 
         self.order = [i for i in range(self.size)]
-        random.shuffle(self.order)
+        self.model.rng.shuffle(self.order)
 
         # assume len(questions) = len(answers)
         self.l_buttons = []
         self.r_buttons = []
         for i in range(self.size):
-            buttonL = AnswerButton(text=self.options["questions"][i],
-                                   parent=self)
+            buttonL = AnswerButton(parent=self)
+            buttonL.set_record(self.render(self.options["cards"][i],
+                                           self.options["question_field"]))
             buttonL.clicked.connect(lambda ch, i=i: self.left_callback(i))
             buttonL.setStyleSheet(button_style)
             buttonL.setAutoDefault(False)
@@ -69,9 +69,10 @@ class MatchingWidget(QuestionWidget):
             self.l_buttons.append(buttonL)
             self.left_layout.addWidget(self.l_buttons[i])
 
-            buttonR = AnswerButton(
-                text=self.options["answers"][self.order[i]], parent=self
-            )
+            buttonR = AnswerButton(parent=self)
+            buttonR.set_record(self.render(
+                self.options["cards"][self.order[i]],
+                self.options["answer_field"]))
             buttonR.clicked.connect(lambda ch, i=i: self.right_callback(i))
             buttonR.setStyleSheet(button_style)
             buttonR.setAutoDefault(False)
@@ -205,7 +206,7 @@ class MatchingWidget(QuestionWidget):
 
             # pick a color
             def r():
-                return random.randint(0, 255)
+                return self.model.rng.randint(0, 255)
 
             # try to avoid similar colors...
             def d(col1, col2, i):  # square dist fn
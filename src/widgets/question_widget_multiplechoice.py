@@ -39,7 +39,8 @@ class MultipleChoiceQuestionWidget(QuestionWidget):
             self.conf["choice_question_size"],
             self.options["question_field"],
         )
-        self.questionLabel.setText(self.options["question"])
+        self.questionLabel.set_record(self.render(
+            self.options["question_card"], self.options["question_field"]))
 
         self.vlayout.addWidget(self.questionLabel)
         self.gridLayout = QGridLayout()
@@ -51,7 +52,9 @@ class MultipleChoiceQuestionWidget(QuestionWidget):
         self.last_clicked = -1
         num_ans = len(self.options["answers"])
         for i in range(num_ans):
-            button = AnswerButton(text=self.options["answers"][i], parent=self)
+            button = AnswerButton(parent=self)
+            button.set_record(self.render(self.options["answer_cards"][i],
+                                          self.options["answer_field"]))
             button.setStyleSheet(button_style)
             # self.set_font_size(button, self.conf["choice_answer_size"])
             self.handle_font(
@@ -14,7 +14,9 @@ from .question_widget import QuestionWidget
 from .event_line_edit import EventLineEdit
 from .question_label import QuestionLabel
 
-from ..keyboards import KeyboardView, KB_JAPANESE_HIRAGANA
+from ..keyboards import get_keyboard
+from ..answers import grade
+from ..kana import RomajiConverter
 
 from aqt.qt import (
     QVBoxLayout,
@@ -26,7 +28,6 @@ from aqt.qt import (
     QKeyEvent,
     QInputMethodEvent,
 )
-from aqt import mw
 
 from ..style import confirm_button_style
 
@@ -53,7 +54,8 @@ class WriteTheAnswerWidget(QuestionWidget):
             self.conf["write_question_size"],
             self.options["question_field"],
         )
-        self.questionLabel.setText(self.options["question"])
+        self.questionLabel.set_record(self.render(
+            self.options["card"], self.options["question_field"]))
         # self.questionLabel.setAlignment(Qt.AlignCenter)
         # self.questionLabel.setTextFormat(Qt.RichText)
 
@@ -85,16 +87,18 @@ class WriteTheAnswerWidget(QuestionWidget):
         self.layout.addWidget(self.questionLabel)
         self.layout.addLayout(self.ansLayout)
         self.ansBox.setFocusPolicy(Qt.StrongFocus)
+        # 1: romaji to hiragana, 2: romaji to katakana, see kana.py
+        self.romaji_input = self.conf["write_romaji_input"]
+        if self.romaji_input:
+            self.ansBox.set_romaji_input(
+                RomajiConverter(katakana=self.romaji_input == 2))
         self.show_keyboard = self.conf["write_show_keyboard"]
         if self.show_keyboard:
-            if not hasattr(mw, "_bKeyboard"):
-                if self.conf["write_keyboard_type"] == 0:
-                    mw._bKeyboard = KeyboardView(
-                        translation=KB_JAPANESE_HIRAGANA)
-
-            if not mw._bKeyboard.isVisible():
-                mw._bKeyboard.showNormal()
-            mw._bKeyboard.link_field(self.ansBox)
+            # shared, built before the view (see QuestionsDialog.do_accept)
+            self.keyboard = get_keyboard(self.conf["write_keyboard_type"])
+            if not self.keyboard.isVisible():
+                self.keyboard.showNormal()
+            self.keyboard.link_field(self.ansBox)
 
         QTimer.singleShot(
             0, lambda: self.ansBox.setFocus()
@@ -102,10 +106,12 @@ class WriteTheAnswerWidget(QuestionWidget):
 
     def submit_callback(self):
         """Return was pressed or the submit button was pressed."""
-        text = self.ansBox.text()
-        self.questionAnswered.emit(
-            text.casefold() == self.options["answer"].casefold(), False
-        )
+        answers = self.model.note_store.answers.get(
+            self.options["card"], self.options["answer_field"])
+        self.ansBox.flush_romaji()
+        result = grade(answers, self.ansBox.text(),
+                       self.conf["write_max_typos"], bool(self.romaji_input))
+        self.questionAnswered.emit(result.correct, False)
 
     # sending key events to virtual keyboard to display key strokes
     def on_key(self, event: QKeyEvent):
@@ -113,13 +119,13 @@ class WriteTheAnswerWidget(QuestionWidget):
         if self.show_keyboard:
             # TODO: support caps shift etc
             if len(event.text()) > 0:
-                mw._bKeyboard.on_key(event.text())
+                self.keyboard.on_key(event.text())
 
     # sending ime events to virtual keyboard to display key strokes
     def inputMethodEvent(self, event: QInputMethodEvent):
         """Handle IME events."""
         if self.show_keyboard:
-            mw._bKeyboard.on_key(event.preeditString()[-1:])
+            self.keyboard.on_key(event.preeditString()[-1:])
 
     def keyPressEvent(self, event: QKeyEvent):
         """Handle key event.
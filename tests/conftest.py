@@ -0,0 +1,11 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Shared setup of the tests: the add-on is imported headlessly, with the
+fake Anki in tools/fakeanki (see fakeanki.load_addon_module()).
+"""
+import sys
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "tools"))
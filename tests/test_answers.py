@@ -0,0 +1,73 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of answers.py, with seeded random texts.
+"""
+import random
+
+import fakeanki
+
+answers = fakeanki.load_addon_module("answers")
+
+
+def _levenshtein(a: str, b: str) -> int:
+    """Full edit distance table, to check bounded_levenshtein()."""
+    prev = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        curr = [i]
+        for j, other in enumerate(b, 1):
+            curr.append(min(prev[j] + 1, curr[j - 1] + 1,
+                            prev[j - 1] + (char != other)))
+        prev = curr
+    return prev[-1]
+
+
+def test_bounded_levenshtein_matches_full_distance():
+    rng = random.Random(5)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randrange(9)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randrange(9)))
+        k = rng.randrange(5)
+        expected = min(_levenshtein(a, b), k + 1)
+        assert answers.bounded_levenshtein(a, b, k) == expected, (a, b, k)
+
+
+def test_split_alternates_outside_parentheses():
+    split = answers.split_alternates
+    assert split("a; b (c; d)、e") == ["a", " b (c; d)", "e"]
+    assert split("mountain") == ["mountain"]
+    assert split("(a; b") == ["(a; b"]  # unclosed, nothing is split
+    assert split("a) b; c") == ["a) b", " c"]  # stray ")" is ignored
+
+
+def test_accepted_answers():
+    text = "mountain (high); hill"
+    accepted = answers.accepted_answers(text, text)
+    assert {"mountain", "mountain (high)", "mountain high",
+            "hill"} <= accepted
+    assert "high" not in accepted
+
+
+def test_grade_typos():
+    accepted = frozenset(["mountain", "cat"])
+    assert answers.grade(accepted, " Mountain ").typos == 0
+    assert not answers.grade(accepted, "mountian").correct
+    grade = answers.grade(accepted, "mountian", max_typos=2)
+    assert (grade.correct, grade.typos, grade.closest) == (
+        True, 2, "mountain")
+    # one typo per CHARS_PER_TYPO characters of the answer
+    assert not answers.grade(accepted, "cta", max_typos=2).correct
+    assert not answers.grade(accepted, "mountxyz", max_typos=2).correct
+
+
+def test_grade_romaji():
+    accepted = answers.accepted_answers("切手", "きって")
+    assert not answers.grade(accepted, "kitte").correct
+    assert answers.grade(accepted, "kitte", romaji=True).correct
+    assert answers.grade(accepted, "キッテ").correct  # katakana folded
+    grade = answers.grade(accepted, "kite", max_typos=1, romaji=True)
+    assert not grade.correct  # きて is one typo, but きって is too short
+    accepted = answers.accepted_answers("こんにちは", "こんにちは")
+    grade = answers.grade(accepted, "konnichiwa", max_typos=1, romaji=True)
+    assert (grade.correct, grade.typos) == (True, 1)
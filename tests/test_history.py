@@ -0,0 +1,53 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of history.py, with the background writes run on a thread pool like
+Anki's task manager does.
+"""
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeanki
+
+fakeanki.install(fakeanki.FakeCollection.synthetic(size=10))
+history = fakeanki.load_addon_module("history")
+
+
+def test_writes_apply_in_order(tmp_path, monkeypatch):
+    pool = ThreadPoolExecutor(4)
+    second_started = threading.Event()
+    tasks = []
+
+    def run_in_background(task, on_done=None, args=None):
+        index = len(tasks)
+        tasks.append(task)
+
+        def run():
+            if index == 0:  # hold the first write until the second starts
+                second_started.wait(5)
+            else:
+                second_started.set()
+            return task()
+        future = pool.submit(run)
+        if on_done:
+            future.add_done_callback(on_done)
+        return future
+
+    monkeypatch.setattr(history.mw.taskman, "run_in_background",
+                        run_in_background)
+    store = history.HistoryStore(str(tmp_path))
+    store.record(1, True)
+    store.flush()
+    store.record(1, False)
+    store.flush()
+    store.record(1, True)
+    path = store.path
+    store.close()
+    pool.shutdown()
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT count(*) FROM answers").fetchone() == (3,)
+    assert db.execute("SELECT answered, correct FROM card_stats "
+                      "WHERE card = 1").fetchone() == (3, 2)
@@ -0,0 +1,55 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of kana.py.
+"""
+import fakeanki
+
+kana = fakeanki.load_addon_module("kana")
+
+
+def _type(converter, text: str) -> str:
+    """Feed text one character at a time, applying the edits like a line
+    edit does."""
+    typed = ""
+    for char in text:
+        removed, added = converter.feed(char)
+        typed = typed[:len(typed) - removed] + added
+    return typed
+
+
+def test_romaji_to_kana():
+    cases = {
+        "onna": "おんな",
+        "sannpo": "さんぽ",
+        "kitte": "きって",
+        "annnai": "あんない",
+        "konnichiha": "こんにちは",
+        "matcha": "まっちゃ",
+        "kan'i": "かんい",
+    }
+    for romaji, expected in cases.items():
+        assert kana.romaji_to_kana(romaji) == expected, romaji
+    assert kana.romaji_to_kana("kitte", katakana=True) == "キッテ"
+
+
+def test_converter_edits():
+    converter = kana.RomajiConverter()
+    assert converter.feed("k") == (0, "k")
+    assert converter.feed("a") == (1, "か")
+    assert _type(converter, "kitte") == "きって"
+    assert converter.pending == ""
+
+
+def test_flush_final_n():
+    converter = kana.RomajiConverter()
+    assert _type(converter, "hon") == "ほn"
+    assert converter.flush() == (1, "ん")
+    assert converter.pending == ""
+    # "nn" is ん already, the second "n" is dropped
+    assert _type(converter, "honn") == "ほんn"
+    assert converter.flush() == (1, "")
+    # other incomplete spellings stay romaji
+    assert _type(converter, "ky") == "ky"
+    assert converter.flush() == (2, "ky")
@@ -0,0 +1,57 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of migrations.py, on configs written before the schema version was
+added.
+"""
+import fakeanki
+
+migrations = fakeanki.load_addon_module("migrations")
+migrate = migrations.migrate
+
+
+def _old_config():
+    return {
+        "decks": {"Synthetic": {"sort": "Front"}, "Empty": {"sort": None}},
+        "list": {},
+        "homework": {},
+        "test": {},
+    }
+
+
+def test_migrate_old_config():
+    config = _old_config()
+    assert migrate(config, "1.0")
+    assert config["schema_version"] == migrations.SCHEMA_VERSION
+    assert config["version"] == "1.0"
+    assert config["decks"]["Synthetic"]["sort_keys"] == [["Front", False]]
+    assert "sort_keys" not in config["decks"]["Empty"]
+    assert not migrate(config, "1.0")  # up to date, nothing to save
+
+
+def test_migrate_keeps_sort_keys():
+    config = _old_config()
+    config["decks"]["Synthetic"]["sort_keys"] = [["Back", True]]
+    migrate(config, "1.0")
+    assert config["decks"]["Synthetic"]["sort_keys"] == [["Back", True]]
+
+
+def test_migrate_newer_config():
+    config = {"schema_version": migrations.SCHEMA_VERSION + 1,
+              "version": "9.0"}
+    assert migrate(config, "1.0")  # only the add-on version changes
+    assert config["schema_version"] == migrations.SCHEMA_VERSION + 1
+
+
+def test_installed_old_config_is_migrated():
+    # getConfig() merges the config.json defaults over the stored config,
+    # like Anki does, so a default schema_version would skip migrations
+    mw = fakeanki.install(config=_old_config())
+    fakeanki.unload_addon()
+    const = fakeanki.load_addon_module("const")
+    stored = mw.addonManager.configs[fakeanki.ADDON_PACKAGE]
+    assert stored["schema_version"] == migrations.SCHEMA_VERSION
+    assert stored["decks"]["Synthetic"]["sort_keys"] == [["Front", False]]
+    assert const.options.config["schema_version"] == stored["schema_version"]
+    fakeanki.unload_addon()
@@ -0,0 +1,57 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of practice.py, on a deck of two note types: 50 synthetic notes and
+2 kanji notes.
+"""
+import random
+
+import pytest
+
+import fakeanki
+
+col = fakeanki.FakeCollection.synthetic(size=50)
+did = col.decks.current()["id"]
+kanji_mid = col._new_id()
+col.models.add("Kanji", kanji_mid, ["Kanji", "Reading"])
+col.add_note(kanji_mid, did, ["山", "やま"])
+col.add_note(kanji_mid, did, ["川", "かわ"])
+fakeanki.install(col)
+fakeanki.unload_addon()  # use this collection in the add-on's modules
+
+const = fakeanki.load_addon_module("const")
+practice = fakeanki.load_addon_module("practice")
+store = const.notecards.get(did)
+
+
+def _template(type_ind: int, question: str, answer: str, **options):
+    names = ["Multiple Choice", "Matching", "Write the Answer"]
+    return dict(type_ind=type_ind, type=names[type_ind], question=question,
+                answer=answer, include_reverse=False, **options)
+
+
+def _session(templates):
+    return practice.PracticeSession(store, templates, const.options,
+                                    rng=random.Random(4))
+
+
+def test_template_needs_enough_cards():
+    kanji_choice = _template(0, "Kanji", "Reading", number_choices=4)
+    kanji_matching = _template(1, "Kanji", "Reading", groupsize=3,
+                               extrabank=0)
+    for templ in (kanji_choice, kanji_matching):
+        with pytest.raises(ValueError):
+            _session([templ])
+    assert _session([_template(2, "Kanji", "Reading")]).usable_templates
+
+
+def test_questions_skip_unusable_templates():
+    session = _session([
+        _template(0, "Kanji", "Reading", number_choices=4),
+        _template(0, "Front", "Back", number_choices=4),
+    ])
+    assert session.usable_templates == [1]
+    for _ in range(20):
+        session.load_new_question()
+        assert session.curr_question["question_field"] == "Front"
@@ -0,0 +1,146 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of schedulers.py, with seeded random sources.
+"""
+import random
+
+import fakeanki
+
+schedulers = fakeanki.load_addon_module("schedulers")
+RevisitScheduler = schedulers.RevisitScheduler
+CardSampler = schedulers.CardSampler
+
+
+def _tick(revisits: RevisitScheduler, steps: int):
+    for _ in range(steps):
+        revisits.tick()
+
+
+def test_revisit_waits_for_spacing():
+    revisits = RevisitScheduler(spacing=3)
+    rng = random.Random(1)
+    revisits.add(7, 1)
+    _tick(revisits, 2)
+    assert revisits.take(rng) is None
+    revisits.tick()
+    assert revisits.ready_count() == 1
+    assert revisits.take(rng) == 7
+
+
+def test_revisit_visit_decrements_and_reschedules():
+    revisits = RevisitScheduler(spacing=2)
+    rng = random.Random(2)
+    revisits.add(4, 2)
+    revisits.add(4, 1)  # added to the revisits left
+    assert revisits.count(4) == 3
+
+    _tick(revisits, 2)
+    assert revisits.take(rng) == 4
+    assert revisits.visit(4)
+    assert revisits.count(4) == 2
+    revisits.tick()
+    assert revisits.take(rng) is None  # spacing starts over
+    revisits.tick()
+    assert revisits.take(rng) == 4
+    assert revisits.visit(4)
+    _tick(revisits, 2)
+    assert revisits.take(rng) == 4
+    assert revisits.visit(4)
+    assert 4 not in revisits and len(revisits) == 0
+    assert not revisits.visit(4)
+
+
+def test_revisit_take_defers_unvisited_card():
+    revisits = RevisitScheduler(spacing=1)
+    rng = random.Random(3)
+    revisits.add(1, 1)
+    revisits.tick()
+    assert revisits.take(rng) == 1
+    assert revisits.take(rng) is None  # not offered twice for a question
+    revisits.tick()
+    assert revisits.take(rng) == 1  # back on the next question
+    assert revisits.count(1) == 1
+
+
+def test_revisit_take_order_is_seeded():
+    def order(seed: int) -> list:
+        revisits = RevisitScheduler(spacing=1)
+        rng = random.Random(seed)
+        for card_ind in range(10):
+            revisits.add(card_ind, 1)
+        revisits.tick()
+        taken = []
+        while revisits.ready_count():
+            taken.append(revisits.take(rng))
+        return taken
+
+    assert sorted(order(5)) == list(range(10))
+    assert order(5) == order(5)
+    assert order(5) != order(6)
+
+
+def test_revisit_takes_cards_in_due_order():
+    revisits = RevisitScheduler(spacing=2)
+    rng = random.Random(4)
+    revisits.add(1, 1)
+    revisits.tick()
+    revisits.add(2, 1)
+    revisits.tick()
+    assert revisits.take(rng) == 1  # card 2 is not due yet
+    revisits.visit(1)
+    revisits.tick()
+    assert revisits.take(rng) == 2
+
+
+def test_sampler_visits_each_card_once_per_epoch():
+    sampler = CardSampler(50, random.Random(7))
+    for epoch in range(3):
+        drawn = [sampler.draw() for _ in range(50)]
+        assert sorted(drawn) == list(range(50))
+        assert sampler.coverage() == 1.0
+        assert sampler.epoch == epoch
+
+
+def test_sampler_epoch_rollover():
+    sampler = CardSampler(5, random.Random(8))
+    for _ in range(5):
+        sampler.draw()
+    assert sampler.epoch == 0 and sampler.visited() == 5
+    sampler.draw()
+    assert sampler.epoch == 1 and sampler.visited() == 1
+
+
+def test_sampler_defer_and_release():
+    sampler = CardSampler(10, random.Random(9))
+    deferred = sampler.draw()
+    sampler.defer()
+    assert sampler.visited() == 0
+    drawn = {sampler.draw() for _ in range(9)}
+    assert deferred not in drawn  # not offered again for this question
+
+    # only the deferred card is left: an already visited card stands in
+    assert sampler.draw() in drawn
+    assert sampler.visited() == 9
+
+    sampler.release()
+    assert sampler.draw() == deferred  # still visited in this epoch
+    assert sampler.epoch == 0 and sampler.coverage() == 1.0
+
+
+def test_sampler_defer_without_draw_is_ignored():
+    sampler = CardSampler(3, random.Random(10))
+    sampler.draw()
+    sampler.defer()
+    sampler.defer()  # no draw since the last defer
+    assert sampler.visited() == 0 and sampler.end == 2
+
+
+def test_sampler_is_seeded():
+    def draws(seed: int) -> list:
+        sampler = CardSampler(20, random.Random(seed))
+        return [sampler.draw() for _ in range(60)]
+
+    assert draws(11) == draws(11)
+    assert draws(11) != draws(12)
@@ -0,0 +1,69 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Tests of sorting.py, on cards that only have fields.
+"""
+import random
+from types import SimpleNamespace
+
+import fakeanki
+
+sorting = fakeanki.load_addon_module("sorting")
+
+
+def _cards(values: list, field: str = "Field") -> list:
+    return [SimpleNamespace(fields={} if value is None else {field: value})
+            for value in values]
+
+
+def _sorted(values: list, reverse: bool = False) -> list:
+    column = sorting.ColumnKeys(_cards(values), "Field")
+    return [values[i] for i in column.permutation(reverse)]
+
+
+def test_kind_detection():
+    def kind(values):
+        return sorting.ColumnKeys(_cards(values), "Field").kind
+    assert kind(["3", "10", "-2"]) == "int"
+    assert kind(["1.5", "2", "1e3"]) == "float"
+    assert kind(["2022-08-05", "2021/01/02", "05.08.2022"]) == "date"
+    assert kind(["L2-10", "L2-9", "L10-1"]) == "natural"
+    assert kind(["<b>3</b>", "10", " 7 "]) == "int"  # html is stripped
+    # up to 1 - PARSE_MIN of the values may not parse
+    assert kind([str(i) for i in range(20)] + ["n/a"]) == "int"
+    assert kind([str(i) for i in range(5)] + ["n/a"]) == "natural"
+
+
+def test_natural_order():
+    values = ["L2-10", "l2-9", "L10-1", "L2-1", "L1"]
+    assert _sorted(values) == ["L1", "L2-1", "l2-9", "L2-10", "L10-1"]
+
+
+def test_numbers_and_dates_order():
+    assert _sorted(["10", "9", "-1", "100"]) == ["-1", "9", "10", "100"]
+    assert _sorted(["2022-08-05", "2021-12-31", "2022-01-01"],
+                   reverse=True) == ["2022-08-05", "2022-01-01",
+                                     "2021-12-31"]
+
+
+def test_unparsable_last():
+    values = ["3", None, "1", "", "x", "2"] + [str(i) for i in range(4, 20)]
+    order = _sorted(values)
+    assert order[:3] == ["1", "2", "3"]
+    assert order[-3:] == [None, "", "x"]
+    assert _sorted(values, reverse=True)[-3:] == [None, "", "x"]
+
+
+def test_stable_sort_keeps_order_of_equal_keys():
+    rng = random.Random(6)
+    values = [str(rng.randrange(5)) for _ in range(50)]
+    column = sorting.ColumnKeys(_cards(values), "Field")
+    order = list(range(len(values)))
+    rng.shuffle(order)
+    result = column.stable_sort(order)
+    assert sorted(result) == sorted(order)
+    for a, b in zip(result, result[1:]):
+        assert int(values[a]) <= int(values[b])
+        if values[a] == values[b]:
+            assert order.index(a) < order.index(b)
@@ -0,0 +1,460 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Benchmarks for the add-on's hot paths, run headlessly with fakeanki.
+
+Each case is timed with timeit at every deck size (cases that do not depend
+on the deck size run once). The best time per call is reported.
+Results can be saved as a JSON baseline, and later runs compared against
+it: the exit status is 1 if any case got slower than the threshold, or
+fails where the baseline didn't. To compare runs on machines of different
+speeds (or the same machine under a different load), every run also times
+a fixed pure Python workload (see calibrate()), and the baseline's times
+are scaled by the ratio of the two calibrations before comparing. Timing
+noise only makes cases slower, so the cases that look slower are timed
+again (see --retries), keeping their best time, before they count as
+regressions.
+
+The baseline of the current tree is committed as BASELINE, and the check
+before merging a change to a hot path is to compare against it (at the
+baseline's deck sizes, unless --sizes is given). Timings depend on the
+machine: save a baseline of the parent commit on your machine first if
+the committed one is from a much faster or slower one, and commit the new
+baseline with changes that make cases faster or add cases.
+
+Usage:
+    python tools/benchmark.py --compare  # against BASELINE
+    python tools/benchmark.py --save tools/benchmark_baseline.json
+    python tools/benchmark.py --sizes 1000,10000 --compare baseline.json
+    python tools/benchmark.py --cases furigana,list_to_csv
+"""
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+from os.path import abspath, dirname, join
+
+import fakeanki
+from simulate import make_templates
+
+BASELINE = join(dirname(abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# question type names, by template type_ind
+QUESTION_TYPES = ["multiple_choice", "matching", "write_answer"]
+
+
+class Context:
+    """Deck and add-on modules shared by the cases of one deck size."""
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.col = fakeanki.FakeCollection.synthetic(
+            size=size, fields=5, duplication=0.05, seed=seed)
+        self.mw = fakeanki.install(self.col)
+        fakeanki.unload_addon()
+        self.did = self.col.decks.current()["id"]
+
+        self.stores = fakeanki.load_addon_module("stores")
+        self.options = fakeanki.load_addon_module("const").options
+        self.store = self.stores.NotecardStore()
+        self.store.load(self.did)
+
+        list_config = self.options.get_list_config(self.store.deck_name)
+        list_config["columns"] = ["Front", "Back", "Sentence"]
+        list_config["front"] = [True, False, False]
+
+    def module(self, name: str) -> Any:
+        """Load an add-on module."""
+        return fakeanki.load_addon_module(name)
+
+
+def case_store_load(ctx: Context) -> Callable:
+    def run():
+        ctx.stores.NotecardStore().load(ctx.did)
+    return run
+
+
+def case_store_sort(ctx: Context) -> Callable:
+    # parses the field every time, see case_store_sort_cached
+    reverse = [False]
+
+    def run():
+        reverse[0] = not reverse[0]
+        ctx.store.sort_cache.clear()
+        ctx.store.sort("Index", reverse=reverse[0])
+    return run
+
+
+def case_store_sort_compound(ctx: Context) -> Callable:
+    # two keys, parsed every time
+    spec = (("Back", True), ("Index", False))
+
+    def run():
+        ctx.store.sort_cache.clear()
+        ctx.store.sort_by(spec)
+    return run
+
+
+def case_store_sort_cached(ctx: Context) -> Callable:
+    # switching between fields that were sorted by before
+    fields = ["Index", "Front"]
+    turn = [0]
+
+    def run():
+        turn[0] += 1
+        ctx.store.sort(fields[turn[0] % 2])
+    return run
+
+
+def _subset_case(class_name: str) -> Callable:
+    def case(ctx: Context) -> Callable:
+        subset_class = getattr(ctx.module("subsets"), class_name)
+
+        def run():
+            subset_class(ctx.store, 20)
+        return run
+    return case
+
+
+def _question_case(type_ind: int) -> Callable:
+    def case(ctx: Context) -> Callable:
+        models = ctx.module("models")
+        templates = make_templates([type_ind], 4, 5)
+        model = models.HomeworkModel(ctx.store, templates, ctx.options,
+                                     rng=random.Random(0))
+        return model.load_new_question
+    return case
+
+
+def case_furigana(ctx: Context) -> Callable:
+    widgets = ctx.module("widgets")
+    label = widgets.QuestionLabel(None)
+    # roughly a page of example sentences
+    text = " ".join(ctx.store.notecards[i].fields["Sentence"]
+                    for i in range(min(100, ctx.size)))
+
+    def run():
+        label.handle_furigana(text)
+    return run
+
+
+def case_furigana_uncached(ctx: Context) -> Callable:
+    to_ruby = ctx.module("furigana").to_ruby.__wrapped__
+    # long example sentences, one conversion each, like new questions
+    texts = [ctx.store.notecards[i].fields["Sentence"] * 4
+             for i in range(min(100, ctx.size))]
+
+    def run():
+        for text in texts:
+            to_ruby(text)
+    return run
+
+
+def case_render_prebuild(ctx: Context) -> Callable:
+    render = ctx.module("render")
+
+    def run():
+        render.RenderCache().prebuild(ctx.store.notecards,
+                                      ["Front", "Back", "Sentence", "Audio"])
+    return run
+
+
+def _list_case(method: str) -> Callable:
+    def case(ctx: Context) -> Callable:
+        models = ctx.module("models")
+        controllers = ctx.module("controllers")
+        model = models.ListModel(ctx.store, ctx.options)
+        return getattr(controllers.ListController(model), method)
+    return case
+
+
+def case_grade_answer(ctx: Context) -> Callable:
+    # typed answers with a typo, answers cached after the first round
+    answers = ctx.module("answers")
+    cards = ctx.store.notecards[:100]
+    typed = [card.fields["Back"][:-1] + "x" for card in cards]
+
+    def run():
+        for card, text in zip(cards, typed):
+            answers.grade(ctx.store.answers.get(card, "Back"), text, 2)
+    return run
+
+
+def case_romaji_input(ctx: Context) -> Callable:
+    # one converter fed a keystroke at a time, like the answer box
+    kana = ctx.module("kana")
+    keys = "watashihatoukyounisundeimasu. kitteha-nnbunn."
+
+    def run():
+        converter = kana.RomajiConverter()
+        for key in keys:
+            converter.feed(key)
+        converter.flush()
+    return run
+
+
+def case_keyboard_on_key(ctx: Context) -> Callable:
+    keyboards = ctx.module("keyboards")
+    keyboard = keyboards.KeyboardView(keyboards.KB_JAPANESE_HIRAGANA)
+    keys = [item[-1] for item in keyboards.KB_JAPANESE_HIRAGANA if item]
+
+    def run():
+        for key in keys:
+            keyboard.on_key(key)
+    return run
+
+
+def case_keyboard_set_layout(ctx: Context) -> Callable:
+    # relabeling instead of building a KeyboardView per layout
+    keyboards = ctx.module("keyboards")
+    keyboard = keyboards.KeyboardView(keyboards.KB_JAPANESE_HIRAGANA)
+    layouts = [translation for _, translation in keyboards.LAYOUTS]
+    turn = [0]
+
+    def run():
+        turn[0] += 1
+        keyboard.set_layout(layouts[turn[0] % len(layouts)])
+    return run
+
+
+def case_keyboard_build(ctx: Context) -> Callable:
+    keyboards = ctx.module("keyboards")
+
+    def run():
+        keyboards.KeyboardView(keyboards.KB_JAPANESE_HIRAGANA)
+    return run
+
+
+def _hook_case(bottom_bar: bool) -> Callable:
+    def case(ctx: Context) -> Callable:
+        hooks = ctx.module("hooks")
+        webview = sys.modules["aqt.webview"]
+        if bottom_bar:
+            context = sys.modules["aqt.overview"].OverviewBottomBar()
+        else:  # any of the other webviews Anki renders
+            context = sys.modules["aqt.overview"].Overview()
+
+        def run():
+            hooks._inject_overview(webview.WebContent(), context)
+        return run
+    return case
+
+
+# name -> (case, whether it depends on the deck size)
+CASES: dict[str, tuple[Callable, bool]] = {
+    "store_load": (case_store_load, True),
+    "store_sort": (case_store_sort, True),
+    "store_sort_cached": (case_store_sort_cached, True),
+    "store_sort_compound": (case_store_sort_compound, True),
+    "subset_linear": (_subset_case("LinearSubset"), True),
+    "subset_learned": (_subset_case("LearnedSubset"), True),
+    "subset_lapsed": (_subset_case("LapsedSubset"), True),
+    "subset_new": (_subset_case("NewSubset"), True),
+    "render_prebuild": (case_render_prebuild, True),
+    "list_to_csv": (_list_case("_to_csv"), True),
+    "list_to_txt": (_list_case("_to_txt"), True),
+}
+for _type_ind, _name in enumerate(QUESTION_TYPES):
+    CASES["question_" + _name] = (_question_case(_type_ind), True)
+CASES["furigana"] = (case_furigana, False)
+CASES["furigana_uncached"] = (case_furigana_uncached, False)
+CASES["grade_answer"] = (case_grade_answer, False)
+CASES["romaji_input"] = (case_romaji_input, False)
+CASES["keyboard_on_key"] = (case_keyboard_on_key, False)
+CASES["keyboard_build"] = (case_keyboard_build, False)
+CASES["keyboard_set_layout"] = (case_keyboard_set_layout, False)
+CASES["hook_overview_other"] = (_hook_case(False), False)
+CASES["hook_overview_bottom_bar"] = (_hook_case(True), False)
+
+
+def time_case(run: Callable, min_time: float, repeat: int) -> dict[str, Any]:
+    """Time a case with timeit.
+
+    Args:
+        run (Callable): Function to time.
+        min_time (float): Minimum time of one timing run, in seconds.
+        repeat (int): Number of timing runs.
+
+    Returns:
+        dict[str, Any]: Best seconds per call and number of calls per run.
+    """
+    timer = timeit.Timer(run)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed * 2 >= min_time else 10
+    times = [elapsed] + timer.repeat(repeat=max(0, repeat - 1),
+                                     number=number)
+    return {"seconds": min(times) / number, "number": number}
+
+
+def _calibration_workload():
+    words = [str(i * 7919 % 10007) for i in range(2000)]
+    index = {word: len(word) for word in words}
+    sorted(words, key=index.get)
+
+
+def calibrate(min_time: float, repeat: int) -> float:
+    """Time a fixed workload, to scale a baseline to the speed of this
+    run (see module docstring).
+
+    Returns:
+        float: Best seconds per call.
+    """
+    return time_case(_calibration_workload, min_time, repeat)["seconds"]
+
+
+def run_benchmarks(args: argparse.Namespace,
+                   keys: set[str] = None) -> dict[str, Any]:
+    """Run the selected cases at each deck size.
+
+    Args:
+        args (argparse.Namespace): Command line arguments.
+        keys (set[str], optional): Only run these results, see below.
+            Defaults to None, for all of them.
+
+    Returns:
+        dict[str, Any]: Results, keyed by "<case>@<size>" (or "<case>" for
+            cases that do not depend on the deck size).
+    """
+    results = {}
+    for num, size in enumerate(args.sizes):
+        ctx = None
+        for name in args.cases:
+            case, scaled = CASES[name]
+            if not scaled and num > 0:
+                continue
+            key = "%s@%d" % (name, size) if scaled else name
+            if keys is not None and key not in keys:
+                continue
+            if ctx is None:
+                ctx = Context(size, args.seed)
+            try:
+                results[key] = time_case(case(ctx), args.min_time,
+                                         args.repeat)
+            except Exception as e:
+                results[key] = {"error": "%s: %s" % (type(e).__name__, e)}
+            print_result(key, results[key], file=sys.stderr)
+    return results
+
+
+def print_result(key: str, result: dict[str, Any], baseline: dict = None,
+                 file: Any = sys.stdout):
+    """Print one line of results, with the change from the baseline."""
+    if "error" in result:
+        print("{:<36} {}".format(key, result["error"]), file=file)
+        return
+    line = "{:<36} {:>12.3f} us".format(key, result["seconds"] * 1e6)
+    if baseline and "seconds" in baseline:
+        ratio = result["seconds"] / max(baseline["seconds"], 1e-12)
+        line += "  {:>6.2f}x".format(ratio)
+    print(line, file=file)
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any],
+            threshold: float) -> list[str]:
+    """Get the cases that are slower than the baseline by more than the
+    threshold ratio, or that fail but didn't in the baseline."""
+    slower = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or "seconds" not in base:
+            continue
+        if ("seconds" not in result
+                or result["seconds"] > base["seconds"] * threshold):
+            slower.append(key)
+    return slower
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in
+                                                   s.split(",")],
+                        help="deck sizes, e.g. 1000,10000,100000 "
+                        "(default: the baseline's with --compare, else "
+                        "%s)" % ",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--cases", type=lambda s: s.split(","),
+                        default=list(CASES),
+                        help="cases to run: " + ", ".join(CASES))
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timing runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="FILE",
+                        help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", nargs="?",
+                        const=BASELINE,
+                        help="compare the results with a JSON baseline "
+                        "(default: tools/benchmark_baseline.json)")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="times to retime cases that look slower than "
+                        "the baseline")
+    args = parser.parse_args(argv)
+    for name in args.cases:
+        if name not in CASES:
+            parser.error("unknown case: " + name)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        if args.sizes is None:
+            args.sizes = saved.get("sizes", DEFAULT_SIZES)
+    if args.sizes is None:
+        args.sizes = DEFAULT_SIZES
+
+    calibration = calibrate(args.min_time, args.repeat)
+    results = run_benchmarks(args)
+    calibration = min(calibration, calibrate(args.min_time, args.repeat))
+    if baseline and "calibration" in saved:
+        scale = calibration / saved["calibration"]
+        print("calibration: this run is {:.2f}x the baseline's speed"
+              .format(1 / scale), file=sys.stderr)
+        baseline = {key: dict(base, seconds=base["seconds"] * scale)
+                    if "seconds" in base else base
+                    for key, base in baseline.items()}
+        for _ in range(args.retries):
+            slower = compare(results, baseline, args.threshold)
+            if not slower:
+                break
+            print("timing again: " + ", ".join(slower), file=sys.stderr)
+            for key, result in run_benchmarks(args, set(slower)).items():
+                if result.get("seconds", float("inf")) < results[key].get(
+                        "seconds", float("inf")):
+                    results[key] = result
+    for key, result in results.items():
+        print_result(key, result, baseline.get(key))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "sizes": args.sizes,
+                "calibration": calibration,
+                "results": results,
+            }, f, indent=2)
+
+    if args.compare:
+        slower = compare(results, baseline, args.threshold)
+        for key in slower:
+            print("regression: " + key, file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Headless stand-in for Anki (the "aqt" and "anki" packages), for testing and
+benchmarking AnkiBuddy on a plain Python install.
+
+install() registers fake "aqt" and "anki" modules in sys.modules, with a
+main window (aqt.mw) that holds a FakeCollection, an add-on manager with
+an in-memory config, and an av_player that records what it was asked to
+play. If PyQt6 or PyQt5 is installed, aqt.qt re-exports it like the real
+aqt.qt does; otherwise every Qt name is an import-only placeholder (see
+qtstub.py).
+
+load_addon_module() imports a module of the add-on without running the
+add-on's __init__.py. After install(), the folders the add-on writes to in
+its user_files (see USER_FILES_DIRS) are pointed at a temporary folder as
+soon as their modules are imported, however that happens (e.g. lazily,
+from a hook), so that tests and tools don't write into the source tree.
+
+Usage:
+    import fakeanki
+    col = fakeanki.FakeCollection.synthetic(size=10000, fields=5,
+                                            duplication=0.05)
+    mw = fakeanki.install(col)
+    stores = fakeanki.load_addon_module("stores")
+
+    store = stores.NotecardStore()
+    store.load(col.decks.current()["id"])
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+import copy
+import importlib
+import importlib.abc
+import importlib.machinery
+import json
+import os
+import sys
+import tempfile
+import types
+from concurrent.futures import Future
+from os.path import abspath, dirname, join
+
+from .collection import (
+    FakeCard,
+    FakeCollection,
+    FakeNote,
+    SYNTHETIC_FIELDS,
+)
+from . import qtstub
+
+ADDON_DIR = join(dirname(dirname(dirname(abspath(__file__)))), "src")
+ADDON_PACKAGE = "ankibuddy"
+# add-on module -> its constant for a folder in user_files/
+USER_FILES_DIRS = {
+    "history": "HISTORY_DIR",
+    "sorting": "SORT_DIR",
+    "controllers": "STATS_DIR",
+}
+_user_files = None  # temporary folder, see redirect_user_files()
+
+__all__ = [
+    "ADDON_DIR",
+    "ADDON_PACKAGE",
+    "FakeAddonManager",
+    "FakeAVPlayer",
+    "FakeCard",
+    "FakeCollection",
+    "FakeMainWindow",
+    "FakeNote",
+    "SYNTHETIC_FIELDS",
+    "install",
+    "load_addon_module",
+    "redirect_user_files",
+]
+
+
+def load_addon_module(name: str) -> types.ModuleType:
+    """Import a module of the add-on without running the add-on's
+    __init__.py, which registers hooks into a running Anki. The add-on is
+    imported as the package "ankibuddy".
+
+    Args:
+        name (str): Module name inside the add-on, e.g. "stores".
+
+    Returns:
+        types.ModuleType: The imported module.
+    """
+    if ADDON_PACKAGE not in sys.modules:
+        package = types.ModuleType(ADDON_PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[ADDON_PACKAGE] = package
+    module = importlib.import_module(ADDON_PACKAGE + "." + name)
+    redirect_user_files()
+    return module
+
+
+def redirect_user_files():
+    """Point the user_files folders of the loaded add-on modules (see
+    USER_FILES_DIRS) at a temporary folder, the same one for the whole
+    process. Modules imported later are redirected by _UserFilesFinder."""
+    for name in USER_FILES_DIRS:
+        module = sys.modules.get(ADDON_PACKAGE + "." + name)
+        if module is not None:
+            _redirect(module, name)
+
+
+def _redirect(module: types.ModuleType, name: str):
+    """Internal function, see redirect_user_files()."""
+    global _user_files
+    if _user_files is None:
+        _user_files = tempfile.mkdtemp(prefix="fakeanki-user-files-")
+    constant = USER_FILES_DIRS[name]
+    folder = os.path.basename(getattr(module, constant))
+    setattr(module, constant, join(_user_files, folder))
+
+
+class _UserFilesFinder(importlib.abc.MetaPathFinder):
+    """Import hook that redirects the user_files folders of the add-on
+    modules in USER_FILES_DIRS right after they are imported."""
+    def find_spec(self, fullname: str, path: Any, target: Any = None):
+        package, _, name = fullname.rpartition(".")
+        if package != ADDON_PACKAGE or name not in USER_FILES_DIRS:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None:
+            return None
+        exec_module = spec.loader.exec_module
+
+        def exec_and_redirect(module: types.ModuleType):
+            exec_module(module)
+            _redirect(module, name)
+        spec.loader.exec_module = exec_and_redirect
+        return spec
+
+
+def unload_addon():
+    """Remove the add-on's modules from sys.modules, so the next
+    load_addon_module() imports them again (e.g. after install())."""
+    for name in list(sys.modules):
+        if name == ADDON_PACKAGE or name.startswith(ADDON_PACKAGE + "."):
+            del sys.modules[name]
+
+
+class FakeAddonManager:
+    """Stand-in for aqt.addons.AddonManager. Keeps add-on configs in memory
+    and counts the writes.
+
+    Like Anki, getConfig() returns the add-on's config.json defaults with
+    the stored config on top of them (a shallow merge), so keys in
+    config.json show up in configs written by older versions too.
+    """
+    def __init__(self, config: dict[str, Any] = None):
+        """Initialize the add-on manager.
+
+        Args:
+            config (dict[str, Any], optional): Stored config of the add-on,
+                e.g. one written by an older version. Defaults to None, for
+                a new install (only the config.json defaults).
+        """
+        with open(join(ADDON_DIR, "config.json"), encoding="utf-8") as f:
+            self.defaults = {ADDON_PACKAGE: json.load(f)}
+        self.configs = {} if config is None else {ADDON_PACKAGE: config}
+        self.writes = 0
+        self.web_exports: dict[str, str] = {}
+        self._folder = tempfile.mkdtemp(prefix="fakeanki-addons-")
+
+    def addonFromModule(self, module: str) -> str:
+        """Add-on folder name of a module."""
+        return module.split(".")[0]
+
+    def getConfig(self, module: str) -> Optional[dict[str, Any]]:
+        """Get a copy of the add-on config merged over its defaults, like
+        Anki returns a freshly parsed one."""
+        addon = self.addonFromModule(module)
+        defaults = self.defaults.get(addon)
+        config = self.configs.get(addon)
+        if config is None or defaults is None:
+            return copy.deepcopy(defaults if config is None else config)
+        return copy.deepcopy({**defaults, **config})
+
+    def writeConfig(self, module: str, conf: dict[str, Any]):
+        """Store the add-on config."""
+        self.writes += 1
+        self.configs[self.addonFromModule(module)] = copy.deepcopy(conf)
+
+    def addonsFolder(self, module: str = None) -> str:
+        """Path of the add-ons folder, or of one add-on's folder."""
+        if module is None:
+            return self._folder
+        path = join(self._folder, self.addonFromModule(module))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def setWebExports(self, module: str, pattern: str):
+        """Record the web exports pattern of an add-on."""
+        self.web_exports[self.addonFromModule(module)] = pattern
+
+
+class FakeAVPlayer:
+    """Stand-in for aqt.sound.av_player. Records what it is asked to play
+    instead of playing it."""
+    def __init__(self):
+        self.played: list[Any] = []
+
+    def play_file(self, filename: str):
+        self.played.append(filename)
+
+    def play_tags(self, tags: list):
+        self.played.extend(tags)
+
+    def stop_and_clear_queue(self):
+        pass
+
+
+class FakeTaskManager:
+    """Stand-in for aqt.taskman.TaskManager. Runs tasks synchronously."""
+    def run_in_background(self, task: Callable,
+                          on_done: Callable = None, args: dict = None):
+        future = Future()
+        try:
+            future.set_result(task(**(args or {})))
+        except Exception as e:  # passed to on_done, like Anki does
+            future.set_exception(e)
+        if on_done:
+            on_done(future)
+        return future
+
+    def run_on_main(self, closure: Callable):
+        closure()
+
+
+class FakeMainWindow:
+    """Stand-in for aqt.mw."""
+    def __init__(self, col: FakeCollection, addon_manager: FakeAddonManager):
+        self.col = col
+        self.addonManager = addon_manager
+        self.taskman = FakeTaskManager()
+        self.pm = types.SimpleNamespace(name="User 1",
+                                        profileFolder=lambda: tempfile.
+                                        gettempdir())
+
+    def windowIcon(self) -> Any:
+        return None
+
+    def font(self) -> Any:
+        return types.SimpleNamespace(family=lambda: "Sans Serif")
+
+
+class _Hook:
+    """Stand-in for one of aqt.gui_hooks' hook objects."""
+    def __init__(self):
+        self._hooks: list[Callable] = []
+
+    def append(self, callback: Callable):
+        self._hooks.append(callback)
+
+    def remove(self, callback: Callable):
+        if callback in self._hooks:
+            self._hooks.remove(callback)
+
+    def count(self) -> int:
+        return len(self._hooks)
+
+    def __call__(self, *args):
+        for hook in list(self._hooks):
+            hook(*args)
+
+
+class _FilterHook(_Hook):
+    """Hook whose callbacks pass a value along, like Anki's filters."""
+    def __call__(self, value: Any, *args) -> Any:
+        for hook in list(self._hooks):
+            value = hook(value, *args)
+        return value
+
+
+class WebContent:
+    """Stand-in for aqt.webview.WebContent."""
+    def __init__(self):
+        self.body = ""
+        self.head = ""
+        self.css: list[str] = []
+        self.js: list[str] = []
+
+
+def _qt_modules() -> dict[str, types.ModuleType]:
+    """Build aqt.qt from the installed PyQt, or from placeholders. Also maps
+    the "PyQt5" modules used by the generated forms, as Anki does."""
+    for binding in ("PyQt6", "PyQt5"):
+        if getattr(sys.modules.get(binding), "_fakeanki", False):
+            continue  # placeholders from an earlier install()
+        try:
+            core = importlib.import_module(binding + ".QtCore")
+            gui = importlib.import_module(binding + ".QtGui")
+            widgets = importlib.import_module(binding + ".QtWidgets")
+        except ImportError:
+            continue
+        qt = types.ModuleType("aqt.qt")
+        for module in (core, gui, widgets):
+            for attr in dir(module):
+                if not attr.startswith("_"):
+                    setattr(qt, attr, getattr(module, attr))
+        qt.qtmajor = 6 if binding == "PyQt6" else 5
+        modules = {"aqt.qt": qt}
+        if binding != "PyQt5":
+            package = types.ModuleType("PyQt5")
+            package.QtCore, package.QtGui, package.QtWidgets = (
+                core, gui, widgets)
+            modules.update({"PyQt5": package, "PyQt5.QtCore": core,
+                            "PyQt5.QtGui": gui, "PyQt5.QtWidgets": widgets})
+        if widgets.QApplication.instance() is None:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            qt._fakeanki_app = widgets.QApplication(["fakeanki"])
+        return modules
+
+    qt = qtstub.make_module("aqt.qt")
+    package = types.ModuleType("PyQt5")
+    package._fakeanki = True
+    core = qtstub.make_module("PyQt5.QtCore")
+    gui = qtstub.make_module("PyQt5.QtGui")
+    widgets = qtstub.make_module("PyQt5.QtWidgets")
+    package.QtCore, package.QtGui, package.QtWidgets = core, gui, widgets
+    return {"aqt.qt": qt, "PyQt5": package, "PyQt5.QtCore": core,
+            "PyQt5.QtGui": gui, "PyQt5.QtWidgets": widgets}
+
+
+def install(col: FakeCollection = None,
+            config: dict[str, Any] = None) -> FakeMainWindow:
+    """Register the fake "aqt" and "anki" packages in sys.modules.
+
+    Any add-on module imported before install() keeps its references to the
+    previous fakes; call unload_addon() to re-import them.
+
+    Args:
+        col (FakeCollection, optional): Collection for aqt.mw.col. Defaults
+            to a synthetic collection of 1000 cards.
+        config (dict[str, Any], optional): Stored add-on config, see
+            FakeAddonManager. Defaults to None, for a new install.
+
+    Returns:
+        FakeMainWindow: The fake aqt.mw.
+    """
+    if col is None:
+        col = FakeCollection.synthetic()
+    mw = FakeMainWindow(col, FakeAddonManager(config))
+    modules = _qt_modules()
+    qt = modules["aqt.qt"]
+
+    aqt = types.ModuleType("aqt")
+    aqt.__path__ = []
+    aqt.mw = mw
+
+    sound = types.ModuleType("aqt.sound")
+    sound.av_player = FakeAVPlayer()
+    sound.av_refs_to_play_icons = lambda html: html
+
+    webview = types.ModuleType("aqt.webview")
+    webview.WebContent = WebContent
+
+    class AnkiWebView(qt.QWidget):
+        """Stand-in for aqt.webview.AnkiWebView that discards its HTML."""
+        def __init__(self, parent: Any = None, *args, **kwargs):
+            super().__init__(parent)
+            self.html = ""
+
+        def stdHtml(self, body: str, css: list = None, js: list = None,
+                    head: str = "", context: Any = None):
+            self.html = body
+
+        def set_bridge_command(self, func: Callable, context: Any):
+            self.bridge_command = func
+
+    webview.AnkiWebView = AnkiWebView
+
+    overview = types.ModuleType("aqt.overview")
+    overview.Overview = type("Overview", (), {})
+    overview.OverviewBottomBar = type("OverviewBottomBar", (), {})
+
+    gui_hooks = types.ModuleType("aqt.gui_hooks")
+    gui_hooks.webview_will_set_content = _Hook()
+    gui_hooks.webview_did_receive_js_message = _FilterHook()
+    gui_hooks.main_window_did_init = _Hook()
+    gui_hooks.profile_did_open = _Hook()
+    gui_hooks.profile_will_close = _Hook()
+
+    anki = types.ModuleType("anki")
+    anki.__path__ = []
+    cards = types.ModuleType("anki.cards")
+    cards.Card = FakeCard
+    anki_sound = types.ModuleType("anki.sound")
+    anki_sound.SoundOrVideoTag = type(
+        "SoundOrVideoTag", (), {"__init__": lambda self, filename:
+                                setattr(self, "filename", filename)})
+
+    aqt.qt = qt
+    aqt.sound = sound
+    aqt.webview = webview
+    aqt.overview = overview
+    aqt.gui_hooks = gui_hooks
+    anki.cards = cards
+    anki.sound = anki_sound
+
+    modules.update({
+        "aqt": aqt,
+        "aqt.sound": sound,
+        "aqt.webview": webview,
+        "aqt.overview": overview,
+        "aqt.gui_hooks": gui_hooks,
+        "anki": anki,
+        "anki.cards": cards,
+        "anki.sound": anki_sound,
+    })
+    sys.modules.update(modules)
+    if not any(isinstance(finder, _UserFilesFinder)
+               for finder in sys.meta_path):
+        sys.meta_path.insert(0, _UserFilesFinder())
+    return mw
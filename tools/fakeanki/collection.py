@@ -0,0 +1,305 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Fake Anki collection, with just the parts of the Anki API that AnkiBuddy
+uses: find_cards(), get_note(), decks, models and media.
+
+FakeCollection.synthetic() generates decks of a configurable size, field
+count and amount of duplicated answers.
+"""
+from __future__ import annotations
+from typing import Any
+
+import os
+import random
+import tempfile
+
+# Field names of synthetic notes, in order. Decks with more fields get
+# "Extra N" fields after these.
+SYNTHETIC_FIELDS = ["Front", "Back", "Index", "Sentence", "Audio"]
+
+_SENTENCE_WORDS = [
+    "今日[きょう]", "は", "天気[てんき]", "が", "良[よ]い", "です", "。",
+    "私[わたし]", "の", "友達[ともだち]", "と", "学校[がっこう]", "へ",
+    "行[い]きました", "（　）", "新[あたら]しい", "本[ほん]", "を",
+    "読[よ]む",
+]
+
+
+class FakeNote:
+    """Stand-in for anki.notes.Note."""
+    def __init__(self, nid: int, mid: int, names: list[str],
+                 values: list[str], mod: int = 0):
+        self.id = nid
+        self.mid = mid
+        self.mod = mod
+        self._names = names
+        self.fields = values
+
+    def items(self) -> list[tuple[str, str]]:
+        """Same as Note.items(): (field name, value) pairs."""
+        return list(zip(self._names, self.fields))
+
+    def keys(self) -> list[str]:
+        """Same as Note.keys()."""
+        return list(self._names)
+
+    def __getitem__(self, key: str) -> str:
+        return self.fields[self._names.index(key)]
+
+
+class FakeCardData:
+    """Card row stored in the fake collection."""
+    def __init__(self, cid: int, nid: int, did: int, reps: int, lapses: int):
+        self.id = cid
+        self.nid = nid
+        self.did = did
+        self.reps = reps
+        self.lapses = lapses
+
+
+class FakeCard:
+    """Stand-in for anki.cards.Card. Created like the real one, with
+    Card(col, id)."""
+    def __init__(self, col: "FakeCollection", id: int):
+        data = col._cards[id]
+        self.col = col
+        self.id = data.id
+        self.nid = data.nid
+        self.did = data.did
+        self.reps = data.reps
+        self.lapses = data.lapses
+
+    def load(self):
+        """Nothing to load, the data is read in __init__."""
+        pass
+
+    def note(self) -> FakeNote:
+        """Get the card's note."""
+        return self.col.get_note(self.nid)
+
+    def answer(self) -> str:
+        """Simplified answer HTML, with every field of the note."""
+        return "<br>".join(self.note().fields)
+
+    def answer_av_tags(self) -> list:
+        """No av tags are parsed by the fake collection."""
+        return []
+
+
+class FakeDecks:
+    """Stand-in for the collection's DeckManager."""
+    def __init__(self):
+        self._decks: dict[int, dict[str, Any]] = {}
+        self._current = None
+
+    def add(self, name: str, did: int) -> dict[str, Any]:
+        """Add a deck. The first deck added becomes the current one."""
+        deck = {"id": did, "name": name}
+        self._decks[did] = deck
+        if self._current is None:
+            self._current = did
+        return deck
+
+    def get(self, did: int) -> dict[str, Any]:
+        """Get a deck dict by id."""
+        return self._decks.get(int(did))
+
+    def current(self) -> dict[str, Any]:
+        """Get the currently selected deck."""
+        return self._decks[self._current]
+
+    def select(self, did: int):
+        """Set the currently selected deck."""
+        self._current = did
+
+    def id_for_name(self, name: str) -> int:
+        """Get a deck id by name, or None."""
+        for deck in self._decks.values():
+            if deck["name"] == name:
+                return deck["id"]
+        return None
+
+    def all_names_and_ids(self) -> list[tuple[str, int]]:
+        """List (name, id) of all decks."""
+        return [(d["name"], d["id"]) for d in self._decks.values()]
+
+    def children(self, did: int) -> list[tuple[str, int]]:
+        """List (name, id) of all the subdecks of a deck."""
+        prefix = self._decks[did]["name"] + "::"
+        return [(d["name"], d["id"]) for d in self._decks.values()
+                if d["name"].startswith(prefix)]
+
+    def deck_and_child_ids(self, did: int) -> list[int]:
+        """List the ids of a deck and all its subdecks."""
+        return [did] + [child[1] for child in self.children(did)]
+
+
+class FakeModels:
+    """Stand-in for the collection's ModelManager (note types)."""
+    def __init__(self):
+        self._models: dict[int, dict[str, Any]] = {}
+
+    def add(self, name: str, mid: int, fields: list[str]) -> dict[str, Any]:
+        """Add a note type with the given field names."""
+        model = {
+            "id": mid,
+            "name": name,
+            "flds": [{"name": f, "ord": i} for i, f in enumerate(fields)],
+        }
+        self._models[mid] = model
+        return model
+
+    def get(self, mid: int) -> dict[str, Any]:
+        """Get a note type dict by id."""
+        return self._models.get(mid)
+
+    def field_names(self, model: dict[str, Any]) -> list[str]:
+        """Same as ModelManager.field_names()."""
+        return [f["name"] for f in model["flds"]]
+
+
+class FakeMedia:
+    """Stand-in for the collection's MediaManager."""
+    def __init__(self, folder: str = None):
+        self._dir = folder or tempfile.mkdtemp(prefix="fakeanki-media-")
+
+    def dir(self) -> str:
+        """Path of the media folder."""
+        return self._dir
+
+
+class FakeCollection:
+    """Stand-in for anki.collection.Collection."""
+    def __init__(self, media_dir: str = None):
+        self.decks = FakeDecks()
+        self.models = FakeModels()
+        self.media = FakeMedia(media_dir)
+        self._cards: dict[int, FakeCardData] = {}
+        self._notes: dict[int, FakeNote] = {}
+        self._next_id = 1000
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def add_note(self, mid: int, did: int, values: list[str],
+                 reps: int = 0, lapses: int = 0) -> int:
+        """Add a note with one card to a deck.
+
+        Returns:
+            int: The card id.
+        """
+        model = self.models.get(mid)
+        names = [f["name"] for f in model["flds"]]
+        nid = self._new_id()
+        self._notes[nid] = FakeNote(nid, mid, names, values, mod=nid)
+        cid = self._new_id()
+        self._cards[cid] = FakeCardData(cid, nid, did, reps, lapses)
+        return cid
+
+    def find_cards(self, query: str) -> list[int]:
+        """Supports the searches AnkiBuddy uses: "did:<id>" (optionally
+        several joined with " or ") and "" for every card."""
+        query = query.strip().strip("()")
+        if not query:
+            return list(self._cards)
+        dids = set()
+        for term in query.split(" or "):
+            term = term.strip()
+            if not term.startswith("did:"):
+                raise ValueError("unsupported search: " + term)
+            dids.update(int(d) for d in term[4:].split(","))
+        return [cid for cid, c in self._cards.items() if c.did in dids]
+
+    def get_note(self, nid: int) -> FakeNote:
+        """Get a note by id."""
+        return self._notes[nid]
+
+    def get_card(self, cid: int) -> "FakeCard":
+        """Get a card by id."""
+        return FakeCard(self, cid)
+
+    @classmethod
+    def synthetic(
+        cls,
+        size: int = 1000,
+        fields: int = 5,
+        duplication: float = 0.0,
+        decks: int = 1,
+        deck_name: str = "Synthetic",
+        seed: int = 0,
+        media: bool = False,
+    ) -> "FakeCollection":
+        """Generate a collection with synthetic cards.
+
+        Fields are named after SYNTHETIC_FIELDS ("Front", "Back", "Index",
+        "Sentence", "Audio"), then "Extra N". "Index" is an integer that
+        follows the card order, "Sentence" has furigana bracket notation,
+        and "Audio" has a [sound:] tag.
+
+        Args:
+            size (int, optional): Number of cards per deck. Defaults to 1000.
+            fields (int, optional): Number of fields (at least 2).
+                Defaults to 5.
+            duplication (float, optional): Fraction of cards whose "Back"
+                duplicates another card's. Defaults to 0.0.
+            decks (int, optional): Number of decks. With more than one, they
+                are created as subdecks "<deck_name>::N" of a parent deck,
+                which is the current deck. Defaults to 1.
+            deck_name (str, optional): Name of the (parent) deck.
+                Defaults to "Synthetic".
+            seed (int, optional): Random seed. Defaults to 0.
+            media (bool, optional): Also write the sound files of the
+                "Audio" field to the media folder. Defaults to False.
+
+        Returns:
+            FakeCollection: The generated collection.
+        """
+        rng = random.Random(seed)
+        col = cls()
+        fields = max(2, fields)
+        names = SYNTHETIC_FIELDS[:fields] + [
+            "Extra %d" % i for i in range(len(SYNTHETIC_FIELDS) + 1,
+                                          fields + 1)
+        ]
+        mid = col._new_id()
+        col.models.add(deck_name + " Note", mid, names)
+
+        parent = col._new_id()
+        col.decks.add(deck_name, parent)
+        if decks > 1:
+            dids = [col._new_id() for _ in range(decks)]
+            for i, did in enumerate(dids):
+                col.decks.add("%s::%d" % (deck_name, i + 1), did)
+        else:
+            dids = [parent]
+
+        num = 0
+        for did in dids:
+            for i in range(size):
+                num += 1
+                back = "meaning %d" % num
+                if num > 1 and rng.random() < duplication:
+                    back = "meaning %d" % rng.randrange(1, num)
+                values = [
+                    "word %d" % num,
+                    back,
+                    str(num),
+                    "".join(rng.choice(_SENTENCE_WORDS)
+                            for _ in range(rng.randrange(4, 16))),
+                    "[sound:card_%06d.mp3]" % num,
+                ]
+                values += ["extra %d-%d" % (num, j)
+                           for j in range(len(SYNTHETIC_FIELDS), fields)]
+                values = values[:fields]
+                reps = 0 if rng.random() < 0.4 else rng.randrange(1, 50)
+                lapses = rng.randrange(0, 6) if reps else 0
+                col.add_note(mid, did, values, reps=reps, lapses=lapses)
+                if media and fields >= 5:
+                    path = os.path.join(col.media.dir(),
+                                        "card_%06d.mp3" % num)
+                    with open(path, "wb") as f:
+                        f.write(b"\xff\xfb" + bytes(1022))
+        return col
@@ -0,0 +1,142 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Import-only stand-ins for Qt, used by fakeanki when neither PyQt6 nor
+PyQt5 is installed.
+
+Every Qt name resolves to a placeholder class, so the add-on's modules can
+be imported and their Qt-free code paths run. Widgets built from
+placeholders accept any call and do nothing. pyqtSignal is a working,
+synchronous signal, so models can emit to connected Python callables.
+"""
+from __future__ import annotations
+from typing import Any, Callable
+
+import types
+
+
+class _StubMeta(type):
+    """Metaclass so that class attributes (enums like Qt.AlignCenter) and
+    static methods (QTimer.singleShot) also resolve to placeholders."""
+    def __getattr__(cls, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return stub_class(name)
+
+    def __or__(cls, other: Any) -> Any:
+        return cls
+
+    __ror__ = __or__
+
+
+class Stub(metaclass=_StubMeta):
+    """Placeholder for any Qt class. Attributes (methods, signals) are
+    placeholders too, and calling a placeholder does nothing and returns a
+    placeholder, so chains like button.clicked.connect(f) work."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Stub()
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return Stub()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __or__(self, other: Any) -> Any:
+        return self
+
+    __ror__ = __or__
+
+    def _other(self, other: Any) -> Any:
+        # arithmetic with a placeholder (e.g. 4 * font.pointSize(), or
+        # "font-family: " + font.family()) keeps the other operand
+        return other
+
+    __add__ = __radd__ = __sub__ = __rsub__ = _other
+    __mul__ = __rmul__ = __truediv__ = __floordiv__ = _other
+
+    def __int__(self) -> int:
+        return 0
+
+    __index__ = __int__
+
+
+_classes: dict[str, type] = {}
+
+
+def stub_class(name: str) -> type:
+    """Get (and cache) the placeholder class for a Qt name."""
+    if name not in _classes:
+        _classes[name] = _StubMeta(name, (Stub,), {})
+    return _classes[name]
+
+
+class BoundSignal:
+    """A signal bound to an object, see pyqtSignal."""
+    def __init__(self):
+        self._slots: list[Callable] = []
+
+    def connect(self, slot: Callable):
+        self._slots.append(slot)
+
+    def disconnect(self, slot: Callable = None):
+        if slot is None:
+            self._slots.clear()
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class pyqtSignal:
+    """Synchronous stand-in for PyQt's pyqtSignal descriptor."""
+    def __init__(self, *types, **kwargs):
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, obj: Any, objtype: type = None) -> Any:
+        if obj is None:
+            return self
+        key = "_signal_" + self.name
+        bound = obj.__dict__.get(key)
+        if bound is None:
+            bound = obj.__dict__[key] = BoundSignal()
+        return bound
+
+
+class QObject:
+    """Placeholder QObject. Unlike the other placeholders, missing
+    attributes raise AttributeError, since models keep their state in
+    Python attributes."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def deleteLater(self):
+        pass
+
+
+def make_module(name: str) -> types.ModuleType:
+    """Create a module that resolves every attribute to a placeholder,
+    except for the names defined in this file."""
+    def __getattr__(attr: str) -> Any:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return stub_class(attr)
+
+    module = types.ModuleType(name)
+    module.pyqtSignal = pyqtSignal
+    module.pyqtSlot = lambda *args, **kwargs: (lambda fn: fn)
+    module.QObject = QObject
+    module.qtmajor = 0
+    module.__getattr__ = __getattr__
+    return module
@@ -0,0 +1,81 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Writes the WAV feedback sounds, src/resources/correct.wav and
+incorrect.wav, which audio.FeedbackPlayer plays with QSoundEffect.
+
+The sounds are short tones synthesized here (a rising chime for correct,
+a falling buzz for incorrect), so they can be rebuilt without an audio
+decoder. The output is the same on every run.
+
+Usage:
+    python tools/feedback_sounds.py
+    python tools/feedback_sounds.py --out /tmp/sounds --volume 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import struct
+import wave
+from os.path import abspath, dirname, join
+
+RESOURCES_DIR = join(dirname(dirname(abspath(__file__))), "src", "resources")
+RATE = 44100
+
+# (frequency in Hz, duration in s, harmonics' weights) per note
+SOUNDS = {
+    "correct.wav": [(1318.5, 0.08, (1.0, 0.25)),
+                    (1760.0, 0.20, (1.0, 0.25))],
+    "incorrect.wav": [(220.0, 0.12, (1.0, 0.5, 0.33, 0.25)),
+                      (164.8, 0.20, (1.0, 0.5, 0.33, 0.25))],
+}
+
+
+def note_samples(freq: float, duration: float,
+                 harmonics: tuple[float, ...]) -> list[float]:
+    """Samples of one note, between -1 and 1, with a short attack and an
+    exponential decay so that it doesn't click."""
+    count = int(RATE * duration)
+    attack = int(RATE * 0.005)
+    norm = sum(harmonics)
+    samples = []
+    for i in range(count):
+        t = i / RATE
+        value = sum(weight * math.sin(2 * math.pi * freq * (n + 1) * t)
+                    for n, weight in enumerate(harmonics)) / norm
+        envelope = min(1.0, i / attack) * math.exp(-4.0 * t / duration)
+        samples.append(value * envelope)
+    return samples
+
+
+def write_sound(path: str, notes: list, volume: float):
+    """Write the notes one after the other to a 16-bit mono WAV file."""
+    samples = []
+    for freq, duration, harmonics in notes:
+        samples += note_samples(freq, duration, harmonics)
+    frames = b"".join(struct.pack("<h", round(s * volume * 32767))
+                      for s in samples)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default=RESOURCES_DIR,
+                        help="folder to write to (default: src/resources)")
+    parser.add_argument("--volume", type=float, default=0.7,
+                        help="peak amplitude, between 0 and 1")
+    args = parser.parse_args()
+    for name, notes in SOUNDS.items():
+        path = join(args.out, name)
+        write_sound(path, notes, args.volume)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
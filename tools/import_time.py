@@ -0,0 +1,138 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Measures how long the add-on takes to import, headlessly with fakeanki.
+
+"startup" is what Anki pays when it loads the add-on: running the add-on's
+__init__.py. "first_click" is what is left for the first click on the
+Study Buddy button: the "BuddyWizard" pycmd, up to the questions dialog
+being shown. Each run is a fresh interpreter (the .pyc files are already
+compiled by a warm-up run), and the median of the runs is reported, with
+the number of add-on modules loaded after each phase.
+
+To compare with another revision, pass the src folder of a checkout of it:
+    git worktree add /tmp/before HEAD~1
+    python tools/import_time.py --addon-dir /tmp/before/src
+
+Usage:
+    python tools/import_time.py --runs 20
+    python tools/import_time.py --json
+"""
+from __future__ import annotations
+from typing import Any
+
+import argparse
+import importlib.util
+import json
+import statistics
+import subprocess
+import sys
+import time
+from os.path import abspath, dirname, join
+
+import fakeanki
+
+PHASES = ["startup", "first_click"]
+
+
+def child(addon_dir: str) -> dict[str, Any]:
+    """Import the add-on and click the button once, in this interpreter.
+
+    Args:
+        addon_dir (str): Folder of the add-on's __init__.py.
+
+    Returns:
+        dict[str, Any]: Seconds and add-on module count after each phase.
+    """
+    fakeanki.install(fakeanki.FakeCollection.synthetic(size=100))
+    package = fakeanki.ADDON_PACKAGE
+    report = {}
+
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(
+        package, join(addon_dir, "__init__.py"),
+        submodule_search_locations=[addon_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[package] = module
+    spec.loader.exec_module(module)
+    report["startup"] = time.perf_counter() - start
+    report["startup_modules"] = _count_modules(package)
+
+    from aqt import gui_hooks
+    start = time.perf_counter()
+    try:
+        gui_hooks.webview_did_receive_js_message(
+            (False, None), "BuddyWizard", None)
+    except Exception as e:  # e.g. a dialog that needs a real Qt
+        report["first_click_error"] = repr(e)
+    report["first_click"] = time.perf_counter() - start
+    report["first_click_modules"] = _count_modules(package)
+    return report
+
+
+def _count_modules(package: str) -> int:
+    """Internal function, number of imported modules of the add-on."""
+    return sum(1 for name in sys.modules
+               if name == package or name.startswith(package + "."))
+
+
+def measure(addon_dir: str, runs: int) -> dict[str, Any]:
+    """Run child() in fresh interpreters.
+
+    Args:
+        addon_dir (str): Folder of the add-on's __init__.py.
+        runs (int): Number of timed runs.
+
+    Returns:
+        dict[str, Any]: Median seconds of each phase, and the last run's
+            module counts.
+    """
+    command = [sys.executable, abspath(__file__), "--child",
+               "--addon-dir", addon_dir]
+    reports = []
+    for run in range(runs + 1):
+        out = subprocess.run(command, check=True, capture_output=True,
+                             text=True, cwd=dirname(abspath(__file__)))
+        if run > 0:  # the first run compiles the .pyc files
+            reports.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    result: dict[str, Any] = {"addon_dir": addon_dir, "runs": runs}
+    for phase in PHASES:
+        result[phase + "_ms"] = round(1000 * statistics.median(
+            report[phase] for report in reports), 2)
+        result[phase + "_modules"] = reports[-1][phase + "_modules"]
+    if "first_click_error" in reports[-1]:
+        result["first_click_error"] = reports[-1]["first_click_error"]
+    return result
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--addon-dir", default=fakeanki.ADDON_DIR,
+                        help="src folder of the add-on to measure")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="number of timed runs")
+    parser.add_argument("--json", action="store_true",
+                        help="print the report as JSON")
+    parser.add_argument("--child", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    addon_dir = abspath(args.addon_dir)
+
+    if args.child:
+        print(json.dumps(child(addon_dir)))
+        return 0
+
+    report = measure(addon_dir, args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print("{:<24} {}".format(key, value))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
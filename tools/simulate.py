@@ -0,0 +1,258 @@
+# Copyright: Axel Moreen, 2022
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""
+Headless practice session simulator.
+
+Drives PracticeSession.load_new_question() and the answer handling of
+HomeworkController.question_answered() (PracticeSession.record_answer())
+with a scripted answerer against a synthetic deck, without Qt or Anki.
+Reports questions per second, card rejections and deck coverage.
+
+Sessions are seeded, so two runs with the same arguments ask the same
+questions; the "sequence" digest in the report can be compared to check
+this.
+
+Usage:
+    python tools/simulate.py --cards 2000 --questions 20000 --seed 1
+    python tools/simulate.py --types 1 --duplicates 0.1 --json
+"""
+from __future__ import annotations
+from typing import Any
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+
+from fakeanki import load_addon_module
+
+
+SIM_MODEL_ID = 1  # every simulated card has the same note type
+
+
+class SimCard:
+    """Stand-in for stores.Notecard, with just the fields."""
+    def __init__(self, fields: dict[str, str]):
+        self.fields = fields
+        self.mid = SIM_MODEL_ID
+
+
+class SimStore:
+    """Stand-in for stores.NotecardStore, holding a synthetic deck."""
+    def __init__(self, size: int, duplicates: float, rng: random.Random):
+        """Generate the synthetic deck.
+
+        Args:
+            size (int): Number of cards.
+            duplicates (float): Fraction of cards that get a "Back" field
+                already used by another card, so that questions have to
+                reject them sometimes.
+            rng (random.Random): Random source.
+        """
+        self.deck_name = "Simulated"
+        self.models = {SIM_MODEL_ID: {"id": SIM_MODEL_ID, "name": "Simulated"}}
+        self.notecards = []
+        for i in range(size):
+            back = "meaning %d" % i
+            if i > 0 and rng.random() < duplicates:
+                back = "meaning %d" % rng.randrange(i)
+            self.notecards.append(SimCard({"Front": "word %d" % i,
+                                           "Back": back}))
+
+    def length(self) -> int:
+        """See NotecardStore.length()."""
+        return len(self.notecards)
+
+    def models_with_fields(self, fields: tuple[str, ...]) -> frozenset[int]:
+        """See NotecardStore.models_with_fields()."""
+        if all(field in ("Front", "Back") for field in fields):
+            return frozenset([SIM_MODEL_ID])
+        return frozenset()
+
+
+class SimOptions:
+    """Stand-in for stores.OptionStore, with the default deck options."""
+    def __init__(self, true_random: bool = False):
+        self.globals = {
+            "show_answer_before_next": False,
+            "do_timer": False,
+            "timer_seconds": 60,
+            "lesson_size": 20,
+            "true_random": true_random,
+            "revisit_mistakes": True,
+            "revisit_steps": 2,
+            "revisit_spacing": 3,
+            "play_sounds": False,
+            "sound_volume": 100,
+            "field_settings": {},
+        }
+
+    def get_globals(self, deck_name: str) -> dict[str, Any]:
+        """See OptionStore.get_globals()."""
+        return self.globals
+
+
+class ScriptedAnswerer:
+    """Answers questions correctly with a fixed probability."""
+    def __init__(self, accuracy: float, rng: random.Random):
+        self.accuracy = accuracy
+        self.rng = rng
+
+    def is_correct(self) -> bool:
+        """Roll whether the next answer is correct."""
+        return self.rng.random() < self.accuracy
+
+
+def make_templates(type_inds: list[int], choices: int,
+                   groupsize: int) -> list[dict[str, Any]]:
+    """Build question templates like the ones made in TemplateDialog.
+
+    Args:
+        type_inds (list[int]): Question types to use (0 = multiple choice,
+            1 = matching, 2 = write the answer).
+        choices (int): Number of choices in multiple choice.
+        groupsize (int): Number of pairs in matching.
+
+    Returns:
+        list[dict[str, Any]]: Templates.
+    """
+    names = ["Multiple Choice", "Matching", "Write the Answer"]
+    templates = []
+    for type_ind in type_inds:
+        templ = {
+            "type_ind": type_ind,
+            "type": names[type_ind],
+            "question": "Front",
+            "answer": "Back",
+            "include_reverse": True,
+        }
+        if type_ind == 0:
+            templ["number_choices"] = choices
+        elif type_ind == 1:
+            templ["groupsize"] = groupsize
+            templ["extrabank"] = 0
+        templates.append(templ)
+    return templates
+
+
+def answer_question(session, answerer: ScriptedAnswerer) -> list[int]:
+    """Answer the current question of the session the way the question
+    widgets and HomeworkController would: set session.last_card and record
+    each answer. A wrong answer is followed by "Show Answer" / "Continue",
+    except in matching where the user keeps trying until the pair matches.
+
+    Args:
+        session (PracticeSession): Session with a loaded question.
+        answerer (ScriptedAnswerer): Answerer.
+
+    Returns:
+        list[int]: Card indices that were asked about.
+    """
+    question = session.curr_question
+    if session.curr_question_type == 1:
+        inds = question["cards_inds"]
+        for i in range(len(inds)):
+            session.last_card = inds[i]
+            while not answerer.is_correct():
+                session.record_answer(False, True)
+            session.record_answer(True, i < len(inds) - 1)
+        return list(inds)
+
+    if session.curr_question_type == 0:
+        ind = question["question_card_ind"]
+    else:
+        ind = question["card_ind"]
+    session.last_card = ind
+    session.record_answer(answerer.is_correct(), False)
+    return [ind]
+
+
+def simulate(args: argparse.Namespace) -> dict[str, Any]:
+    """Run one simulated session.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict[str, Any]: Report of the session.
+    """
+    practice = load_addon_module("practice")
+
+    deck_rng = random.Random(args.seed)
+    store = SimStore(args.cards, args.duplicates, deck_rng)
+    options = SimOptions(true_random=args.true_random)
+    templates = make_templates(args.types, args.choices, args.groupsize)
+
+    session = practice.PracticeSession(store, templates, options,
+                                       rng=random.Random(args.seed))
+    answerer = ScriptedAnswerer(args.accuracy, random.Random(args.seed + 1))
+
+    digest = hashlib.sha1()
+    start = time.perf_counter()
+    for _ in range(args.questions):
+        session.load_new_question()
+        session.clock.question_shown()  # like HomeworkController
+        asked = answer_question(session, answerer)
+        digest.update(repr(asked).encode())
+    elapsed = time.perf_counter() - start
+
+    return {
+        "questions": args.questions,
+        "seconds": round(elapsed, 4),
+        "questions_per_second": round(args.questions / max(elapsed, 1e-9),
+                                      1),
+        "answered": session.total_answered,
+        "accuracy": round(session.total_correct
+                          / max(1, session.total_answered), 4),
+        "rejections": session.rejections,
+        "rejections_per_question": round(session.rejections
+                                         / max(1, args.questions), 4),
+        "cards": len(session.cards),
+        "unique_cards_visited": len(session.card_history),
+        "completed_passes": session.sampler.epoch,
+        "pass_coverage": round(session.sampler.coverage(), 4),
+        "revisits_pending": len(session.revisits),
+        "sequence": digest.hexdigest()[:16],
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cards", type=int, default=1000,
+                        help="number of cards in the synthetic deck")
+    parser.add_argument("--questions", type=int, default=10000,
+                        help="number of questions to ask")
+    parser.add_argument("--types", type=lambda s: [int(t) for t in
+                                                   s.split(",")],
+                        default=[0, 1, 2],
+                        help="question types, e.g. 0,1,2")
+    parser.add_argument("--choices", type=int, default=4,
+                        help="choices per multiple choice question")
+    parser.add_argument("--groupsize", type=int, default=5,
+                        help="pairs per matching question")
+    parser.add_argument("--duplicates", type=float, default=0.05,
+                        help="fraction of cards with a duplicated answer")
+    parser.add_argument("--accuracy", type=float, default=0.8,
+                        help="chance that the scripted answer is correct")
+    parser.add_argument("--true-random", action="store_true",
+                        help="use True Random instead of a balanced deck")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true",
+                        help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = simulate(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print("{:<24} {}".format(key, value))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())